@@ -1,25 +1,50 @@
 # movies/admin.py
+from django import forms
 from django.contrib import admin
-from .models import Profile, Movie, Show, Booking
+from .models import Profile, Movie, Show, Booking, SeatReservation
+from .scheduling import hall_conflicts
 
 admin.site.register(Profile)
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
-    list_display = ('title', 'release_date', 'rating', 'is_featured')
+    list_display = ('title', 'release_date', 'rating', 'is_featured', 'tickets_sold', 'revenue')
     list_filter = ('is_featured', 'genre', 'release_date')
     search_fields = ('title', 'synopsis')
     list_editable = ('is_featured',)
+    readonly_fields = ('tickets_sold', 'bookings_count', 'last_sale_at')
+
+class ShowAdminForm(forms.ModelForm):
+    class Meta:
+        model = Show
+        fields = '__all__'
+
+    def clean(self):
+        data = super().clean()
+        movie, day, at = data.get('movie'), data.get('show_date'), data.get('show_time')
+        if data.get('is_active') and movie and day and at:
+            clashes = hall_conflicts(data.get('hall'), day, at, movie.duration_minutes, exclude_pk=self.instance.pk)
+            if clashes:
+                raise forms.ValidationError(f"{data['hall']} is busy then: {'; '.join(clashes)}")
+        return data
 
 @admin.register(Show)
 class ShowAdmin(admin.ModelAdmin):
-    list_display = ('movie', 'show_date', 'show_time', 'price', 'is_active', 'seats_booked', 'seats_total')
-    list_filter = ('show_date', 'is_active')
+    form = ShowAdminForm
+    list_display = ('movie', 'show_date', 'show_time', 'hall', 'price', 'is_active', 'seats_booked', 'seats_total', 'tickets_sold', 'gross_revenue')
+    list_filter = ('show_date', 'is_active', 'hall')
     search_fields = ('movie__title',)
     raw_id_fields = ('movie',)
+    readonly_fields = ('tickets_sold', 'bookings_count', 'gross_revenue', 'last_sale_at')
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ('ticket_number', 'user', 'movie', 'show', 'total_price', 'booking_time')
+    list_display = ('ticket_number', 'user', 'movie', 'show', 'total_price', 'booking_time', 'admitted_at')
     search_fields = ('ticket_number', 'user__username', 'movie__title')
     readonly_fields = ('booking_time',)
+
+@admin.register(SeatReservation)
+class SeatReservationAdmin(admin.ModelAdmin):
+    list_display = ('show', 'seat_id', 'booking', 'user', 'expires_at', 'created_at')
+    search_fields = ('seat_id', 'booking__ticket_number')
+    raw_id_fields = ('show', 'booking', 'user')
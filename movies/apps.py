@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'movies'
+
+    def ready(self):
+        # signal receivers that keep cached views fresh
+        from . import bookings, dashboard, gate, pagecache, profiles, search, suggest, thumbnails  # noqa: F401
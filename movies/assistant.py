@@ -0,0 +1,237 @@
+# movies/assistant.py
+"""
+Grounding for the chat assistant.
+
+The most common questions are answered straight from Movie, Show and
+Booking, with no provider call:
+
+* showtimes: "what's playing tonight at 9?", "Dune showtimes tomorrow"
+* seats:     "are there seats left for Dune tonight?"
+* prices:    "how much is a ticket for Dune?"
+* bookings:  "show my bookings"
+
+Each of these runs a couple of queries on show date and movie. Any other
+question goes to the provider. It then gets a compact summary of
+upcoming showtimes in the system prompt, so it does not have to guess
+(``context_for``). That summary is cached per catalog version and day.
+"""
+import re
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from . import holds, pagecache
+from .models import Booking, Movie, Show
+from .scheduling import theater_now
+from .seatmap import get_layout
+
+# showtimes listed in one reply / in the provider context
+MAX_SHOWS = 12
+CONTEXT_SHOWS = 40
+CONTEXT_CACHE_SECONDS = 300
+# "at 9" matches shows starting within this many minutes
+TIME_WINDOW_MINUTES = 60
+# days searched when the question names no day
+DEFAULT_DAYS = 7
+
+_BOOKINGS = re.compile(r"\bmy (bookings?|tickets?|reservations?|orders?)\b|\bdid i book\b")
+_SEATS = re.compile(r"\b(seats?|available|availability|sold out|left)\b")
+_PRICE = re.compile(r"\b(price|prices|cost|costs|how much|fare)\b")
+# a bare "show" or "today" is not enough: "show me how to ..." is not about showtimes
+_SHOWTIMES = re.compile(
+    r"\b(show ?times?|playing|showing|screenings?|timings?|what'?s on|shows? (?:tonight|today|tomorrow))\b"
+)
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_TIME = re.compile(r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\bat\s+(\d{1,2})(?::(\d{2}))?\b|\b(\d{1,2}):(\d{2})\b")
+_WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def detect_intent(text):
+    text = text.lower()
+    if _BOOKINGS.search(text):
+        return 'bookings'
+    if _PRICE.search(text):
+        return 'price'
+    if _SEATS.search(text):
+        return 'seats'
+    if _SHOWTIMES.search(text):
+        return 'showtimes'
+    return None
+
+
+def parse_day(text, today):
+    text = text.lower()
+    if 'tomorrow' in text:
+        return today + timedelta(days=1)
+    if 'today' in text or 'tonight' in text:
+        return today
+    m = _ISO_DATE.search(text)
+    if m:
+        try:
+            return datetime.strptime(m.group(1), '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    for i, name in enumerate(_WEEKDAYS):
+        if re.search(rf"\b{name}\b", text):
+            return today + timedelta(days=(i - today.weekday()) % 7)
+    return None
+
+
+def parse_time(text):
+    """Minutes after midnight, or None. A bare "at 9" means 9 pm at a cinema."""
+    m = _TIME.search(text.lower())
+    if not m:
+        return None
+    if m.group(1):
+        hour, minute, meridiem = int(m.group(1)), int(m.group(2) or 0), m.group(3)
+        if meridiem == 'pm' and hour < 12:
+            hour += 12
+        elif meridiem == 'am' and hour == 12:
+            hour = 0
+    elif m.group(4):
+        hour, minute = int(m.group(4)), int(m.group(5) or 0)
+        if 1 <= hour <= 11:
+            hour += 12
+    else:
+        hour, minute = int(m.group(6)), int(m.group(7))
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def _bookable_titles(today):
+    """``[(movie_id, lowercased title)]`` of movies with upcoming active shows."""
+    key = f'assistant:titles:{pagecache.catalog_version()}:{today.isoformat()}'
+    titles = cache.get(key)
+    if titles is None:
+        titles = [
+            (pk, title.lower())
+            for pk, title in Movie.objects.filter(shows__is_active=True, shows__show_date__gte=today)
+            .values_list('pk', 'title').distinct()
+        ]
+        cache.set(key, titles, CONTEXT_CACHE_SECONDS)
+    return titles
+
+
+def match_movie(text, today):
+    """The id of the longest bookable title named in ``text``, or None."""
+    text = text.lower()
+    best = None
+    for pk, title in _bookable_titles(today):
+        if title and re.search(rf"(?<!\w){re.escape(title)}(?!\w)", text):
+            if best is None or len(title) > len(best[1]):
+                best = (pk, title)
+    return best[0] if best else None
+
+
+def _upcoming_shows(now, day=None, movie_id=None, minutes=None):
+    today = now.date()
+    shows = Show.objects.filter(is_active=True).select_related('movie')
+    if day:
+        shows = shows.filter(show_date=day)
+    else:
+        shows = shows.filter(show_date__gte=today, show_date__lt=today + timedelta(days=DEFAULT_DAYS))
+    if movie_id:
+        shows = shows.filter(movie_id=movie_id)
+    if day is None or day == today:
+        # drop what has already started today
+        shows = shows.exclude(show_date=today, show_time__lt=now.time())
+    shows = list(shows.order_by('show_date', 'show_time')[:MAX_SHOWS * 4])
+    if minutes is not None:
+        shows = [s for s in shows if abs(s.show_time.hour * 60 + s.show_time.minute - minutes) <= TIME_WINDOW_MINUTES]
+    return shows[:MAX_SHOWS]
+
+
+def _when(show):
+    return f"{show.show_date:%a %d %b} {show.show_time:%H:%M}"
+
+
+def _hall(show):
+    return f" ({show.hall})" if show.hall else ""
+
+
+def _seats_left(shows):
+    held = dict(
+        holds.active_holds_for([s.pk for s in shows]).values_list('show_id').annotate(n=Count('id'))
+    )
+    return {s.pk: max(0, get_layout(s.hall).capacity - s.seats_booked - held.get(s.pk, 0)) for s in shows}
+
+
+def _no_shows(day, movie_id):
+    what = Movie.objects.filter(pk=movie_id).values_list('title', flat=True).first() if movie_id else None
+    when = f" on {day:%a %d %b}" if day else " in the next week"
+    return f"I couldn't find any {what + ' ' if what else ''}shows{when}."
+
+
+def _answer_bookings(user):
+    bookings = list(
+        Booking.objects.filter(user=user).select_related('movie', 'show').order_by('-booking_time')[:5]
+    )
+    if not bookings:
+        return "You don't have any bookings yet."
+    lines = ["Your latest bookings:"]
+    for b in bookings:
+        title = b.movie.title if b.movie else "Unknown movie"
+        when = _when(b.show) if b.show else b.booking_time.strftime('%a %d %b')
+        lines.append(f"- {title}, {when}, seats {b.seats} (ticket {b.ticket_number})")
+    return "\n".join(lines)
+
+
+def answer(text, user, now=None):
+    """
+    ``{'reply': str, 'intent': str}`` when the question is answered from
+    local data, otherwise None.
+    """
+    intent = detect_intent(text)
+    if intent is None:
+        return None
+    if intent == 'bookings':
+        if not user or not user.is_authenticated:
+            return None
+        return {'reply': _answer_bookings(user), 'intent': intent}
+
+    now = theater_now(now)
+    day = parse_day(text, now.date())
+    movie_id = match_movie(text, now.date())
+    if intent in ('seats', 'price') and movie_id is None and day is None:
+        # "how much is it?" has nothing to look up; let the model handle it
+        return None
+    shows = _upcoming_shows(now, day, movie_id, parse_time(text))
+    if not shows:
+        return {'reply': _no_shows(day, movie_id), 'intent': intent}
+
+    if intent == 'seats':
+        left = _seats_left(shows)
+        lines = [f"- {s.movie.title}, {_when(s)}{_hall(s)}: {left[s.pk]} seats left" for s in shows]
+        header = "Seat availability:"
+    elif intent == 'price':
+        lines = [f"- {s.movie.title}, {_when(s)}{_hall(s)}: {s.price or s.movie.price} per seat" for s in shows]
+        header = "Ticket prices:"
+    else:
+        lines = [f"- {s.movie.title}, {_when(s)}{_hall(s)}" for s in shows]
+        header = "Upcoming shows:"
+    return {'reply': "\n".join([header] + lines), 'intent': intent}
+
+
+def context_for(now=None):
+    """Compact upcoming-showtimes summary for the provider's system prompt."""
+    now = theater_now(now)
+    today = now.date()
+    key = f'assistant:context:{pagecache.catalog_version()}:{today.isoformat()}:{now.hour}'
+    context = cache.get(key)
+    if context is None:
+        shows = (
+            Show.objects.filter(is_active=True, show_date__gte=today, show_date__lte=today + timedelta(days=1))
+            .exclude(show_date=today, show_time__lt=now.time())
+            .order_by('show_date', 'show_time')
+            .values_list('movie__title', 'show_date', 'show_time')[:CONTEXT_SHOWS]
+        )
+        by_movie = {}
+        for title, day, at in shows:
+            by_movie.setdefault(title, []).append(f"{day:%a} {at:%H:%M}")
+        lines = [f"Today is {today:%A %d %B %Y}."]
+        lines += [f"{title}: {', '.join(times)}" for title, times in by_movie.items()] or ["No shows scheduled today or tomorrow."]
+        context = "\n".join(lines)
+        cache.set(key, context, CONTEXT_CACHE_SECONDS)
+    return context
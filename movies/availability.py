@@ -0,0 +1,99 @@
+# movies/availability.py
+"""
+Cached seat availability for the seat map.
+
+Each show carries ``seat_version``, bumped on every booking/hold change.
+The serialized seat state is cached under (show_id, version), so a poll
+that finds nothing new costs one primary-key lookup of the version and no
+re-serialization. With a shared cache (Redis) the version itself is also
+cached briefly under ``seat_version_cache_key``; a per-process cache
+would keep serving it after another worker bumped it, so there
+SEAT_VERSION_CACHE_SECONDS is 0 and the version is always read from the row.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import holds
+from .models import Show, seat_version_cache_key
+
+
+def _version_timeout():
+    return getattr(settings, 'SEAT_VERSION_CACHE_SECONDS', 0)
+
+
+def _state_key(show_id, version):
+    return f"show:{show_id}:seats:{version}"
+
+
+def get_seat_version(show_id):
+    """``(version, updated_at)`` for a show, or None if it does not exist."""
+    timeout = _version_timeout()
+    key = seat_version_cache_key(show_id)
+    cached = cache.get(key) if timeout else None
+    if cached is not None:
+        return cached
+    row = Show.objects.filter(pk=show_id).values_list('seat_version', 'seats_updated_at').first()
+    if row is None:
+        return None
+    if timeout:
+        cache.set(key, row, timeout)
+    return row
+
+
+def _build_state(show_id):
+    show = Show.objects.filter(pk=show_id).only('hall', 'seat_map', 'seat_version', 'seats_updated_at').first()
+    if show is None:
+        return None
+    held = list(holds.active_holds(show).values_list('seat_id', 'user_id', 'expires_at'))
+    booked = show.booked_seat_ids()
+    layout = show.seat_layout
+    return {
+        'version': show.seat_version,
+        'updated_at': show.seats_updated_at,
+        'booked': booked,
+        'holds': [(seat_id, user_id) for seat_id, user_id, _ in held],
+        # layout positions, so per-user lists can be merged in seat order
+        'order': {seat_id: layout.index_of(seat_id) for seat_id in booked + [h[0] for h in held]},
+        # the state goes stale by itself once the first hold runs out
+        'valid_until': min((expires_at for _, _, expires_at in held), default=None),
+    }
+
+
+def get_seat_state(show_id):
+    """
+    Seat state for a show: booked ids, active holds and version info.
+    Returns None for unknown shows.
+    """
+    current = get_seat_version(show_id)
+    if current is None:
+        return None
+    state = cache.get(_state_key(show_id, current[0]))
+    if state is not None and not _lapsed(state):
+        return state
+
+    if state is not None:
+        # a hold ran out: drop it for real so the version (and ETag) move on
+        holds.expire_holds(Show(pk=show_id))
+    state = _build_state(show_id)
+    if state is None:
+        return None
+    if _version_timeout():
+        cache.set(seat_version_cache_key(show_id), (state['version'], state['updated_at']), _version_timeout())
+    cache.set(_state_key(show_id, state['version']), state, getattr(settings, 'SEAT_STATE_CACHE_SECONDS', 300))
+    return state
+
+
+def _lapsed(state):
+    return state['valid_until'] is not None and state['valid_until'] <= timezone.now()
+
+
+def unavailable_seats(state, user):
+    """Seat ids ``user`` cannot pick: bookings plus other users' holds."""
+    user_id = getattr(user, 'pk', None)
+    others = [seat_id for seat_id, holder in state['holds'] if holder != user_id]
+    if not others:
+        return state['booked']
+    order = state['order']
+    booked = set(state['booked'])
+    return sorted(booked.union(others), key=lambda seat_id: (order.get(seat_id, -1), seat_id))
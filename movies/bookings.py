@@ -0,0 +1,141 @@
+# movies/bookings.py
+"""
+The "My Bookings" page: a user's bookings split into upcoming and past,
+newest booking first.
+
+* The split is a filter on the show's start time (theater wall clock, see
+  ``scheduling.theater_now``). Bookings whose show was removed count as
+  past.
+* Pages are keyset-paginated on (booking_time, id), like the catalog
+  (movies/catalog.py). Every page is then a range scan on
+  ``booking_user_time_idx``.
+* The summary (counts and the next show) is cached per user. It is
+  dropped when one of the user's bookings is saved or deleted (receivers
+  below, connected from MoviesConfig.ready), and when the catalog version
+  moves (shows rescheduled). It is recomputed once the cached next show
+  has started.
+"""
+import base64
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import dateformat, timezone
+
+from . import pagecache
+from .models import Booking
+from .scheduling import theater_now
+
+UPCOMING, PAST = 'upcoming', 'past'
+ORDER = ('-booking_time', '-id')
+# shown when neither the booking, the show nor the movie carries a price
+FALLBACK_PRICE = Decimal('50.00')
+
+
+def _timeout():
+    return getattr(settings, 'MY_BOOKINGS_CACHE_SECONDS', 300)
+
+
+def upcoming_q(now=None):
+    """Bookings whose show has not started yet."""
+    now = theater_now(now)
+    return Q(show__show_date__gt=now.date()) | Q(show__show_date=now.date(), show__show_time__gte=now.time())
+
+
+def bookings_for(user, tab, now=None):
+    qs = Booking.objects.filter(user=user).select_related('movie', 'show').order_by(*ORDER)
+    upcoming = upcoming_q(now)
+    return qs.filter(upcoming) if tab == UPCOMING else qs.exclude(upcoming)
+
+
+def encode_cursor(booking):
+    raw = f"{booking.booking_time.isoformat()}|{booking.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(booking_time, id)`` from a cursor, or None if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(qs, cursor=None, limit=20):
+    """``(bookings, next_cursor)`` for one page of ``qs`` (in ORDER) after ``cursor``."""
+    key = decode_cursor(cursor) if cursor else None
+    if key:
+        at, pk = key
+        qs = qs.filter(booking_time__lte=at).exclude(booking_time=at, pk__gte=pk)
+    rows = list(qs[:limit + 1])
+    page = rows[:limit]
+    return page, encode_cursor(page[-1]) if len(rows) > limit else None
+
+
+def booking_card(booking):
+    """What one booking row shows; the page and its JSON variant both use it."""
+    show, movie = booking.show, booking.movie
+    price = next(
+        (p for p in (booking.total_price, show and show.price, movie and movie.price) if p and p > 0),
+        FALLBACK_PRICE,
+    )
+    return {
+        'ticket_number': booking.ticket_number,
+        'title': movie.title if movie else 'Movie',
+        'show_date': show.show_date.isoformat() if show else None,
+        'show_time': show.show_time.strftime('%H:%M') if show else None,
+        'show_label': f"{dateformat.format(show.show_date, 'M j, Y')} • {dateformat.format(show.show_time, 'g:i A')}" if show else 'N/A',
+        'seats': booking.seats,
+        'price': f"{price:.2f}",
+        'booked_at': booking.booking_time.isoformat(),
+        'booked_label': dateformat.format(timezone.localtime(booking.booking_time), 'M j, Y, g:i A'),
+        'ticket_url': reverse('ticket') + f'?ticket={booking.ticket_number}',
+        'pdf_url': reverse('ticket_pdf', args=[booking.ticket_number]),
+    }
+
+
+def _summary_key(user_id):
+    return f'mybookings:{user_id}:{pagecache.catalog_version()}'
+
+
+def get_summary(user, now=None):
+    """``{'total', 'upcoming', 'past', 'next_show'}``, cached per user."""
+    current = theater_now(now)
+    key = _summary_key(user.pk)
+    summary = cache.get(key)
+    if summary is not None and not (summary['next_start'] and summary['next_start'] <= current):
+        return summary
+
+    upcoming = upcoming_q(now)
+    counts = Booking.objects.filter(user=user).aggregate(total=Count('id'), upcoming=Count('id', filter=upcoming))
+    nxt = (
+        Booking.objects.filter(upcoming, user=user).select_related('movie', 'show')
+        .order_by('show__show_date', 'show__show_time').first()
+    )
+    summary = {
+        'total': counts['total'],
+        'upcoming': counts['upcoming'],
+        'past': counts['total'] - counts['upcoming'],
+        'next_show': booking_card(nxt) if nxt else None,
+        'next_start': datetime.combine(nxt.show.show_date, nxt.show.show_time) if nxt else None,
+    }
+    cache.set(key, summary, _timeout())
+    return summary
+
+
+def invalidate(user_id):
+    cache.delete(_summary_key(user_id))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_on_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate(instance.user_id))
@@ -0,0 +1,147 @@
+# movies/breaker.py
+"""
+Circuit breaker and retry budget for the chat provider (movies/chat.py).
+
+The breaker has three states:
+
+* closed:    calls go through. Outcomes are kept for ``window`` seconds. Once
+             the window holds at least ``min_calls`` calls and the failure
+             rate reaches ``failure_rate``, the breaker opens.
+* open:      calls fail fast (the view answers 503) for ``reset_seconds``.
+* half-open: a single probe call is let through. If it succeeds the breaker
+             closes; if it fails the breaker opens again.
+
+The retry budget caps retries at ``retry_ratio`` of the calls in the
+window, plus a small floor. A struggling provider therefore never sees
+more than a fixed fraction of extra traffic.
+
+State is per process. Every transition is logged and counted, and
+``stats()`` serves the ``chat_health`` view.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=60, min_calls=5, failure_rate=0.5, reset_seconds=30,
+                 retry_ratio=0.2, retry_floor=3, clock=time.monotonic):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.reset_seconds = reset_seconds
+        self.retry_ratio = retry_ratio
+        self.retry_floor = retry_floor
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self._calls = deque()     # (time, ok)
+            self._retries = deque()   # time
+            self._opened_at = None
+            self._probe_at = None
+            self.transitions = Counter()
+
+    def configure(self, **options):
+        for name, value in options.items():
+            setattr(self, name, value)
+
+    # ---- internals, called with the lock held ----
+
+    def _trim(self, now):
+        horizon = now - self.window
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+        while self._retries and self._retries[0] < horizon:
+            self._retries.popleft()
+
+    def _move(self, state, now):
+        logger.warning("circuit %s: %s -> %s", self.name, self.state, state)
+        self.transitions[f'{self.state}->{state}'] += 1
+        self.state = state
+        if state == OPEN:
+            self._opened_at = now
+        elif state == CLOSED:
+            self._calls.clear()
+            self._opened_at = None
+        self._probe_at = now if state == HALF_OPEN else None
+
+    # ---- public API ----
+
+    def allow(self):
+        """May a call go out now? In half-open state only one probe is let through."""
+        with self._lock:
+            now = self.clock()
+            if self.state == OPEN:
+                if now - self._opened_at < self.reset_seconds:
+                    return False
+                self._move(HALF_OPEN, now)
+                return True
+            if self.state == HALF_OPEN:
+                # a probe that never reported back (cancelled) frees the slot after reset_seconds
+                if now - self._probe_at < self.reset_seconds:
+                    return False
+                self._probe_at = now
+            return True
+
+    def rejecting(self):
+        """Would ``allow()`` refuse right now? Does not use up the probe."""
+        with self._lock:
+            now = self.clock()
+            if self.state == OPEN:
+                return now - self._opened_at < self.reset_seconds
+            if self.state == HALF_OPEN:
+                return now - self._probe_at < self.reset_seconds
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            now = self.clock()
+            if self.state == HALF_OPEN:
+                self._move(CLOSED if ok else OPEN, now)
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((now, ok))
+            self._trim(now)
+            failures = sum(1 for _, good in self._calls if not good)
+            if len(self._calls) >= self.min_calls and failures >= self.failure_rate * len(self._calls):
+                self._move(OPEN, now)
+
+    def try_retry(self):
+        """Spend one retry from the budget; False when it is used up."""
+        with self._lock:
+            now = self.clock()
+            self._trim(now)
+            if len(self._retries) >= self.retry_floor + self.retry_ratio * len(self._calls):
+                return False
+            self._retries.append(now)
+            return True
+
+    def retry_after(self):
+        """Seconds until the next probe may go out (0 when closed)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+            since = self.clock() - (self._opened_at if self.state == OPEN else self._probe_at)
+            return max(0, int(self.reset_seconds - since) + 1)
+
+    def stats(self):
+        with self._lock:
+            self._trim(self.clock())
+            return {
+                'state': self.state,
+                'window_calls': len(self._calls),
+                'window_failures': sum(1 for _, ok in self._calls if not ok),
+                'window_retries': len(self._retries),
+                'transitions': dict(self.transitions),
+            }
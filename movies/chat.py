@@ -0,0 +1,414 @@
+# movies/chat.py
+"""
+Async client for the OpenAI-compatible chat provider behind /api/chat/.
+
+* Under ASGI (quickshow_backend/asgi.py, with settings.CHAT_SHARED_CLIENT)
+  one pooled ``httpx.AsyncClient`` per event loop keeps TLS connections
+  alive between requests and is closed when its loop shuts down. Under
+  WSGI every request runs on a fresh loop, so each one opens and closes
+  its own client (limits in settings.CHAT_*).
+* ``acquire_slot`` enforces a per-user requests-per-minute limit and a cap
+  on in-flight requests. The counters live in the shared cache, so the
+  limits hold across worker processes.
+* Successful replies are kept in a per-process LRU keyed by model and
+  normalized prompt, with a TTL. Repeated questions ("what's showing
+  tonight?") skip the provider entirely.
+* Every call goes through the ``upstream`` circuit breaker
+  (movies/breaker.py). While it is open, calls fail fast with
+  UNAVAILABLE. Failures that the provider never acted on (connection
+  errors, 502/503/504) are retried with jittered backoff, within the
+  retry budget.
+
+The provider URL and key come from GROQ_API_URL / GROQ_API_KEY
+(environment or settings), as before. Any server speaking the
+``/openai/v1/chat/completions`` protocol works, including a local stub.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+
+from .breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_api_key():
+    key = os.environ.get("GROQ_API_KEY") or os.environ.get("OPENAI_API_KEY")
+    if not key:
+        # fallback to settings if present
+        key = getattr(settings, "GROQ_API_KEY", None) or getattr(settings, "OPENAI_API_KEY", None)
+    if not key:
+        return None
+    return str(key).strip()
+
+
+def get_endpoint():
+    raw = (os.environ.get("GROQ_API_URL") or getattr(settings, "GROQ_API_URL", "") or "").strip()
+    base = raw.rstrip('/') if raw else "https://api.groq.com"
+    # if user already set a full openai path (contains /openai/), use it
+    if "/openai/" in base.lower():
+        return base
+    return base + "/openai/v1/chat/completions"
+
+
+# ---------------- pooled client ----------------
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def _new_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(_setting('CHAT_TIMEOUT_SECONDS', 15), connect=5),
+        limits=httpx.Limits(
+            max_connections=_setting('CHAT_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=_setting('CHAT_MAX_CONNECTIONS', 20),
+            keepalive_expiry=60,
+        ),
+    )
+
+
+async def _close_with_loop(loop, client):
+    # the loop cancels its pending tasks on shutdown; that is our cue
+    try:
+        await asyncio.Event().wait()
+    finally:
+        _clients.pop(loop, None)
+        await client.aclose()
+
+
+def get_client():
+    """The shared client of the running (long-lived) event loop."""
+    loop = asyncio.get_running_loop()
+    client, _ = _clients.get(loop, (None, None))
+    if client is None or client.is_closed:
+        client = _new_client()
+        # keep a reference to the task, or it may be collected while pending
+        _clients[loop] = (client, loop.create_task(_close_with_loop(loop, client)))
+    return client
+
+
+@asynccontextmanager
+async def open_client():
+    """
+    A client for one provider exchange: the loop's shared client when
+    settings.CHAT_SHARED_CLIENT is on (ASGI), else a fresh one closed on exit.
+    """
+    if _setting('CHAT_SHARED_CLIENT', False):
+        yield get_client()
+    else:
+        async with _new_client() as client:
+            yield client
+
+
+# ---------------- circuit breaker ----------------
+
+UNAVAILABLE = 'Chat service is temporarily unavailable, please try again shortly.'
+# the provider did not act on these, so a retry cannot duplicate work
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+upstream = CircuitBreaker(
+    'chat-provider',
+    window=_setting('CHAT_BREAKER_WINDOW_SECONDS', 60),
+    min_calls=_setting('CHAT_BREAKER_MIN_CALLS', 5),
+    failure_rate=_setting('CHAT_BREAKER_FAILURE_RATE', 0.5),
+    reset_seconds=_setting('CHAT_BREAKER_RESET_SECONDS', 30),
+    retry_ratio=_setting('CHAT_RETRY_BUDGET', 0.2),
+)
+
+
+def _healthy(status):
+    # 4xx other than 429 is our request's fault, not the provider's
+    return status < 500 and status != 429
+
+
+async def _backoff(attempt):
+    base = _setting('CHAT_RETRY_BACKOFF_SECONDS', 0.25)
+    # "full jitter": uniform over [0, base * 2^attempt]
+    await asyncio.sleep(random.uniform(0, base * 2 ** attempt))
+
+
+async def _send(client, payload, headers, stream=False):
+    """
+    POST ``payload`` through the breaker. Returns ``(response, None)`` or
+    ``(None, error)``. With ``stream`` the body is left unread and the
+    caller must close the response before ``client``.
+    """
+    attempts = 1 + _setting('CHAT_RETRY_ATTEMPTS', 2)
+    for attempt in range(attempts):
+        if attempt:
+            if not upstream.try_retry():
+                break
+            await _backoff(attempt - 1)
+        if not upstream.allow():
+            return None, UNAVAILABLE
+        request = client.build_request('POST', get_endpoint(), json=payload, headers=headers)
+        try:
+            resp = await client.send(request, stream=stream)
+        except RETRY_EXCEPTIONS:
+            logger.warning("Chat provider unreachable (attempt %s/%s)", attempt + 1, attempts)
+            upstream.record(False)
+            error = 'Upstream connection error.'
+            continue
+        except httpx.TimeoutException:
+            logger.warning("Chat provider timed out")
+            upstream.record(False)
+            return None, 'Upstream timeout.'
+        except httpx.HTTPError:
+            logger.exception("Network error calling Groq/OpenAI-compatible endpoint")
+            upstream.record(False)
+            return None, 'Upstream connection error.'
+
+        upstream.record(_healthy(resp.status_code))
+        if resp.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+            error = _provider_error(resp.status_code, (await resp.aread()).decode('utf-8', 'replace'))
+            await resp.aclose()
+            continue
+        return resp, None
+    return None, error
+
+
+# ---------------- response cache ----------------
+
+class ReplyCache:
+    """Thread-safe LRU of replies with a per-entry TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            reply, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return reply
+
+    def set(self, key, reply):
+        with self._lock:
+            self._data[key] = (reply, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+reply_cache = ReplyCache(
+    max_size=_setting('CHAT_CACHE_SIZE', 256),
+    ttl=_setting('CHAT_CACHE_SECONDS', 600),
+)
+
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(text):
+    return _SPACE.sub(' ', (text or '').strip().lower()).rstrip('?!. ')
+
+
+def cache_key(model, messages):
+    # system prompts are fixed; the user turns decide the reply
+    turns = [normalize_prompt(m['content']) if m['role'] == 'user' else m['content'] for m in messages]
+    return json.dumps([model] + turns)
+
+
+# ---------------- per-user limits ----------------
+
+async def _incr(key, timeout):
+    # add() is a no-op when the key exists, so concurrent callers share it
+    await cache.aadd(key, 0, timeout)
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout)
+        return 1
+
+
+async def _decr(key):
+    try:
+        await cache.adecr(key)
+    except ValueError:
+        pass
+
+
+async def acquire_slot(user_id):
+    """
+    Reserve a chat request for ``user_id``. Returns None when allowed (await
+    ``release_slot`` afterwards), otherwise a message for a 429.
+    """
+    window = int(time.time() // 60)
+    if await _incr(f'chat:rate:{user_id}:{window}', 120) > _setting('CHAT_RATE_LIMIT', 20):
+        return 'Too many messages, please wait a minute.'
+    inflight = f'chat:inflight:{user_id}'
+    # the TTL frees slots leaked by a crashed worker
+    if await _incr(inflight, _setting('CHAT_TIMEOUT_SECONDS', 15) * 2) > _setting('CHAT_MAX_CONCURRENT', 2):
+        await _decr(inflight)
+        return 'Too many chats in progress, please wait for a reply.'
+    return None
+
+
+async def release_slot(user_id):
+    await _decr(f'chat:inflight:{user_id}')
+
+
+# ---------------- provider call ----------------
+
+def _parse_reply(data):
+    # Try OpenAI shape first
+    choices = data.get('choices') or []
+    if choices:
+        message = choices[0].get('message') or {}
+        content = message.get('content') or message.get('text') or None
+        if content:
+            return content
+    if isinstance(data.get('result'), str):
+        return data.get('result')
+    return json.dumps(data)
+
+
+def _provider_error(status, body):
+    try:
+        data = json.loads(body)
+        err_msg = data.get('error', {}).get('message') or data.get('message') or str(data)
+    except Exception:
+        err_msg = body or f"HTTP {status}"
+    logger.warning("Chat provider returned %s: %s", status, err_msg)
+
+    if status in (401, 403):
+        return 'API key unauthorized.'
+    if status in (429, 402):
+        return 'Quota exceeded or rate limited by provider.'
+    return f'Chat provider error: {err_msg}'
+
+
+async def complete(messages, model=DEFAULT_MODEL, max_tokens=600):
+    """``{'reply': str, 'cached': bool}`` or ``{'error': str}``."""
+    key = get_api_key()
+    if not key:
+        return {'error': 'Chat service not configured (missing API key).'}
+
+    ckey = cache_key(model, messages)
+    cached = reply_cache.get(ckey)
+    if cached is not None:
+        return {'reply': cached, 'cached': True}
+
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens}
+    headers = {"Authorization": f"Bearer {key}"}
+    async with open_client() as client:
+        resp, error = await _send(client, payload, headers)
+    if error:
+        return {'error': error, 'unavailable': error == UNAVAILABLE}
+
+    # send() read the whole body, so the response outlives its client
+    status = resp.status_code
+    logger.debug("Chat provider response: status=%s, snippet=%s", status, (resp.text or "")[:1000])
+    if status != 200:
+        return {'error': _provider_error(status, resp.text)}
+    try:
+        reply = _parse_reply(resp.json())
+    except ValueError:
+        return {'error': 'Invalid JSON from chat provider.'}
+    reply_cache.set(ckey, reply)
+    return {'reply': reply, 'cached': False}
+
+
+async def stream(messages, model=DEFAULT_MODEL, max_tokens=600):
+    """
+    The reply as it is generated: yields ``('delta', text)`` pieces, then
+    ``('done', {'cached': bool})`` or ``('error', message)``.
+
+    Asks the provider for ``stream: true`` and relays its SSE chunks. If the
+    provider answers with plain JSON instead, that reply is one delta.
+    Closing the generator early, e.g. because the browser went away, closes
+    the upstream response. Partial replies are never cached.
+    """
+    key = get_api_key()
+    if not key:
+        yield ('error', 'Chat service not configured (missing API key).')
+        return
+
+    ckey = cache_key(model, messages)
+    cached = reply_cache.get(ckey)
+    if cached is not None:
+        yield ('delta', cached)
+        yield ('done', {'cached': True})
+        return
+
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "stream": True}
+    headers = {"Authorization": f"Bearer {key}"}
+    # the client outlives the streamed response; closing this generator closes both
+    async with open_client() as client:
+        resp, error = await _send(client, payload, headers, stream=True)
+        if error:
+            yield ('error', error)
+            return
+
+        parts = []
+        try:
+            async with aclosing(resp):
+                if resp.status_code != 200:
+                    body = (await resp.aread()).decode('utf-8', 'replace')
+                    yield ('error', _provider_error(resp.status_code, body))
+                    return
+                if not resp.headers.get('content-type', '').startswith('text/event-stream'):
+                    try:
+                        reply = _parse_reply(json.loads(await resp.aread()))
+                    except ValueError:
+                        yield ('error', 'Invalid JSON from chat provider.')
+                        return
+                    parts.append(reply)
+                    yield ('delta', reply)
+                else:
+                    async for line in resp.aiter_lines():
+                        if not line.startswith('data:'):
+                            continue
+                        data = line[5:].strip()
+                        if data == '[DONE]':
+                            break
+                        try:
+                            chunk = json.loads(data)
+                        except ValueError:
+                            continue
+                        for choice in chunk.get('choices') or []:
+                            text = (choice.get('delta') or {}).get('content')
+                            if text:
+                                parts.append(text)
+                                yield ('delta', text)
+        except httpx.HTTPError:
+            logger.exception("Network error streaming from Groq/OpenAI-compatible endpoint")
+            yield ('error', 'Upstream connection error.')
+            return
+
+    if parts:
+        reply_cache.set(ckey, ''.join(parts))
+    yield ('done', {'cached': False})
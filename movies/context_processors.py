@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from .profiles import navbar_snapshot
+
+
+def navbar_profile(request):
+    """``navbar_profile.nav`` / ``.nav_webp`` for the signed-in user; looked up only if a template uses it."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'navbar_profile': SimpleLazyObject(lambda: navbar_snapshot(user))}
@@ -0,0 +1,109 @@
+# movies/dashboard.py
+"""
+Data for the staff dashboard, fetched in a fixed number of queries.
+
+Headline numbers and each page of active movies are cached for
+``settings.DASHBOARD_CACHE_SECONDS``. Every cache key carries a generation
+number, and any Show or Booking change bumps it (receivers below,
+connected from MoviesConfig.ready), so staff never wait a full TTL to see
+a change.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Booking, Movie, Show
+
+GENERATION_KEY = 'dashboard:generation'
+# showtime pills rendered per movie card
+SHOWS_PER_MOVIE = 6
+MOVIES_PER_PAGE = 12
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_SECONDS', 60)
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def get_totals():
+    """Headline numbers: users, bookings, revenue, active shows."""
+    key = f'dashboard:{_generation()}:totals'
+    totals = cache.get(key)
+    if totals is None:
+        revenue = Movie.objects.aggregate(revenue=Sum('revenue'))['revenue']
+        totals = {
+            'total_users_count': get_user_model().objects.count(),
+            'total_bookings_count': Booking.objects.count(),
+            'total_revenue': revenue or 0,
+            'active_shows_count': Show.objects.filter(is_active=True).count(),
+        }
+        cache.set(key, totals, _timeout())
+    return totals
+
+
+def get_active_movies_page(page_number):
+    """
+    One page of movies with active shows. Each movie carries
+    ``upcoming_shows`` (at most SHOWS_PER_MOVIE, sliced in SQL) and
+    ``upcoming_count`` (all of its active shows) and ``more_count`` (the
+    shows not rendered).
+    """
+    generation = _generation()
+    active = Show.objects.filter(is_active=True).order_by('show_date', 'show_time')
+    movies = (
+        Movie.objects
+        .annotate(upcoming_count=Count('shows', filter=Q(shows__is_active=True)))
+        .filter(upcoming_count__gt=0)
+        .order_by('-release_date', 'pk')
+        .prefetch_related(Prefetch('shows', queryset=active[:SHOWS_PER_MOVIE], to_attr='upcoming_shows'))
+    )
+    paginator = Paginator(movies, MOVIES_PER_PAGE)
+    count_key = f'dashboard:{generation}:movies:count'
+    count = cache.get(count_key)
+    if count is None:
+        count = paginator.count
+        cache.set(count_key, count, _timeout())
+    else:
+        paginator.count = count
+    # key on the resolved page, so '?page=x' or '?page=999' share the last/first page's entry
+    page = paginator.get_page(page_number)
+    key = f'dashboard:{generation}:movies:{page.number}'
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    items = list(page.object_list)
+    for item in items:
+        item.more_count = item.upcoming_count - len(item.upcoming_shows)
+    result = {
+        'items': items,
+        'number': page.number,
+        'num_pages': page.paginator.num_pages,
+        'has_previous': page.has_previous(),
+        'has_next': page.has_next(),
+    }
+    cache.set(key, result, _timeout())
+    return result
+
+
+@receiver(post_save, sender=Show)
+@receiver(post_delete, sender=Show)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_on_change(sender, **kwargs):
+    transaction.on_commit(invalidate)
@@ -1,7 +1,10 @@
+from datetime import datetime
+
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from .models import Profile
+from . import scheduling
+from .models import Movie, Profile
 
 class CustomUserCreationForm(UserCreationForm):
     
@@ -58,3 +61,89 @@ class ProfileUpdateForm(forms.ModelForm):
         model = Profile
         fields = ['profile_pic']
 
+
+
+class BulkScheduleForm(forms.Form):
+    """
+    A recurring run of shows: every chosen weekday between two dates, at each
+    time slot, in each hall. See movies/scheduling.py.
+    """
+    WEEKDAYS = [(0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun')]
+    MAX_DAYS = 366
+
+    movie = forms.ModelChoiceField(queryset=Movie.objects.order_by('-release_date'))
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=WEEKDAYS, coerce=int, required=False, widget=forms.CheckboxSelectMultiple,
+        help_text='Leave empty for every day.',
+    )
+    times = forms.CharField(help_text='Comma separated, e.g. 10:00, 14:30, 21:00')
+    halls = forms.CharField(help_text='Comma separated, e.g. Hall 1, Hall 2')
+    price = forms.DecimalField(max_digits=8, decimal_places=2, min_value=0)
+    weekend_price = forms.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    evening_price = forms.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    evening_from = forms.TimeField(required=False, initial='18:00', widget=forms.TimeInput(attrs={'type': 'time'}))
+    skip_conflicts = forms.BooleanField(required=False, help_text='Create the rest when some slots clash.')
+    dry_run = forms.BooleanField(required=False)
+
+    def clean_times(self):
+        times = set()
+        for raw in self.cleaned_data['times'].split(','):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                times.add(datetime.strptime(raw, '%H:%M').time())
+            except ValueError:
+                raise forms.ValidationError(f'"{raw}" is not a HH:MM time.')
+        if not times:
+            raise forms.ValidationError('Give at least one time.')
+        return sorted(times)
+
+    def clean_halls(self):
+        halls = []
+        for raw in self.cleaned_data['halls'].split(','):
+            raw = raw.strip()
+            if raw and raw not in halls:
+                halls.append(raw)
+        if not halls:
+            raise forms.ValidationError('Give at least one hall.')
+        return halls
+
+    def clean(self):
+        data = super().clean()
+        start, end = data.get('start_date'), data.get('end_date')
+        if start and end:
+            if end < start:
+                self.add_error('end_date', 'End date is before the start date.')
+            elif (end - start).days >= self.MAX_DAYS:
+                self.add_error('end_date', f'Schedule at most {self.MAX_DAYS} days at once.')
+        if not data.get('weekdays'):
+            data['weekdays'] = [day for day, _ in self.WEEKDAYS]
+        if data.get('evening_price') is not None and not data.get('evening_from'):
+            self.add_error('evening_from', 'Say when evening prices start.')
+        if not self.errors:
+            total = self.recurrence().count()
+            if total > scheduling.MAX_SHOWS_PER_REQUEST:
+                raise forms.ValidationError(
+                    f'That is {total} shows; schedule at most {scheduling.MAX_SHOWS_PER_REQUEST} at once.'
+                )
+        return data
+
+    def recurrence(self):
+        data = self.cleaned_data
+        return scheduling.Recurrence(
+            movie=data['movie'],
+            start_date=data['start_date'],
+            end_date=data['end_date'],
+            weekdays=data['weekdays'],
+            times=data['times'],
+            halls=data['halls'],
+            prices=scheduling.PriceRule(
+                price=data['price'],
+                weekend_price=data.get('weekend_price'),
+                evening_price=data.get('evening_price'),
+                evening_from=data.get('evening_from'),
+            ),
+        )
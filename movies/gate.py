@@ -0,0 +1,173 @@
+# movies/gate.py
+"""
+Ticket validation at the cinema entrance.
+
+The ticket QR code carries a signed token, ``<ticket>:<show id>:<HMAC>``
+(``django.core.signing.Signer`` with a salt of its own). Forged, altered
+and truncated tokens are rejected from the signature alone, and so are
+tickets scanned at the wrong show's gate. None of these touch the
+database.
+
+A valid token is admitted with a single conditional UPDATE that sets
+``admitted_at`` only if it is still empty. Two gates scanning the same
+ticket at the same moment therefore admit it once. The other gets
+``already_admitted``, from any worker process.
+
+Each process also remembers the tickets it has admitted, per show
+(``admitted``). The memory is only consulted once the UPDATE has matched
+no row, where it saves the lookup that tells ``already_admitted`` from
+``not_found``; so a ticket whose ``admitted_at`` staff cleared after a
+mis-scan is admitted again by every worker. Saving or deleting a booking
+drops its entry (receiver below, connected from MoviesConfig.ready). A
+show's set is dropped two days after its first admission.
+
+``admit_many`` takes a batch from a scanner that was offline. Each scan
+keeps its own scan time, and the batch runs in one transaction.
+"""
+import threading
+from datetime import timedelta
+
+from django.core import signing
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking
+
+SALT = 'movies.gate'
+
+ADMITTED = 'admitted'
+ALREADY_ADMITTED = 'already_admitted'
+INVALID = 'invalid'
+WRONG_SHOW = 'wrong_show'
+NOT_FOUND = 'not_found'
+
+_signer = signing.Signer(salt=SALT)
+
+
+def token_for(booking):
+    """The signed token printed in ``booking``'s QR code."""
+    return _signer.sign(f'{booking.ticket_number}:{booking.show_id or 0}')
+
+
+def verify(token):
+    """``(ticket_number, show_id)`` for a genuine token, otherwise None."""
+    if not isinstance(token, str):
+        return None
+    try:
+        value = _signer.unsign(token.strip())
+        ticket, show_id = value.rsplit(':', 1)
+        return ticket, int(show_id)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+class AdmittedSet:
+    """Per-process record of admitted tickets, per show."""
+
+    def __init__(self):
+        self._shows = {}   # show_id -> (day first seen, {ticket: admitted_at})
+        self._lock = threading.Lock()
+
+    def get(self, show_id, ticket):
+        entry = self._shows.get(show_id)
+        return entry[1].get(ticket) if entry else None
+
+    def add(self, show_id, ticket, admitted_at):
+        with self._lock:
+            if show_id not in self._shows:
+                self._prune(timezone.localdate())
+                self._shows[show_id] = (timezone.localdate(), {})
+            self._shows[show_id][1].setdefault(ticket, admitted_at)
+
+    def discard(self, show_id, ticket):
+        with self._lock:
+            entry = self._shows.get(show_id)
+            if entry:
+                entry[1].pop(ticket, None)
+
+    def _prune(self, today):
+        # a show's gate closes the day it plays (or just after midnight)
+        horizon = today - timedelta(days=1)
+        for show_id in [pk for pk, (day, _) in self._shows.items() if day < horizon]:
+            del self._shows[show_id]
+
+    def clear(self):
+        with self._lock:
+            self._shows.clear()
+
+    def __len__(self):
+        return sum(len(tickets) for _, tickets in self._shows.values())
+
+
+admitted = AdmittedSet()
+
+
+def _result(status, ticket=None, admitted_at=None):
+    result = {'status': status, 'ok': status == ADMITTED}
+    if ticket:
+        result['ticket'] = ticket
+    if admitted_at:
+        result['admitted_at'] = admitted_at.isoformat()
+    return result
+
+
+def _check(token, show_id):
+    """The no-database part of a scan: ``(ticket, show) or None, early result or None``."""
+    parsed = verify(token)
+    if parsed is None:
+        return None, _result(INVALID)
+    ticket, token_show = parsed
+    if show_id is not None and token_show != show_id:
+        return None, _result(WRONG_SHOW, ticket)
+    return parsed, None
+
+
+def _admit(ticket, show_id, at):
+    updated = (
+        Booking.objects.filter(ticket_number=ticket, show_id=show_id or None, admitted_at__isnull=True)
+        .update(admitted_at=at)
+    )
+    if updated:
+        transaction.on_commit(lambda: admitted.add(show_id, ticket, at))
+        return _result(ADMITTED, ticket, at)
+    # nothing updated: admitted elsewhere already, or the booking is gone
+    seen = admitted.get(show_id, ticket)
+    if seen is not None:
+        return _result(ALREADY_ADMITTED, ticket, seen)
+    row = Booking.objects.filter(ticket_number=ticket, show_id=show_id or None).values_list('admitted_at', flat=True).first()
+    if row is None:
+        return _result(NOT_FOUND, ticket)
+    transaction.on_commit(lambda: admitted.add(show_id, ticket, row))
+    return _result(ALREADY_ADMITTED, ticket, row)
+
+
+def admit(token, show_id=None, at=None):
+    """
+    Validate one scan. ``show_id`` is the show the gate is checking, if
+    any. Returns ``{'status', 'ok', 'ticket'?, 'admitted_at'?}``.
+    """
+    parsed, early = _check(token, show_id)
+    if early:
+        return early
+    return _admit(*parsed, at or timezone.now())
+
+
+def admit_many(scans, show_id=None):
+    """``admit`` for ``[(token, scanned_at or None), ...]``, in one transaction, in order."""
+    now = timezone.now()
+    results = []
+    with transaction.atomic():
+        for token, scanned_at in scans:
+            parsed, early = _check(token, show_id)
+            results.append(early or _admit(*parsed, scanned_at or now))
+    return results
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def forget_on_change(sender, instance, **kwargs):
+    # a cleared admitted_at or a refund must not be answered from memory
+    show_id, ticket = instance.show_id or 0, instance.ticket_number
+    transaction.on_commit(lambda: admitted.discard(show_id, ticket))
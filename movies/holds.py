@@ -0,0 +1,133 @@
+# movies/holds.py
+"""
+Temporary seat holds taken between seat selection and checkout.
+
+A hold is a SeatReservation row with no booking and an ``expires_at``. It
+shares the unique (show, seat_id) constraint with real bookings, so a held
+seat cannot be booked or held by anyone else until it expires. Expired
+holds are ignored by every read, removed lazily whenever a write touches
+the same seats, and swept in bulk by ``manage.py expire_seat_holds``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import SeatReservation, Show
+
+
+def hold_minutes():
+    return getattr(settings, 'SEAT_HOLD_MINUTES', 10)
+
+
+def max_hold_seats():
+    return getattr(settings, 'SEAT_HOLD_MAX_SEATS', 10)
+
+
+def _holds():
+    return SeatReservation.objects.filter(booking__isnull=True, expires_at__isnull=False)
+
+
+def active_holds(show, now=None):
+    """QuerySet of unexpired holds on ``show``."""
+    return _holds().filter(show=show, expires_at__gt=now or timezone.now())
+
+
+def active_holds_for(show_ids, now=None):
+    """Unexpired holds across several shows."""
+    return _holds().filter(show_id__in=list(show_ids), expires_at__gt=now or timezone.now())
+
+
+def user_holds(show, user, now=None):
+    return active_holds(show, now).filter(user=user)
+
+
+def expire_holds(show=None, seat_ids=None, now=None):
+    """Delete expired holds (optionally only for one show / some seats)."""
+    qs = _holds().filter(expires_at__lte=now or timezone.now())
+    if show is not None:
+        qs = qs.filter(show=show)
+    if seat_ids is not None:
+        qs = qs.filter(seat_id__in=list(seat_ids))
+    freed = {}
+    for show_id, seat_id in qs.values_list('show_id', 'seat_id'):
+        freed.setdefault(show_id, []).append(seat_id)
+    if not freed:
+        return 0
+    removed = qs.delete()[0]
+    for show_id, seats in freed.items():
+        # holder=None: the seats are free for everyone, including the old holder
+        Show.bump_seat_version(show_id, freed=seats)
+    return removed
+
+
+def place_holds(show, user, seat_ids):
+    """
+    Make ``seat_ids`` the whole of ``user``'s hold on ``show``: seats the
+    user already holds among them are refreshed, the user's other holds on
+    the show are released. Returns ``(expires_at, conflicts)``; on conflict
+    nothing changes.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=hold_minutes())
+    seat_ids = sorted(set(seat_ids))
+    # booked seats are refused from the bitmap before touching any rows
+    booked = show.seat_conflicts(seat_ids)
+    if booked:
+        return None, booked
+    expire_holds(show, seat_ids, now)
+    try:
+        with transaction.atomic():
+            dropped_qs = user_holds(show, user, now).exclude(seat_id__in=seat_ids)
+            dropped = list(dropped_qs.values_list('seat_id', flat=True))
+            if dropped:
+                dropped_qs.delete()
+            mine = set(user_holds(show, user, now).values_list('seat_id', flat=True))
+            new_holds = [
+                SeatReservation(show=show, seat_id=seat_id, user=user, expires_at=expires_at)
+                for seat_id in seat_ids if seat_id not in mine
+            ]
+            SeatReservation.objects.bulk_create(new_holds)
+            user_holds(show, user, now).filter(seat_id__in=seat_ids).update(expires_at=expires_at)
+            if new_holds or dropped:
+                Show.bump_seat_version(show.pk, taken=[h.seat_id for h in new_holds], freed=dropped, holder=user.pk)
+    except IntegrityError:
+        conflicts = sorted(SeatReservation.objects.filter(
+            show=show, seat_id__in=seat_ids
+        ).exclude(user=user, booking__isnull=True).values_list('seat_id', flat=True))
+        return None, conflicts
+    return expires_at, []
+
+
+def extend_holds(show, user):
+    """Push every active hold of ``user`` on ``show`` to a fresh expiry."""
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=hold_minutes())
+    count = user_holds(show, user, now).update(expires_at=expires_at)
+    return expires_at if count else None
+
+
+def release_holds(show, user, seat_ids=None):
+    qs = _holds().filter(show=show, user=user)
+    if seat_ids is not None:
+        qs = qs.filter(seat_id__in=list(seat_ids))
+    seats = list(qs.values_list('seat_id', flat=True))
+    if not seats:
+        return 0
+    released = qs.delete()[0]
+    Show.bump_seat_version(show.pk, freed=seats, holder=user.pk)
+    return released
+
+
+def claim_held_seats(show, user, seat_ids, booking, now=None):
+    """
+    Turn the user's active holds among ``seat_ids`` into reservations of
+    ``booking``. Must run inside the checkout transaction. Returns the set
+    of seat ids that were converted.
+    """
+    qs = user_holds(show, user, now).filter(seat_id__in=list(seat_ids))
+    held = dict(qs.select_for_update().values_list('pk', 'seat_id'))
+    if held:
+        SeatReservation.objects.filter(pk__in=list(held)).update(booking=booking, expires_at=None)
+    return set(held.values())
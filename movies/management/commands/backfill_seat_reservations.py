@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from movies.models import Booking, SeatReservation, Show
+from movies.seatmap import parse_seat_ids
+
+
+class Command(BaseCommand):
+    help = "Explode Booking.seats and Show.seat_map into SeatReservation rows (safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        created = 0
+        shows = 0
+        for show in Show.objects.all().iterator():
+            layout = show.seat_layout
+            rows = {}
+            # seats owned by a booking first, so those rows keep their booking link
+            bookings = Booking.objects.filter(show=show).order_by('booking_time').values_list('pk', 'seats')
+            for booking_id, seats in bookings:
+                for seat_id in parse_seat_ids(seats):
+                    if layout.index_of(seat_id) is not None:
+                        rows.setdefault(seat_id, booking_id)
+            # seats only recorded in the bitmap have no booking to point at
+            for seat_id in show.booked_seat_ids():
+                rows.setdefault(seat_id, None)
+            if not rows:
+                continue
+
+            with transaction.atomic():
+                before = SeatReservation.objects.filter(show=show).count()
+                SeatReservation.objects.bulk_create(
+                    [SeatReservation(show=show, seat_id=s, booking_id=b) for s, b in rows.items()],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+                created += SeatReservation.objects.filter(show=show).count() - before
+                show.rebuild_seat_map()
+            shows += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} seat reservations across {shows} shows"))
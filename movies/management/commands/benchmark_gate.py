@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from movies import gate
+from movies.models import Booking, Movie, Show
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure gate validations per second: forged tokens, first admissions, "
+        "repeat scans and offline batches. The synthetic bookings are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--batch', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # not wrapped in a rolled-back transaction like benchmark_search: admissions
+        # reach the in-memory set on commit, as they do in a real request
+        show, tokens = self._populate(options['tickets'])
+        try:
+            self._run(show, tokens, options['batch'])
+        finally:
+            User.objects.filter(username='gate-benchmark').delete()
+            show.movie.delete()
+            gate.admitted.clear()
+
+    @transaction.atomic
+    def _populate(self, count):
+        user = User.objects.create_user('gate-benchmark')
+        movie = Movie.objects.create(title='Gate Benchmark', poster_url='https://example.com/p.jpg',
+                                     genre='Drama', release_date=timezone.localdate(), duration_minutes=120)
+        show = Show.objects.create(movie=movie, show_date=timezone.localdate() + timedelta(days=1),
+                                   show_time=timezone.localtime().time(), price=10)
+        Booking.objects.bulk_create(
+            [Booking(user=user, movie=movie, show=show, seats=f'S{i}', ticket_number=f'BENCH{i:08d}')
+             for i in range(count)],
+            batch_size=1000,
+        )
+        bookings = list(Booking.objects.filter(show=show).only('ticket_number', 'show_id'))
+        return show, [gate.token_for(b) for b in bookings]
+
+    def _rate(self, label, count, fn):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<28}{count:>8}{count / elapsed:>14,.0f}/s")
+
+    def _run(self, show, tokens, batch):
+        count = len(tokens)
+        gate.admitted.clear()
+        half = count // 2
+        forged = [t[:-1] + ('A' if t[-1] != 'A' else 'B') for t in tokens]
+        self.stdout.write(f"{'scan':<28}{'count':>8}{'rate':>15}")
+        self._rate('forged token', count, lambda: [gate.admit(t, show.pk) for t in forged])
+        self._rate('first admission', half, lambda: [gate.admit(t, show.pk) for t in tokens[:half]])
+        self._rate('repeat scan (memory)', half, lambda: [gate.admit(t, show.pk) for t in tokens[:half]])
+        rest = tokens[half:]
+        self._rate(f'offline batch of {batch}', len(rest), lambda: [
+            gate.admit_many([(t, None) for t in rest[i:i + batch]], show.pk) for i in range(0, len(rest), batch)
+        ])
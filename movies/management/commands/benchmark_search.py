@@ -0,0 +1,87 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from movies.models import Movie
+from movies.search import get_backend
+
+WORDS = (
+    "galaxy guardians night storm river empire shadow legend ocean dragon city "
+    "winter fire silent broken last return secret island king queen machine ghost "
+    "summer dream hunter stranger garden mirror road war love heart star"
+).split()
+GENRES = ['Action', 'Drama', 'Comedy', 'Sci-Fi', 'Horror', 'Romance', 'Thriller', 'Animation']
+QUERIES = ['galaxy', 'drag', 'silent night', 'secret island king', 'xyzzy']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the full-text search backend with the old icontains query on "
+        "synthetic catalogs. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        self.stdout.write(f"backend: {type(backend).__name__}")
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self._populate(size)
+                    backend.rebuild()
+                    self._report(size, backend, options['repeat'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+    def _populate(self, size, batch_size=5000):
+        rng = random.Random(size)
+        start = date(1980, 1, 1)
+        batch = []
+        for i in range(size):
+            batch.append(Movie(
+                title=' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 4))),
+                poster_url='https://example.com/poster.jpg',
+                genre=rng.choice(GENRES),
+                release_date=start + timedelta(days=rng.randint(0, 16000)),
+                duration_minutes=rng.randint(80, 180),
+                synopsis=' '.join(rng.choice(WORDS) for _ in range(40)),
+            ))
+            if len(batch) >= batch_size:
+                Movie.objects.bulk_create(batch)
+                batch = []
+        Movie.objects.bulk_create(batch)
+
+    def _time(self, fn, repeat):
+        fn()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def _report(self, size, backend, repeat):
+        self.stdout.write(f"\n{size:,} movies")
+        self.stdout.write(f"{'query':<22}{'icontains ms':>14}{'indexed ms':>12}{'speedup':>10}")
+        for q in QUERIES:
+            def like():
+                return list(Movie.objects.filter(
+                    Q(title__icontains=q) | Q(genre__icontains=q) | Q(synopsis__icontains=q)
+                ).distinct().order_by('-release_date').values_list('pk', flat=True)[:48])
+
+            def indexed():
+                return backend.search_ids(q, 48)
+
+            like_ms = self._time(like, repeat)
+            fts_ms = self._time(indexed, repeat)
+            self.stdout.write(f"{q:<22}{like_ms:>14.2f}{fts_ms:>12.2f}{like_ms / max(fts_ms, 1e-6):>9.1f}x")
+
+
+class _Rollback(Exception):
+    pass
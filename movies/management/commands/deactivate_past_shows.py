@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from movies.scheduling import deactivate_past
+
+
+class Command(BaseCommand):
+    help = "Deactivate shows that have finished (run periodically, e.g. from cron every 15 minutes)"
+
+    def handle(self, *args, **options):
+        count = deactivate_past()
+        self.stdout.write(self.style.SUCCESS(f"Deactivated {count} past shows"))
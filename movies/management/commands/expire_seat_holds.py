@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from movies.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds (run periodically, e.g. from cron every minute)"
+
+    def handle(self, *args, **options):
+        removed = expire_holds()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired seat holds"))
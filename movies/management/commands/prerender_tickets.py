@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies import tickets
+from movies.models import Booking, Show
+from movies.scheduling import upcoming
+
+
+class Command(BaseCommand):
+    help = "Render ticket PDFs for upcoming shows ahead of time (run periodically, e.g. hourly from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='shows starting within this many days (default 2)')
+        parser.add_argument('--prune', type=int, metavar='DAYS',
+                            help='also delete cached PDFs rendered more than DAYS days ago (re-rendered on demand)')
+
+    def handle(self, *args, **options):
+        shows = upcoming(Show.objects.all(), days=options['days'])
+        bookings = Booking.objects.filter(show__in=shows).select_related('movie', 'show')
+        rendered = cached = 0
+        for booking in bookings.iterator(chunk_size=500):
+            existed = tickets.path_for(tickets.fingerprint(tickets.ticket_fields(booking))).exists()
+            tickets.get_pdf(booking)
+            cached += existed
+            rendered += not existed
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} ticket PDFs ({cached} already cached)"))
+
+        if options['prune'] is not None:
+            horizon = time.time() - options['prune'] * 86400
+            removed = 0
+            for path in tickets.cache_dir().glob('*/*.pdf'):
+                if path.stat().st_mtime < horizon:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} stale ticket PDFs"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from movies.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the movie full-text search index (FTS5 on SQLite, GIN on PostgreSQL)"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {type(backend).__name__} index ({count} movies)"))
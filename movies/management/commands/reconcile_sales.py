@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from movies.sales import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute Show/Movie sales counters (tickets, bookings, revenue, last sale) from Booking rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        shows, movies = reconcile(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {shows} shows and {movies} movies"))
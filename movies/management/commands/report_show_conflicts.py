@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.models import Show
+from movies.scheduling import find_conflicts, theater_now
+
+
+class Command(BaseCommand):
+    help = "List active shows that overlap in the same hall (running time + cleanup buffer)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='first show date (YYYY-MM-DD), default today at the theater')
+        parser.add_argument('--all', action='store_true', help='include past shows')
+        parser.add_argument('--hall', action='append', help='only this hall (repeatable)')
+        parser.add_argument('--fail', action='store_true', help='exit with an error when conflicts exist')
+
+    def handle(self, *args, **options):
+        shows = Show.objects.filter(is_active=True)
+        if not options['all']:
+            try:
+                start = date.fromisoformat(options['start']) if options['start'] else theater_now().date()
+            except ValueError:
+                raise CommandError('--from must be YYYY-MM-DD')
+            shows = shows.filter(show_date__gte=start)
+        if options['hall']:
+            shows = shows.filter(hall__in=options['hall'])
+
+        count = 0
+        for hall, earlier, later in find_conflicts(shows):
+            count += 1
+            self.stdout.write(f"{hall}: {earlier} overlaps {later}")
+
+        if count and options['fail']:
+            raise CommandError(f"{count} overlapping show pair(s)")
+        style = self.style.WARNING if count else self.style.SUCCESS
+        self.stdout.write(style(f"{count} overlapping show pair(s)"))
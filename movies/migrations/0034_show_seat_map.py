@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0033_show_booked_seats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='show',
+            name='seat_map',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-16 10:01
+
+from django.db import migrations
+
+from movies import seatmap
+
+
+def text_to_bitmap(apps, schema_editor):
+    """Fill Show.seat_map from booked_seats text plus the show's bookings."""
+    Show = apps.get_model('movies', 'Show')
+    Booking = apps.get_model('movies', 'Booking')
+    for show in Show.objects.all().iterator():
+        seat_ids = set(seatmap.parse_seat_ids(show.booked_seats))
+        for seats in Booking.objects.filter(show=show).values_list('seats', flat=True):
+            seat_ids.update(seatmap.parse_seat_ids(seats))
+
+        layout = seatmap.get_layout(show.hall)
+        buf = seatmap.empty_map(layout)
+        for seat_id in seat_ids:
+            index = layout.index_of(seat_id)
+            if index is not None:
+                seatmap.set_bit(buf, index)
+        show.seat_map = bytes(buf)
+        show.seats_booked = seatmap.popcount(buf)
+        show.save(update_fields=['seat_map', 'seats_booked'])
+
+
+def bitmap_to_text(apps, schema_editor):
+    Show = apps.get_model('movies', 'Show')
+    for show in Show.objects.all().iterator():
+        layout = seatmap.get_layout(show.hall)
+        buf = bytearray(show.seat_map or b'')
+        ids = [layout.seat_at(i) for i in seatmap.iter_bits(buf) if i < layout.capacity]
+        show.booked_seats = ','.join(sorted(ids))
+        show.save(update_fields=['booked_seats'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0034_show_seat_map'),
+    ]
+
+    operations = [
+        migrations.RunPython(text_to_bitmap, bitmap_to_text),
+    ]
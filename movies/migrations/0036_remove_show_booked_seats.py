@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-16 10:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0035_populate_show_seat_map'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='show',
+            name='booked_seats',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0036_remove_show_booked_seats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seat_id', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='movies.booking')),
+                ('show', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='movies.show')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('show', 'seat_id'), name='unique_show_seat')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0038_seatreservation_holds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='show',
+            name='seat_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='seats_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0039_show_seat_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='bookings_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='last_sale_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='bookings_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='gross_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='last_sale_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='tickets_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0040_sales_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-release_date', '-id'], name='movie_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_featured', '-release_date', '-id'], name='movie_featured_release_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['genre', '-release_date', '-id'], name='movie_genre_release_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-16 12:00
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'movies_movie_fts'
+PG_INDEX = 'movie_search_gin'
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(genre, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(synopsis, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5(title, genre, synopsis, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5: movies.search falls back to icontains
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, genre, synopsis) "
+            f"SELECT id, title, genre, synopsis FROM movies_movie"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON movies_movie USING GIN (({PG_VECTOR}))")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0041_movie_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0042_movie_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['hall', 'show_date', 'show_time'], name='show_hall_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0043_show_hall_slot_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-booking_time'], name='booking_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['movie', 'show_date', 'show_time'], name='show_movie_active_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:40
+
+from django.db import migrations
+
+from movies import seatmap
+
+
+def backfill_reservations(apps, schema_editor):
+    """
+    Give every seat booked before SeatReservation existed its row, so the
+    unique (show, seat_id) constraint guards it. Same rules as
+    ``manage.py backfill_seat_reservations``, which stays for re-runs.
+    """
+    Show = apps.get_model('movies', 'Show')
+    Booking = apps.get_model('movies', 'Booking')
+    SeatReservation = apps.get_model('movies', 'SeatReservation')
+    for show in Show.objects.all().iterator():
+        layout = seatmap.get_layout(show.hall)
+        rows = {}
+        # seats owned by a booking first, so those rows keep their booking link
+        bookings = Booking.objects.filter(show=show).order_by('booking_time').values_list('pk', 'user_id', 'seats')
+        for booking_id, user_id, seats in bookings:
+            for seat_id in seatmap.parse_seat_ids(seats):
+                if layout.index_of(seat_id) is not None:
+                    rows.setdefault(seat_id, (booking_id, user_id))
+        # seats only recorded in the bitmap have no booking to point at
+        buf = bytearray(show.seat_map or b'')
+        for index in seatmap.iter_bits(buf):
+            if index < layout.capacity:
+                rows.setdefault(layout.seat_at(index), (None, None))
+        if not rows:
+            continue
+
+        SeatReservation.objects.bulk_create(
+            [SeatReservation(show=show, seat_id=s, booking_id=b, user_id=u) for s, (b, u) in rows.items()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        # booked seats the bitmap missed are marked too
+        buf.extend(bytes(max(0, layout.num_bytes - len(buf))))
+        for seat_id in rows:
+            seatmap.set_bit(buf, layout.index_of(seat_id))
+        show.seat_map = bytes(buf)
+        show.seats_booked = seatmap.popcount(buf)
+        show.save(update_fields=['seat_map', 'seats_booked'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0046_profile_avatar_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reservations, migrations.RunPython.noop),
+    ]
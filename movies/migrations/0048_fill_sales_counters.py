@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:45
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce
+
+from movies import seatmap
+
+
+def _totals(bookings):
+    """Totals of ``bookings`` (annotated with ``key``) per key."""
+    totals = {}
+    grouped = bookings.values('key').annotate(revenue=Sum('total_price'), bookings=Count('id'), last=Max('booking_time'))
+    for row in grouped:
+        totals[row['key']] = {
+            'gross': row['revenue'] or Decimal('0'),
+            'bookings': row['bookings'],
+            'last': row['last'],
+            'tickets': 0,
+        }
+    for key, seats in bookings.values_list('key', 'seats').iterator():
+        totals[key]['tickets'] += len(seatmap.parse_seat_ids(seats))
+    return totals
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Sales counters start at 0; fill them from the existing bookings, as
+    ``manage.py reconcile_sales`` does. A booking without a movie counts
+    toward its show's movie.
+
+    Movie.revenue is overwritten on purpose: from here on it is the gross
+    of the movie's bookings, kept up to date at checkout. Any figure typed
+    in by hand before is not restored on reverse.
+    """
+    Show = apps.get_model('movies', 'Show')
+    Movie = apps.get_model('movies', 'Movie')
+    Booking = apps.get_model('movies', 'Booking')
+    empty = {'gross': Decimal('0'), 'bookings': 0, 'last': None, 'tickets': 0}
+
+    show_totals = _totals(Booking.objects.annotate(key=F('show')).filter(key__isnull=False))
+    shows = []
+    for show in Show.objects.only('pk').iterator():
+        t = show_totals.get(show.pk, empty)
+        show.tickets_sold, show.bookings_count = t['tickets'], t['bookings']
+        show.gross_revenue, show.last_sale_at = t['gross'], t['last']
+        shows.append(show)
+    Show.objects.bulk_update(shows, ['tickets_sold', 'bookings_count', 'gross_revenue', 'last_sale_at'], batch_size=500)
+
+    movie_totals = _totals(Booking.objects.annotate(key=Coalesce('movie', 'show__movie')).filter(key__isnull=False))
+    movies = []
+    for movie in Movie.objects.only('pk').iterator():
+        t = movie_totals.get(movie.pk, empty)
+        movie.tickets_sold, movie.bookings_count = t['tickets'], t['bookings']
+        movie.revenue, movie.last_sale_at = t['gross'], t['last']
+        movies.append(movie)
+    Movie.objects.bulk_update(movies, ['tickets_sold', 'bookings_count', 'revenue', 'last_sale_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0047_backfill_seat_reservations'),
+    ]
+
+    operations = [
+        # reverse keeps the filled counters; 0040's reverse drops them
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 # movies/models.py
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import seatevents, seatmap
 
 UserModel = get_user_model()
 
@@ -11,6 +16,8 @@ class Profile(models.Model):
     user = models.OneToOneField(UserModel, on_delete=models.CASCADE)
     mobile_no = models.CharField(max_length=15, blank=True)
     profile_pic = models.ImageField(default='profile_pics/default.jpg', upload_to='profile_pics')
+    # content hash naming the cleaned picture and its thumbnails (movies/thumbnails.py)
+    avatar_hash = models.CharField(max_length=16, blank=True, editable=False)
 
     def __str__(self):
         return f'{self.user.username} Profile'
@@ -21,10 +28,17 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=UserModel)
-def save_user_profile(sender, instance, **kwargs):
-    # ensures profile exists and is saved if present
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    # saves a profile edited through user.profile along with the user; a
+    # partial save (login's last_login) or a user whose profile was never
+    # loaded has nothing to write, and checking would cost a query. A failed
+    # lookup caches None, so the profile is read from the cache, not user.profile
+    if created or update_fields:
+        return
+    profile = instance._state.fields_cache.get('profile')
+    if profile is None:
+        return
+    profile.save()
 
 class Movie(models.Model):
     title = models.CharField(max_length=200)
@@ -40,6 +54,18 @@ class Movie(models.Model):
     synopsis = models.TextField(blank=True)
     trailer_video_id = models.CharField(max_length=50, blank=True)
     price = models.DecimalField(max_digits=7, decimal_places=2, default=0.00, help_text="Default price if show price missing")
+    # sales counters, maintained by movies/sales.py (revenue is the gross)
+    tickets_sold = models.PositiveIntegerField(default=0)
+    bookings_count = models.PositiveIntegerField(default=0)
+    last_sale_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # catalog pages seek on (release_date, id), optionally within a filter
+        indexes = [
+            models.Index(fields=['-release_date', '-id'], name='movie_release_idx'),
+            models.Index(fields=['is_featured', '-release_date', '-id'], name='movie_featured_release_idx'),
+            models.Index(fields=['genre', '-release_date', '-id'], name='movie_genre_release_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -49,6 +75,9 @@ class Movie(models.Model):
         minutes = self.duration_minutes % 60
         return f"{hours}h {minutes}m"
 
+def seat_version_cache_key(show_id):
+    return f"show:{show_id}:seat-version"
+
 class Show(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='shows')
     show_date = models.DateField()
@@ -58,14 +87,131 @@ class Show(models.Model):
     seats_total = models.PositiveIntegerField(default=100)
     seats_booked = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
-    booked_seats = models.TextField(blank=True, default='') 
+    # one bit per seat of the hall layout (see movies/seatmap.py)
+    seat_map = models.BinaryField(blank=True, default=b'')
+    # bumped whenever seat availability changes; drives ETags and cache keys
+    seat_version = models.PositiveBigIntegerField(default=0)
+    seats_updated_at = models.DateTimeField(null=True, blank=True)
+    # sales counters, maintained by movies/sales.py
+    tickets_sold = models.PositiveIntegerField(default=0)
+    bookings_count = models.PositiveIntegerField(default=0)
+    gross_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_sale_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['show_date', 'show_time']
+        indexes = [
+            # hall overlap checks seek a hall's shows by day (movies/scheduling.py)
+            models.Index(fields=['hall', 'show_date', 'show_time'], name='show_hall_slot_idx'),
+            # a movie's active shows in date order (seat selection, availability);
+            # partial, as SQLite compares booleans as bare "is_active", not "= 1"
+            models.Index(
+                fields=['movie', 'show_date', 'show_time'], condition=models.Q(is_active=True),
+                name='show_movie_active_slot_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.movie.title} — {self.show_date} {self.show_time}"
 
+    def save(self, *args, **kwargs):
+        # seats_booked is always derived from the bitmap so the two can't drift
+        buf = self._seat_buffer()
+        self.seat_map = bytes(buf)
+        self.seats_booked = seatmap.popcount(buf)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'seat_map' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'seats_booked'}
+        super().save(*args, **kwargs)
+
+    # ---- seat map helpers ----
+    @property
+    def seat_layout(self):
+        return seatmap.get_layout(self.hall)
+
+    def _seat_buffer(self):
+        buf = self.seat_map
+        if not isinstance(buf, bytearray):
+            buf = bytearray(buf or b'')
+        need = self.seat_layout.num_bytes
+        if len(buf) < need:
+            buf.extend(bytes(need - len(buf)))
+        self.seat_map = buf
+        return buf
+
+    def is_seat_booked(self, seat_id):
+        index = self.seat_layout.index_of(seat_id)
+        return index is not None and seatmap.test_bit(self._seat_buffer(), index)
+
+    def seat_conflicts(self, seat_ids):
+        """Sorted ids from ``seat_ids`` that are already booked."""
+        return sorted(s for s in set(seat_ids) if self.is_seat_booked(s))
+
+    def book_seats(self, seat_ids):
+        """Mark seats booked (unknown ids are ignored); caller saves."""
+        layout, buf = self.seat_layout, self._seat_buffer()
+        for seat_id in seat_ids:
+            index = layout.index_of(seat_id)
+            if index is not None:
+                seatmap.set_bit(buf, index)
+
+    def release_seats(self, seat_ids):
+        """Mark seats free again (unknown ids are ignored); caller saves."""
+        layout, buf = self.seat_layout, self._seat_buffer()
+        for seat_id in seat_ids:
+            index = layout.index_of(seat_id)
+            if index is not None:
+                seatmap.clear_bit(buf, index)
+
+    @classmethod
+    def apply_seat_changes(cls, show_id, booked=(), released=()):
+        """
+        Flip seat bits for ``show_id`` under a short row lock. SeatReservation
+        rows are the source of truth; this keeps the bitmap in step with them.
+        """
+        with transaction.atomic():
+            show = cls.objects.select_for_update().filter(pk=show_id).first()
+            if show is None:
+                return
+            show.release_seats(released)
+            show.book_seats(booked)
+            show.save(update_fields=['seat_map'])
+            cls.bump_seat_version(show_id, taken=booked, freed=released)
+
+    @classmethod
+    def bump_seat_version(cls, show_id, taken=(), freed=(), holder=None, reset=False):
+        """
+        Record that availability of ``show_id`` changed and, once committed,
+        push the delta to open seat maps (holds carry their ``holder``).
+        """
+        cls.objects.filter(pk=show_id).update(seat_version=F('seat_version') + 1, seats_updated_at=timezone.now())
+        key = seat_version_cache_key(show_id)
+        if reset:
+            event = {'reset': True}
+        else:
+            event = {'taken': sorted(taken), 'freed': sorted(freed), 'holder': holder}
+
+        def after_commit():
+            cache.delete(key)
+            if reset or taken or freed:
+                seatevents.publish(show_id, event)
+        transaction.on_commit(after_commit)
+
+    def rebuild_seat_map(self):
+        """Recompute the bitmap from this show's SeatReservation rows."""
+        self.seat_map = seatmap.empty_map(self.seat_layout)
+        self.book_seats(self.reservations.values_list('seat_id', flat=True))
+        self.save(update_fields=['seat_map'])
+        Show.bump_seat_version(self.pk, reset=True)
+
+    def booked_count(self):
+        return seatmap.popcount(self._seat_buffer())
+
+    def booked_seat_ids(self):
+        """Booked seat ids in layout order."""
+        layout = self.seat_layout
+        return [layout.seat_at(i) for i in seatmap.iter_bits(self._seat_buffer()) if i < layout.capacity]
+
 class Booking(models.Model):
     user = models.ForeignKey(UserModel, on_delete=models.CASCADE, related_name='bookings')
     movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True)
@@ -74,8 +220,54 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     booking_time = models.DateTimeField(auto_now_add=True)
     ticket_number = models.CharField(max_length=64, unique=True)
+    # set once at the entrance gate (movies/gate.py)
+    admitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # a user's bookings newest first (my bookings, chat assistant)
+            models.Index(fields=['user', '-booking_time'], name='booking_user_time_idx'),
+        ]
 
     def __str__(self):
         movie_title = self.movie.title if self.movie else "Unknown Movie"
         username = self.user.username if self.user else "Unknown User"
         return f"Booking {self.ticket_number} - {username} ({movie_title})"
+
+
+class SeatReservation(models.Model):
+    """
+    One row per claimed seat. The unique (show, seat_id) constraint lets
+    checkouts for different seats of the same show run without a show lock;
+    a clash surfaces as an IntegrityError.
+
+    A row without a booking but with ``expires_at`` is a temporary hold
+    (see movies/holds.py); once ``expires_at`` passes it no longer counts.
+    """
+    show = models.ForeignKey(Show, on_delete=models.CASCADE, related_name='reservations')
+    seat_id = models.CharField(max_length=10)
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, null=True, blank=True, related_name='reservations')
+    user = models.ForeignKey(UserModel, on_delete=models.CASCADE, null=True, blank=True, related_name='seat_reservations')
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'seat_id'], name='unique_show_seat'),
+        ]
+
+    def __str__(self):
+        return f"{self.show_id}:{self.seat_id}"
+
+    @property
+    def is_hold(self):
+        return self.booking_id is None and self.expires_at is not None
+
+@receiver(post_delete, sender=SeatReservation)
+def release_reserved_seat(sender, instance, **kwargs):
+    if instance.is_hold:
+        # holds never reach the bitmap
+        return
+    show_id, seat_id = instance.show_id, instance.seat_id
+    # robust: the row is gone either way; rebuild_seat_map repairs a missed bit
+    transaction.on_commit(lambda: Show.apply_seat_changes(show_id, released=[seat_id]), robust=True)
@@ -0,0 +1,125 @@
+# movies/pagecache.py
+"""
+Whole-page cache for anonymous visitors to the catalog pages.
+
+The rendered response is stored under the view name, the path, the
+sorted query string and a catalog version number. When a Movie or Show is
+saved or deleted, the version is bumped on commit (receivers below,
+connected from MoviesConfig.ready), so every cached page is dropped at
+once. Seat and sales bookkeeping saves on Show do not bump it.
+
+Pages for signed-in users are never cached, because the navbar shows
+their profile. Those requests count as bypasses.
+
+Per-view hit, miss and bypass counters are kept in the cache and served
+by ``stats()`` (see the ``page_cache_stats`` view).
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
+
+from .models import Movie, Show
+
+VERSION_KEY = 'catalog:version'
+STATS_KEY = 'pagecache:stats:{view}:{outcome}'
+OUTCOMES = ('hit', 'miss', 'bypass')
+_views = set()
+
+# Show columns written by checkout, holds and sales; they never change a cached page
+SHOW_BOOKKEEPING_FIELDS = frozenset({
+    'seat_map', 'seats_booked', 'seat_version', 'seats_updated_at',
+    'tickets_sold', 'bookings_count', 'gross_revenue', 'last_sale_at',
+})
+
+
+def _timeout():
+    return getattr(settings, 'PAGE_CACHE_SECONDS', 300)
+
+
+def catalog_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def _count(view_name, outcome):
+    key = STATS_KEY.format(view=view_name, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    """``{view: {'hit': n, 'miss': n, 'bypass': n, 'hit_rate': float}}``"""
+    keys = {(v, o): STATS_KEY.format(view=v, outcome=o) for v in sorted(_views) for o in OUTCOMES}
+    values = cache.get_many(keys.values())
+    result = {}
+    for view_name in sorted(_views):
+        row = {o: values.get(keys[view_name, o], 0) for o in OUTCOMES}
+        served = row['hit'] + row['miss']
+        row['hit_rate'] = round(row['hit'] / served, 3) if served else 0.0
+        result[view_name] = row
+    return result
+
+
+def _page_key(view_name, request, version):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.path}?{query}".encode()).hexdigest()
+    return f'page:{version}:{view_name}:{digest}'
+
+
+def cache_anonymous_page(view):
+    """Serve ``view`` from the page cache for anonymous GET/HEAD requests."""
+    view_name = view.__name__
+    _views.add(view_name)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            _count(view_name, 'bypass')
+            return view(request, *args, **kwargs)
+
+        key = _page_key(view_name, request, catalog_version())
+        cached = cache.get(key)
+        if cached is not None:
+            _count(view_name, 'hit')
+            content, content_type, status = cached
+            response = HttpResponse(content, content_type=content_type, status=status)
+            response['X-Page-Cache'] = 'HIT'
+        else:
+            _count(view_name, 'miss')
+            response = view(request, *args, **kwargs)
+            # only plain, cookie-free responses are safe to hand to everyone
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, (response.content, response['Content-Type'], response.status_code), _timeout())
+            response['X-Page-Cache'] = 'MISS'
+        # the same URL renders differently once the visitor signs in
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=Show)
+@receiver(post_delete, sender=Show)
+def invalidate_catalog_pages(sender, update_fields=None, **kwargs):
+    if sender is Show and update_fields and set(update_fields) <= SHOW_BOOKKEEPING_FIELDS:
+        return
+    transaction.on_commit(bump_catalog_version)
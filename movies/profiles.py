@@ -0,0 +1,49 @@
+# movies/profiles.py
+"""
+Profile data the navbar shows on every page for signed-in users.
+
+``navbar_snapshot`` returns the picture URLs (thumbnails when they are
+ready, see movies/thumbnails.py) from the shared cache, so an ordinary
+page view does not load the user's Profile row. The snapshot is
+dropped on commit whenever the Profile is saved or deleted (receivers
+below, connected from MoviesConfig.ready). A new picture therefore shows
+up on the next page. Templates get it as ``navbar_profile``
+(movies/context_processors.py).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import thumbnails
+from .models import Profile
+
+SNAPSHOT_KEY = 'navbar:profile:{user_id}'
+SNAPSHOT_SECONDS = 24 * 3600
+
+
+def _snapshot(profile):
+    return thumbnails.urls(profile)
+
+
+def navbar_snapshot(user):
+    """``thumbnails.urls`` of ``user``'s profile, from the cache when possible."""
+    key = SNAPSHOT_KEY.format(user_id=user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        profile = Profile.objects.filter(user_id=user.pk).only('profile_pic', 'avatar_hash').first()
+        if profile is None:
+            profile = Profile(user_id=user.pk)   # unsaved: the default picture
+        snapshot = _snapshot(profile)
+        cache.set(key, snapshot, SNAPSHOT_SECONDS)
+    return snapshot
+
+
+def invalidate(user_id):
+    cache.delete(SNAPSHOT_KEY.format(user_id=user_id))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_on_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate(instance.user_id))
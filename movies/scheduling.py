@@ -0,0 +1,269 @@
+# movies/scheduling.py
+"""
+Bulk show scheduling.
+
+A recurrence (date range, weekdays, time slots, halls, price rules) is
+expanded into Show rows. Each candidate is checked against the hall's
+existing schedule and against the candidates accepted before it. The
+accepted rows are inserted with ``bulk_create`` in batches, inside one
+transaction.
+
+A show occupies its hall from ``show_time`` until the movie's running
+time plus ``settings.SHOW_CLEANUP_MINUTES`` later. ``HallIndex`` holds
+those intervals per hall, sorted by start, for every hall and day in
+range. One query on (hall, show_date) fills it, and each overlap check
+is a bisect. Shows without a hall are unassigned and never conflict.
+
+``hall_conflicts`` checks a single show the same way; add_shows_view and
+the Show admin use it. ``find_conflicts`` sweeps the whole schedule, one
+hall at a time in index order (``manage.py report_show_conflicts``).
+
+Show dates and times are wall-clock times at the theater
+(``settings.THEATER_TIME_ZONE``). ``upcoming`` narrows a queryset to shows
+that have not started yet. ``deactivate_past`` switches off shows that
+have finished (``manage.py deactivate_past_shows``).
+"""
+import bisect
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import dashboard, pagecache, seatmap
+from .models import Show
+
+BATCH_SIZE = 500
+MAX_SHOWS_PER_REQUEST = 10_000
+
+
+def cleanup_minutes():
+    return getattr(settings, 'SHOW_CLEANUP_MINUTES', 20)
+
+
+def occupied(show_date, show_time, duration_minutes):
+    """``(start, end)`` datetimes during which a show blocks its hall."""
+    start = datetime.combine(show_date, show_time)
+    return start, start + timedelta(minutes=(duration_minutes or 0) + cleanup_minutes())
+
+
+def theater_now(now=None):
+    """``now`` (default: the current time) as a naive wall-clock time at the theater."""
+    tz = ZoneInfo(getattr(settings, 'THEATER_TIME_ZONE', None) or settings.TIME_ZONE)
+    return timezone.localtime(now or timezone.now(), tz).replace(tzinfo=None)
+
+
+def upcoming(shows, now=None, days=None):
+    """
+    Active shows in ``shows`` that have not started, up to ``days`` days
+    ahead (today counts as the first), in start order.
+    """
+    now = theater_now(now)
+    today = now.date()
+    shows = shows.filter(
+        Q(show_date__gt=today) | Q(show_date=today, show_time__gte=now.time()),
+        is_active=True,
+    )
+    if days:
+        shows = shows.filter(show_date__lt=today + timedelta(days=days))
+    return shows.order_by('show_date', 'show_time')
+
+
+def deactivate_past(now=None):
+    """
+    Set ``is_active=False`` on shows that have finished, including the
+    cleanup time. Returns the number of shows switched off.
+    """
+    now = theater_now(now)
+    active = Show.objects.filter(is_active=True)
+    with transaction.atomic():
+        # nothing runs past a full day, so anything older than yesterday is over
+        count = active.filter(show_date__lt=now.date() - timedelta(days=1)).update(is_active=False)
+        recent = active.filter(show_date__gte=now.date() - timedelta(days=1), show_date__lte=now.date())
+        ended = [
+            pk for pk, day, at, duration
+            in recent.values_list('pk', 'show_date', 'show_time', 'movie__duration_minutes')
+            if occupied(day, at, duration)[1] <= now
+        ]
+        if ended:
+            count += Show.objects.filter(pk__in=ended).update(is_active=False)
+        if count:
+            # update() skips signals
+            transaction.on_commit(pagecache.bump_catalog_version)
+            transaction.on_commit(dashboard.invalidate)
+    return count
+
+
+class HallIndex:
+    """Sorted occupied intervals per hall, with an overlap lookup per interval."""
+
+    def __init__(self):
+        self._starts = {}   # hall -> [start, ...]
+        self._items = {}    # hall -> [(start, end, label), ...], same order
+        self._longest = timedelta(0)
+
+    @classmethod
+    def for_range(cls, halls, first_day, last_day, exclude_pk=None):
+        """Active shows in ``halls`` that can overlap ``first_day..last_day``."""
+        index = cls()
+        halls = [h for h in set(halls) if h]
+        if not halls:
+            return index
+        # a late show the day before may still be running after midnight, and
+        # a late show on the last day may run into the next morning's
+        rows = (
+            Show.objects.filter(hall__in=halls, is_active=True,
+                                show_date__gte=first_day - timedelta(days=1),
+                                show_date__lte=last_day + timedelta(days=1))
+            .values_list('pk', 'hall', 'show_date', 'show_time', 'movie__title', 'movie__duration_minutes')
+        )
+        if exclude_pk:
+            rows = rows.exclude(pk=exclude_pk)
+        for pk, hall, day, at, title, duration in rows.iterator(chunk_size=2000):
+            start, end = occupied(day, at, duration)
+            index.add(hall, start, end, f"{title} at {start:%Y-%m-%d %H:%M} (show {pk})")
+        return index
+
+    def add(self, hall, start, end, label):
+        if not hall:
+            return
+        starts = self._starts.setdefault(hall, [])
+        i = bisect.bisect_right(starts, start)
+        starts.insert(i, start)
+        self._items.setdefault(hall, []).insert(i, (start, end, label))
+        self._longest = max(self._longest, end - start)
+
+    def overlapping(self, hall, start, end):
+        """Labels of intervals in ``hall`` that intersect ``[start, end)``."""
+        if not hall or hall not in self._starts:
+            return []
+        starts, items = self._starts[hall], self._items[hall]
+        found = []
+        # everything starting before ``end`` is a candidate; none of them can
+        # reach ``start`` if it began more than the longest interval earlier
+        j = bisect.bisect_left(starts, end) - 1
+        while j >= 0 and starts[j] > start - self._longest:
+            if items[j][1] > start:
+                found.append(items[j][2])
+            j -= 1
+        return found[::-1]
+
+
+def hall_conflicts(hall, show_date, show_time, duration_minutes, exclude_pk=None):
+    """Labels of active shows in ``hall`` that overlap a show at ``show_date show_time``."""
+    if not hall:
+        return []
+    index = HallIndex.for_range([hall], show_date, show_date, exclude_pk=exclude_pk)
+    return index.overlapping(hall, *occupied(show_date, show_time, duration_minutes))
+
+
+def find_conflicts(shows=None):
+    """
+    Overlapping pairs across ``shows`` (default: every active show with a
+    hall), as ``(hall, earlier label, later label)``. Rows are streamed in
+    (hall, show_date, show_time) order. A heap of end times holds the shows
+    still occupying the hall, so the sweep is O(n log n) and keeps only one
+    hall's open intervals in memory.
+    """
+    if shows is None:
+        shows = Show.objects.filter(is_active=True)
+    rows = (
+        shows.exclude(hall='')
+        .order_by('hall', 'show_date', 'show_time')
+        .values_list('pk', 'hall', 'show_date', 'show_time', 'movie__title', 'movie__duration_minutes')
+    )
+    current_hall, running = None, []   # heap of (end, label)
+    for pk, hall, day, at, title, duration in rows.iterator(chunk_size=2000):
+        if hall != current_hall:
+            current_hall, running = hall, []
+        start, end = occupied(day, at, duration)
+        label = f"{title} at {start:%Y-%m-%d %H:%M} (show {pk})"
+        while running and running[0][0] <= start:
+            heapq.heappop(running)
+        for _, other in sorted(running, key=lambda item: item[1]):
+            yield hall, other, label
+        heapq.heappush(running, (end, label))
+
+
+@dataclass
+class PriceRule:
+    """Base price, optionally replaced at weekends or from ``evening_from`` on."""
+    price: Decimal
+    weekend_price: Decimal = None
+    evening_price: Decimal = None
+    evening_from: object = None
+
+    def price_for(self, day, at):
+        if self.weekend_price is not None and day.weekday() >= 5:
+            return self.weekend_price
+        if self.evening_price is not None and self.evening_from is not None and at >= self.evening_from:
+            return self.evening_price
+        return self.price
+
+
+@dataclass
+class Recurrence:
+    movie: object
+    start_date: object
+    end_date: object
+    weekdays: list          # 0 = Monday
+    times: list             # datetime.time, sorted
+    halls: list
+    prices: PriceRule
+
+    def occurrences(self):
+        day = self.start_date
+        while day <= self.end_date:
+            if day.weekday() in self.weekdays:
+                for hall in self.halls:
+                    for at in self.times:
+                        yield day, at, hall
+            day += timedelta(days=1)
+
+    def count(self):
+        days = sum(
+            1 for i in range((self.end_date - self.start_date).days + 1)
+            if (self.start_date + timedelta(days=i)).weekday() in self.weekdays
+        )
+        return days * len(self.halls) * len(self.times)
+
+
+@dataclass
+class SchedulePlan:
+    shows: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)   # (day, time, hall, [clashing labels])
+
+
+def plan(recurrence):
+    """Unsaved Show rows for ``recurrence`` plus the occurrences that clash."""
+    movie = recurrence.movie
+    index = HallIndex.for_range(recurrence.halls, recurrence.start_date, recurrence.end_date)
+    result = SchedulePlan()
+    for day, at, hall in recurrence.occurrences():
+        start, end = occupied(day, at, movie.duration_minutes)
+        clashes = index.overlapping(hall, start, end)
+        if clashes:
+            result.conflicts.append((day, at, hall, clashes))
+            continue
+        index.add(hall, start, end, f"{movie.title} at {start:%Y-%m-%d %H:%M} (this schedule)")
+        layout = seatmap.get_layout(hall)
+        result.shows.append(Show(
+            movie=movie, show_date=day, show_time=at, hall=hall,
+            price=recurrence.prices.price_for(day, at),
+            seats_total=layout.capacity, seat_map=bytes(seatmap.empty_map(layout)),
+        ))
+    return result
+
+
+def commit(schedule, batch_size=BATCH_SIZE):
+    """Insert a plan's shows. ``bulk_create`` skips signals, so the caches are invalidated here."""
+    with transaction.atomic():
+        created = Show.objects.bulk_create(schedule.shows, batch_size=batch_size)
+        transaction.on_commit(pagecache.bump_catalog_version)
+        transaction.on_commit(dashboard.invalidate)
+    return created
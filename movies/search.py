@@ -0,0 +1,207 @@
+# movies/search.py
+"""
+Ranked full-text search over Movie (title, genre, synopsis).
+
+The backend follows the database in use:
+
+* SQLite: an FTS5 table ``movies_movie_fts`` (rowid = movie id) that the
+  receivers below keep in sync with Movie saves and deletes.
+* PostgreSQL: a GIN index over a weighted tsvector expression. The index
+  maintains itself, so nothing needs syncing.
+* Anything else, or SQLite built without FTS5: the old icontains scan.
+
+Every word of the query is prefix matched ("guard gal" finds "Guardians of
+the Galaxy"). Title hits rank above genre hits, which rank above synopsis
+hits. ``manage.py rebuild_search_index`` rebuilds the index, e.g. after
+bulk imports that skip signals.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Movie
+
+FTS_TABLE = 'movies_movie_fts'
+PG_INDEX = 'movie_search_gin'
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(genre, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(synopsis, '')), 'C')"
+)
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def query_terms(query):
+    """Lower-cased words of a user query; punctuation never reaches MATCH."""
+    return [w.lower() for w in _WORD.findall(query or '')][:10]
+
+
+class LikeBackend:
+    """Unindexed fallback: the original triple icontains."""
+
+    def search_ids(self, query, limit):
+        q = (query or '').strip()
+        if not q:
+            return []
+        qs = Movie.objects.filter(
+            Q(title__icontains=q) | Q(genre__icontains=q) | Q(synopsis__icontains=q)
+        ).order_by('-release_date', '-id')
+        return list(qs.values_list('pk', flat=True)[:limit])
+
+    def index(self, movie):
+        pass
+
+    def remove(self, movie_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SqliteFTSBackend:
+    def search_ids(self, query, limit):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{t}"*' for t in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 4.0, 1.0) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, movie):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [movie.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, genre, synopsis) VALUES (%s, %s, %s, %s)",
+                [movie.pk, movie.title, movie.genre, movie.synopsis],
+            )
+
+    def remove(self, movie_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [movie_id])
+
+    def rebuild(self, batch_size=2000):
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            rows = Movie.objects.order_by('pk').values_list('pk', 'title', 'genre', 'synopsis')
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    count += self._insert(cursor, batch)
+                    batch = []
+            count += self._insert(cursor, batch)
+            # merge the b-tree segments left behind by the bulk insert
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        return count
+
+    def _insert(self, cursor, rows):
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, genre, synopsis) VALUES (%s, %s, %s, %s)", rows
+            )
+        return len(rows)
+
+
+class PostgresBackend:
+    def search_ids(self, query, limit):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        tsquery = ' & '.join(f'{t}:*' for t in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM movies_movie WHERE {PG_VECTOR} @@ to_tsquery('english', %s) "
+                f"ORDER BY ts_rank({PG_VECTOR}, to_tsquery('english', %s)) DESC, release_date DESC, id DESC "
+                f"LIMIT %s",
+                [tsquery, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, movie):
+        pass
+
+    def remove(self, movie_id):
+        pass
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+        return Movie.objects.count()
+
+
+def _fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+_backends = {}
+
+
+def get_backend():
+    """Backend for the current database connection."""
+    key = connection.alias
+    backend = _backends.get(key)
+    if backend is None:
+        if connection.vendor == 'postgresql':
+            backend = PostgresBackend()
+        elif connection.vendor == 'sqlite' and _fts_available():
+            backend = SqliteFTSBackend()
+        else:
+            backend = LikeBackend()
+        _backends[key] = backend
+    return backend
+
+
+# id fetches per search when ``queryset`` filters the matches: limit * 4,
+# then limit * 16. A filter that rejects even more leaves the page short
+# and flagged as truncated rather than pulling every match.
+MAX_FETCH_ROUNDS = 2
+
+
+def search_page(query, queryset=None, limit=50):
+    """
+    ``(movies, truncated)``: the first ``limit`` movies matching ``query``
+    in rank order, and whether more matches may exist. ``queryset`` narrows
+    the candidates (e.g. a genre filter) without changing the ranking.
+    """
+    # one extra id tells whether there are more; over-fetch so extra
+    # filters still leave a full page
+    want = limit + 1
+    fetch = want if queryset is None else want * 4
+    for _ in range(MAX_FETCH_ROUNDS):
+        ids = get_backend().search_ids(query, fetch)
+        if not ids:
+            return [], False
+        by_id = (queryset if queryset is not None else Movie.objects).in_bulk(ids)
+        movies = [by_id[pk] for pk in ids if pk in by_id]
+        if len(movies) >= want or len(ids) < fetch:
+            return movies[:limit], len(movies) > limit
+        fetch *= 4
+    # matches beyond the last fetch were never looked at
+    return movies[:limit], True
+
+
+def search_movies(query, queryset=None, limit=50):
+    """Movies matching ``query`` in rank order (see ``search_page``)."""
+    return search_page(query, queryset, limit)[0]
+
+
+@receiver(post_save, sender=Movie)
+def index_movie(sender, instance, **kwargs):
+    get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Movie)
+def unindex_movie(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
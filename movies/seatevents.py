@@ -0,0 +1,147 @@
+# movies/seatevents.py
+"""
+Fan-out of seat availability changes to open seat maps.
+
+Writers call ``publish(show_id, event)`` after their transaction commits;
+the SSE view in views.py subscribes per show and relays each event to the
+browser. ``InMemoryBroker`` only reaches subscribers in the same process,
+which is enough for one ASGI worker and for tests. ``RedisBroker`` uses
+Redis pub/sub so every worker sees every event. Pick one with
+``settings.SEAT_EVENTS_BROKER`` (dotted path).
+
+Events are plain dicts: ``{"taken": [...], "freed": [...], "holder": id}``
+or ``{"reset": true}`` when clients should refetch the whole map.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBroker:
+    """Per-process broker backed by one asyncio queue per subscriber."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, show_id, event):
+        # safe to call from any thread; delivery hops onto each subscriber's loop
+        with self._lock:
+            subscribers = list(self._subscribers.get(show_id, ()))
+        for sub in subscribers:
+            sub.deliver(event)
+
+    def subscribe(self, show_id):
+        """Must be called from the event loop that will consume the events."""
+        sub = _QueueSubscription(self, show_id, self.queue_size)
+        with self._lock:
+            self._subscribers[show_id].add(sub)
+        return sub
+
+    def _remove(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.show_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.show_id]
+
+
+class _QueueSubscription:
+    def __init__(self, broker, show_id, queue_size):
+        self.broker = broker
+        self.show_id = show_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # slow consumer: drop the backlog and make it refetch everything
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'reset': True}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if ``timeout`` seconds pass without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._remove(self)
+
+
+class RedisBroker:
+    """Cross-process broker on Redis pub/sub (``settings.REDIS_URL``)."""
+
+    def __init__(self, url=None, prefix='quickshow:seats:'):
+        import redis
+
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(self.url)
+
+    def publish(self, show_id, event):
+        self._client.publish(f"{self.prefix}{show_id}", json.dumps(event))
+
+    def subscribe(self, show_id):
+        return _RedisSubscription(self, show_id)
+
+
+class _RedisSubscription:
+    def __init__(self, broker, show_id):
+        import redis.asyncio
+
+        self.show_id = show_id
+        self.channel = f"{broker.prefix}{show_id}"
+        self._client = redis.asyncio.Redis.from_url(broker.url)
+        self._pubsub = self._client.pubsub()
+        self._subscribed = False
+
+    async def get(self, timeout=None):
+        if not self._subscribed:
+            await self._pubsub.subscribe(self.channel)
+            self._subscribed = True
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not message:
+            return None
+        return json.loads(message['data'])
+
+    async def close(self):
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'SEAT_EVENTS_BROKER', 'movies.seatevents.InMemoryBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(show_id, event):
+    """Best effort: a broker outage must never break a booking."""
+    try:
+        get_broker().publish(show_id, event)
+    except Exception:
+        logger.exception("Could not publish seat event for show=%s", show_id)
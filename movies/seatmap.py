@@ -0,0 +1,100 @@
+# movies/seatmap.py
+"""
+Seat layouts and the compact bitmap used to store a show's booked seats.
+
+Every hall has a layout (ordered rows, each with a seat count). A layout
+gives each seat id ("A1", "B7", ...) a fixed index, and a show stores one
+bit per seat index in ``Show.seat_map``.
+"""
+from django.conf import settings
+
+# Mirrors the grid drawn by static/js/seats.js (rows A-J, 9 seats each).
+DEFAULT_LAYOUT_ROWS = [(row, 9) for row in 'ABCDEFGHIJ']
+
+
+class SeatLayout:
+    """Maps seat ids to bit indexes for one hall."""
+
+    def __init__(self, rows):
+        self.rows = [(str(row), int(count)) for row, count in rows]
+        self._ids = []
+        self._index = {}
+        for row, count in self.rows:
+            for n in range(1, count + 1):
+                seat_id = f"{row}{n}"
+                self._index[seat_id] = len(self._ids)
+                self._ids.append(seat_id)
+
+    @property
+    def capacity(self):
+        return len(self._ids)
+
+    @property
+    def num_bytes(self):
+        return (self.capacity + 7) // 8
+
+    def index_of(self, seat_id):
+        """Bit index of ``seat_id`` or None if the seat is not in this hall."""
+        return self._index.get(seat_id)
+
+    def seat_at(self, index):
+        return self._ids[index]
+
+    def unknown(self, seat_ids):
+        """Seat ids that do not exist in this layout."""
+        return sorted(s for s in seat_ids if s not in self._index)
+
+
+_layouts = {}
+
+
+def get_layout(hall=''):
+    """
+    Layout for ``hall``. ``settings.SEAT_LAYOUTS`` may map hall names to
+    ``[(row, count), ...]``; the '' key overrides the default layout.
+    """
+    configured = getattr(settings, 'SEAT_LAYOUTS', None) or {}
+    rows = configured.get(hall or '') or configured.get('') or DEFAULT_LAYOUT_ROWS
+    key = tuple((str(r), int(c)) for r, c in rows)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts[key] = SeatLayout(key)
+    return layout
+
+
+def parse_seat_ids(value):
+    """Split a comma separated seat string ("A1, A2") into clean ids."""
+    return [s.strip() for s in (value or '').split(',') if s.strip()]
+
+
+# ---------------- bitmap helpers ----------------
+# Bit ``i`` lives in byte ``i >> 3`` at position ``i & 7``.
+
+def empty_map(layout):
+    return bytearray(layout.num_bytes)
+
+
+def test_bit(buf, index):
+    byte = index >> 3
+    return byte < len(buf) and bool(buf[byte] & (1 << (index & 7)))
+
+
+def set_bit(buf, index):
+    buf[index >> 3] |= 1 << (index & 7)
+
+
+def clear_bit(buf, index):
+    buf[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+
+def popcount(buf):
+    return int.from_bytes(bytes(buf), 'little').bit_count()
+
+
+def iter_bits(buf):
+    """Yield the index of every set bit, in ascending order."""
+    for byte_index, byte in enumerate(buf):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
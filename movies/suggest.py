@@ -0,0 +1,171 @@
+# movies/suggest.py
+"""
+In-process typeahead index over Movie titles and genres.
+
+Every word of a title or genre is split into its prefixes (its edge
+n-grams, up to MAX_PREFIX characters). Each prefix maps to the set of
+movie ids that contain it. A lookup intersects the sets for the typed
+words and keeps the top ``limit`` by (rating, votes). It runs in memory
+and never queries the database.
+
+The index is built lazily, from one query, the first time a process needs
+it. The Movie receivers below patch it in place after each commit. They
+also bump a generation number in the cache, so other worker processes
+notice the change and rebuild on their next lookup. That only reaches
+them when the cache is shared (Redis). With a per-process cache, edits
+from another worker, the admin or a management command are invisible, so
+each process also rebuilds once its index is SUGGEST_REBUILD_SECONDS old.
+"""
+import heapq
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .models import Movie
+
+GENERATION_KEY = 'suggest:generation'
+MAX_PREFIX = 15
+MAX_TERMS = 6
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _words(text):
+    return [w.lower() for w in _WORD.findall(text or '')]
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}    # id -> suggestion dict
+        self._keys = {}       # id -> indexed prefixes
+        self._prefixes = {}   # prefix -> set of ids
+        self._ranks = {}      # id -> sort key, best first
+        self.generation = None
+        self.built_at = None
+
+    @property
+    def built(self):
+        return self.generation is not None
+
+    def build(self, generation):
+        fields = ('pk', 'title', 'genre', 'rating', 'votes', 'poster_url', 'release_date')
+        with self._lock:
+            self._entries, self._keys, self._prefixes, self._ranks = {}, {}, {}, {}
+            for row in Movie.objects.values(*fields).iterator(chunk_size=2000):
+                self._add(row)
+            self.generation = generation
+            self.built_at = time.monotonic()
+
+    def _add(self, row):
+        pk = row['pk']
+        self._entries[pk] = {
+            'id': pk,
+            'title': row['title'],
+            'genre': row['genre'],
+            'rating': str(row['rating']),
+            'year': row['release_date'].year if row['release_date'] else None,
+            'poster_url': row['poster_url'],
+            'url': reverse('movie_detail', args=[pk]),
+        }
+        self._ranks[pk] = (-float(row['rating'] or 0), -(row['votes'] or 0), row['title'].lower(), pk)
+        keys = set()
+        for word in _words(row['title']) + _words(row['genre']):
+            for i in range(1, min(len(word), MAX_PREFIX) + 1):
+                keys.add(word[:i])
+        for key in keys:
+            self._prefixes.setdefault(key, set()).add(pk)
+        self._keys[pk] = keys
+
+    def _discard(self, pk):
+        for key in self._keys.pop(pk, ()):
+            ids = self._prefixes.get(key)
+            if ids is not None:
+                ids.discard(pk)
+                if not ids:
+                    del self._prefixes[key]
+        self._entries.pop(pk, None)
+        self._ranks.pop(pk, None)
+
+    def update(self, movie):
+        row = {
+            'pk': movie.pk, 'title': movie.title, 'genre': movie.genre, 'rating': movie.rating,
+            'votes': movie.votes, 'poster_url': movie.poster_url, 'release_date': movie.release_date,
+        }
+        with self._lock:
+            self._discard(movie.pk)
+            self._add(row)
+
+    def remove(self, pk):
+        with self._lock:
+            self._discard(pk)
+
+    def lookup(self, query, limit=8):
+        terms = [w[:MAX_PREFIX] for w in _words(query)][:MAX_TERMS]
+        if not terms:
+            return []
+        with self._lock:
+            # smallest set first keeps the intersection cheap
+            sets = sorted((self._prefixes.get(t, ()) for t in terms), key=len)
+            if not sets[0]:
+                return []
+            ids = set(sets[0]).intersection(*sets[1:])
+            best = heapq.nsmallest(limit, ids, key=self._ranks.__getitem__)
+            return [dict(self._entries[pk]) for pk in best]
+
+
+_index = SuggestIndex()
+
+
+def _current_generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def _expired():
+    ttl = getattr(settings, 'SUGGEST_REBUILD_SECONDS', 0)
+    return bool(ttl) and _index.built and time.monotonic() - _index.built_at >= ttl
+
+
+def suggest(query, limit=8):
+    """Top ``limit`` movies whose title/genre words start with the typed words."""
+    generation = _current_generation()
+    if _index.generation != generation or _expired():
+        _index.build(generation)
+    return _index.lookup(query, limit)
+
+
+def _bump_generation():
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        generation = 1
+        cache.set(GENERATION_KEY, generation, None)
+    return generation
+
+
+def _apply(change):
+    # patch this process's copy, then tell the others to rebuild theirs
+    was_current = _index.built and _index.generation == _current_generation()
+    if _index.built:
+        change()
+    generation = _bump_generation()
+    if was_current:
+        _index.generation = generation
+
+
+@receiver(post_save, sender=Movie)
+def suggest_index_movie(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _apply(lambda: _index.update(instance)))
+
+
+@receiver(post_delete, sender=Movie)
+def suggest_unindex_movie(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: _apply(lambda: _index.remove(pk)))
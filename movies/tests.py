@@ -1,3 +1,1537 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import json
+import tempfile
+import threading
+import time as time_module
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import assistant, chat, dashboard, gate, holds, pagecache, scheduling, search, seatevents, seatmap, suggest, thumbnails, tickets, views
+from .breaker import CircuitBreaker
+from .models import Movie, Profile, Show, Booking, SeatReservation
+
+
+def make_movie(**kwargs):
+    fields = {
+        'title': 'Test Movie',
+        'poster_url': 'https://example.com/poster.jpg',
+        'genre': 'Drama',
+        'release_date': date(2025, 1, 1),
+        'duration_minutes': 120,
+    }
+    fields.update(kwargs)
+    return Movie.objects.create(**fields)
+
+
+def make_show(movie, **kwargs):
+    fields = {'show_date': date(2030, 1, 1), 'show_time': time(18, 0), 'price': 10}
+    fields.update(kwargs)
+    return Show.objects.create(movie=movie, **fields)
+
+
+def historical_apps(migration):
+    """The app registry as ``migration`` sees it, for calling its RunPython code."""
+    return MigrationLoader(connection).project_state(('movies', migration)).apps
+
+
+class CacheClearingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+
+class SeatMapTests(TestCase):
+    def test_bit_helpers(self):
+        layout = seatmap.get_layout()
+        buf = seatmap.empty_map(layout)
+        for seat_id in ('A1', 'A9', 'J9'):
+            seatmap.set_bit(buf, layout.index_of(seat_id))
+        self.assertEqual(seatmap.popcount(buf), 3)
+        self.assertTrue(seatmap.test_bit(buf, layout.index_of('A9')))
+        seatmap.clear_bit(buf, layout.index_of('A9'))
+        self.assertFalse(seatmap.test_bit(buf, layout.index_of('A9')))
+        self.assertEqual([layout.seat_at(i) for i in seatmap.iter_bits(buf)], ['A1', 'J9'])
+
+    def test_show_seats_booked_follows_bitmap(self):
+        show = make_show(make_movie())
+        show.book_seats(['B2', 'A1', 'Z99'])
+        show.save(update_fields=['seat_map'])
+        show.refresh_from_db()
+        self.assertEqual(show.seats_booked, 2)
+        self.assertEqual(show.booked_seat_ids(), ['A1', 'B2'])
+        show.release_seats(['A1'])
+        show.save()
+        show.refresh_from_db()
+        self.assertEqual(show.seats_booked, 1)
+
+
+class CheckoutTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_login(self.user)
+        self.movie = make_movie()
+        self.show = make_show(self.movie)
+
+    def post_checkout(self, seats):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('checkout'), {
+                'show_id': self.show.pk, 'movie_id': self.movie.pk, 'seats': seats,
+            }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_booking_and_conflict(self):
+        resp = self.post_checkout('A1,A2')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()['success'])
+
+        resp = self.post_checkout('A2,A3')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['conflicts'], ['A2'])
+
+        self.show.refresh_from_db()
+        self.assertEqual(self.show.booked_seat_ids(), ['A1', 'A2'])
+        self.assertEqual(Booking.objects.filter(show=self.show).count(), 1)
+        self.assertEqual(SeatReservation.objects.filter(show=self.show).count(), 2)
+
+        resp = self.client.get(reverse('show_booked_seats', args=[self.show.pk]))
+        self.assertEqual(resp.json()['booked'], ['A1', 'A2'])
+
+    def test_unknown_seat_rejected(self):
+        resp = self.post_checkout('Q42')
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_conflict_detected_by_reservation_rows(self):
+        # a claim the bitmap has not seen yet still blocks the seat
+        SeatReservation.objects.create(show=self.show, seat_id='C5')
+        resp = self.post_checkout('C4,C5')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['conflicts'], ['C5'])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_bitmap_failure_after_commit_keeps_the_booking(self):
+        with mock.patch.object(Show, 'apply_seat_changes', side_effect=OperationalError('database is locked')), \
+                self.assertLogs(level='ERROR'):
+            resp = self.post_checkout('E1')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()['success'])
+        self.assertEqual(SeatReservation.objects.filter(show=self.show, booking__isnull=False).count(), 1)
+        self.show.rebuild_seat_map()
+        self.assertEqual(self.show.booked_seat_ids(), ['E1'])
+
+    def test_deleting_booking_frees_seats(self):
+        self.post_checkout('D1')
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.all().delete()
+        self.show.refresh_from_db()
+        self.assertEqual(self.show.seats_booked, 0)
+
+
+class BackfillReservationsTests(CacheClearingTestCase):
+    def test_backfill_from_bookings_and_bitmap(self):
+        user = User.objects.create_user('bob')
+        movie = make_movie()
+        show = make_show(movie)
+        show.book_seats(['A1', 'A2', 'B1'])
+        show.save()
+        booking = Booking.objects.create(user=user, movie=movie, show=show, seats='A1,A2', ticket_number='T1')
+
+        call_command('backfill_seat_reservations', stdout=StringIO())
+        call_command('backfill_seat_reservations', stdout=StringIO())
+
+        rows = dict(SeatReservation.objects.filter(show=show).values_list('seat_id', 'booking_id'))
+        self.assertEqual(rows, {'A1': booking.pk, 'A2': booking.pk, 'B1': None})
+
+    def test_migration_backfills_seats_booked_before_upgrade(self):
+        user = User.objects.create_user('bob')
+        movie = make_movie()
+        show = make_show(movie)
+        show.book_seats(['B1'])
+        show.save()
+        booking = Booking.objects.create(user=user, movie=movie, show=show, seats='A1', ticket_number='T1')
+
+        migration = importlib.import_module('movies.migrations.0047_backfill_seat_reservations')
+        migration.backfill_reservations(historical_apps('0047_backfill_seat_reservations'), None)
+
+        rows = dict(SeatReservation.objects.filter(show=show).values_list('seat_id', 'booking_id'))
+        self.assertEqual(rows, {'A1': booking.pk, 'B1': None})
+        show.refresh_from_db()
+        self.assertEqual(show.booked_seat_ids(), ['A1', 'B1'])
+
+    def test_bitmap_refuses_seats_without_rows(self):
+        # a seat booked before reservation rows existed is still taken
+        movie = make_movie()
+        show = make_show(movie)
+        show.book_seats(['C1'])
+        show.save()
+        user = User.objects.create_user('carol')
+        self.assertEqual(holds.place_holds(show, user, ['C1', 'C2']), (None, ['C1']))
+        self.client.force_login(user)
+        resp = self.client.post(reverse('checkout'), {
+            'show_id': show.pk, 'movie_id': movie.pk, 'seats': 'C1',
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code, 409)
+        self.assertFalse(SeatReservation.objects.exists())
+
+
+class SeatHoldTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.movie = make_movie()
+        self.show = make_show(self.movie)
+
+    def hold(self, user, seats):
+        self.client.force_login(user)
+        return self.client.post(reverse('hold_seats', args=[self.show.pk]),
+                                json.dumps({'seats': seats}), content_type='application/json')
+
+    def test_held_seats_unavailable_to_others(self):
+        resp = self.hold(self.alice, ['A1', 'A2'])
+        self.assertEqual(resp.json()['held'], ['A1', 'A2'])
+
+        resp = self.hold(self.bob, ['A2', 'A3'])
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['conflicts'], ['A2'])
+
+        resp = self.client.get(reverse('show_booked_seats', args=[self.show.pk]))
+        self.assertEqual(resp.json()['booked'], ['A1', 'A2'])
+
+    def test_expired_hold_is_ignored_and_swept(self):
+        self.hold(self.alice, ['B1'])
+        holds.active_holds(self.show).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        resp = self.hold(self.bob, ['B1'])
+        self.assertEqual(resp.status_code, 200)
+        SeatReservation.objects.filter(user=self.bob).update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command('expire_seat_holds', stdout=StringIO())
+        self.assertFalse(SeatReservation.objects.exists())
+
+    def test_holding_a_new_selection_frees_dropped_seats(self):
+        self.hold(self.alice, ['E1', 'E2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.hold(self.alice, ['E2', 'E3'])
+        self.assertEqual(resp.json()['held'], ['E2', 'E3'])
+        self.assertEqual(self.hold(self.bob, ['E1']).status_code, 200)
+        # a conflicting selection leaves the previous hold untouched
+        self.assertEqual(self.hold(self.alice, ['E1', 'E4']).status_code, 409)
+        self.assertEqual(sorted(holds.user_holds(self.show, self.alice).values_list('seat_id', flat=True)), ['E2', 'E3'])
+
+    def test_extend_and_release(self):
+        self.hold(self.alice, ['C1', 'C2'])
+        resp = self.client.post(reverse('extend_seat_holds', args=[self.show.pk]))
+        self.assertTrue(resp.json()['success'])
+        resp = self.client.post(reverse('release_seat_holds', args=[self.show.pk]),
+                                json.dumps({'seats': ['C1']}), content_type='application/json')
+        self.assertEqual(resp.json()['released'], 1)
+        self.assertEqual(list(holds.user_holds(self.show, self.alice).values_list('seat_id', flat=True)), ['C2'])
+
+    def test_checkout_converts_hold(self):
+        self.hold(self.alice, ['D1', 'D2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse('checkout'), {
+                'show_id': self.show.pk, 'movie_id': self.movie.pk, 'seats': 'D1,D2',
+            }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code, 200)
+        booking = Booking.objects.get()
+        self.assertEqual(SeatReservation.objects.filter(booking=booking, expires_at__isnull=True).count(), 2)
+        self.show.refresh_from_db()
+        self.assertEqual(self.show.booked_seat_ids(), ['D1', 'D2'])
+
+        # another user cannot check out seats still held by someone else
+        self.hold(self.alice, ['D3'])
+        self.client.force_login(self.bob)
+        resp = self.client.post(reverse('checkout'), {
+            'show_id': self.show.pk, 'movie_id': self.movie.pk, 'seats': 'D3',
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code, 409)
+
+
+class BookedSeatsCachingTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('carol')
+        self.client.force_login(self.user)
+        self.show = make_show(make_movie())
+        self.url = reverse('show_booked_seats', args=[self.show.pk])
+
+    def test_not_modified_until_version_changes(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+
+        # session/user lookups plus the version; the seat state comes from the cache
+        with self.assertNumQueries(3):
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Show.apply_seat_changes(self.show.pk, booked=['A5'])
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertIn('Last-Modified', changed)
+        self.assertEqual(changed.json()['booked'], ['A5'])
+
+    def test_bump_in_another_process_is_seen_at_once(self):
+        etag = self.client.get(self.url)['ETag']
+        # another worker's bump cannot clear this process's memory cache
+        Show.objects.filter(pk=self.show.pk).update(seat_version=F('seat_version') + 1)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(SEAT_VERSION_CACHE_SECONDS=30)
+    def test_shared_cache_serves_the_version(self):
+        etag = self.client.get(self.url)['ETag']
+        # only the session/user lookups
+        with self.assertNumQueries(2):
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+    def test_lapsed_hold_bumps_version(self):
+        other = User.objects.create_user('dave')
+        holds.place_holds(self.show, other, ['B2'])
+        first = self.client.get(self.url)
+        self.assertEqual(first.json()['booked'], ['B2'])
+
+        later = timezone.now() + timedelta(minutes=holds.hold_minutes() + 1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['booked'], [])
+        self.assertFalse(SeatReservation.objects.exists())
+
+
+class SeatEventsTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('erin')
+        self.show = make_show(make_movie())
+
+    def test_in_memory_broker_delivers_across_threads(self):
+        broker = seatevents.InMemoryBroker()
+
+        async def scenario():
+            sub = broker.subscribe(7)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, broker.publish, 7, {'taken': ['A1']})
+            await loop.run_in_executor(None, broker.publish, 8, {'taken': ['B1']})
+            first = await sub.get(timeout=1)
+            second = await sub.get(timeout=0.05)
+            await sub.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first, {'taken': ['A1']})
+        self.assertIsNone(second)
+        self.assertFalse(broker._subscribers)
+
+    def test_booking_publishes_delta_after_commit(self):
+        published = []
+        with mock.patch.object(seatevents, 'publish', lambda show_id, event: published.append((show_id, event))):
+            with self.captureOnCommitCallbacks(execute=True):
+                Show.apply_seat_changes(self.show.pk, booked=['C3'])
+                self.assertEqual(published, [])
+        self.assertEqual(published, [(self.show.pk, {'taken': ['C3'], 'freed': [], 'holder': None})])
+
+    async def test_stream_relays_events_and_skips_own_holds(self):
+        broker = seatevents.InMemoryBroker()
+        with mock.patch.object(seatevents, '_broker', broker):
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get(reverse('show_seat_events', args=[self.show.pk]))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+            broker.publish(self.show.pk, {'taken': ['A1'], 'freed': [], 'holder': self.user.pk})
+            broker.publish(self.show.pk, {'taken': ['A2'], 'freed': [], 'holder': None})
+            chunk = await asyncio.wait_for(anext(stream), 1)
+            self.assertEqual(json.loads(chunk.decode().split('data: ')[1]), {'taken': ['A2'], 'freed': []})
+            await stream.aclose()
+
+    def test_wsgi_request_gets_no_content(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('show_seat_events', args=[self.show.pk]))
+        self.assertEqual(response.status_code, 204)
+
+
+class ShowsAvailabilityTests(CacheClearingTestCase):
+    def test_counts_for_many_shows_in_fixed_queries(self):
+        user = User.objects.create_user('frank')
+        self.client.force_login(user)
+        movie = make_movie()
+        shows = [make_show(movie, show_date=date(2030, 1, d)) for d in range(1, 6)]
+        shows[0].book_seats(['A1', 'A2'])
+        shows[0].save()
+        holds.place_holds(shows[1], user, ['B1'])
+
+        url = reverse('shows_availability')
+        ids = ','.join(str(s.pk) for s in shows)
+        # session + user, shows, grouped holds
+        with self.assertNumQueries(4):
+            data = self.client.get(url, {'ids': ids, 'bitmap': '1'}).json()['shows']
+        self.assertEqual(data[str(shows[0].pk)]['booked'], 2)
+        self.assertEqual(data[str(shows[0].pk)]['free'], 88)
+        self.assertEqual(data[str(shows[1].pk)]['held'], 1)
+        self.assertEqual(data[str(shows[0].pk)]['bitmap'], 'AwAAAAAAAAAAAAAA')
+
+        data = self.client.get(url, {'movie': movie.pk, 'from': '2030-01-02', 'to': '2030-01-03'}).json()['shows']
+        self.assertEqual(sorted(data), sorted([str(shows[1].pk), str(shows[2].pk)]))
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class SalesCountersTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('gina')
+        self.client.force_login(self.user)
+        self.movie = make_movie()
+        self.show = make_show(self.movie, price=12)
+
+    def test_checkout_updates_counters_and_reconcile_matches(self):
+        for seats in ('A1,A2', 'B1'):
+            self.client.post(reverse('checkout'), {
+                'show_id': self.show.pk, 'movie_id': self.movie.pk, 'seats': seats,
+            }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.show.refresh_from_db()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.show.tickets_sold, self.show.bookings_count), (3, 2))
+        self.assertEqual(self.show.gross_revenue, Decimal('36.00'))
+        self.assertEqual(self.movie.revenue, Decimal('36.00'))
+        self.assertIsNotNone(self.movie.last_sale_at)
+
+        Booking.objects.filter(seats='B1').delete()
+        Movie.objects.update(revenue=999)
+        call_command('reconcile_sales', stdout=StringIO())
+        self.show.refresh_from_db()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.show.tickets_sold, self.show.bookings_count), (2, 1))
+        self.assertEqual(self.movie.revenue, Decimal('24.00'))
+        self.assertEqual(self.movie.tickets_sold, 2)
+
+    def test_booking_without_movie_counts_toward_the_shows_movie(self):
+        self.client.post(reverse('checkout'), {'show_id': self.show.pk, 'seats': 'C1'},
+                         HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.movie.refresh_from_db()
+        self.assertEqual(Booking.objects.get().movie, self.movie)
+        self.assertEqual((self.movie.tickets_sold, self.movie.bookings_count), (1, 1))
+
+        Booking.objects.update(movie=None)
+        Movie.objects.update(tickets_sold=0, bookings_count=0, revenue=0)
+        call_command('reconcile_sales', stdout=StringIO())
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.tickets_sold, self.movie.bookings_count), (1, 1))
+        self.assertEqual(dashboard.get_totals()['total_bookings_count'], 1)
+
+    def test_migration_fills_counters_of_existing_bookings(self):
+        Booking.objects.create(user=self.user, movie=self.movie, show=self.show, seats='A1,A2',
+                               total_price=24, ticket_number='T1')
+        Booking.objects.create(user=self.user, show=self.show, seats='B1', total_price=12, ticket_number='T2')
+        migration = importlib.import_module('movies.migrations.0048_fill_sales_counters')
+        migration.fill_counters(historical_apps('0048_fill_sales_counters'), None)
+        self.show.refresh_from_db()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.show.tickets_sold, self.show.bookings_count), (3, 2))
+        self.assertEqual(self.show.gross_revenue, Decimal('36.00'))
+        self.assertEqual((self.movie.tickets_sold, self.movie.revenue), (3, Decimal('36.00')))
+
+
+class DashboardTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('hank', is_staff=True)
+        self.client.force_login(self.user)
+
+    def add_movie_with_shows(self, count):
+        movie = make_movie(release_date=date(2026, 1, Movie.objects.count() + 1))
+        for day in range(1, count + 1):
+            make_show(movie, show_date=date(2030, 2, day))
+        return movie
+
+    def test_query_count_does_not_grow_with_shows(self):
+        self.add_movie_with_shows(2)
+        with self.assertNumQueries(11):
+            self.client.get(reverse('dashboard'))
+        cache.clear()
+        for _ in range(4):
+            self.add_movie_with_shows(9)
+        with self.assertNumQueries(11):
+            resp = self.client.get(reverse('dashboard'))
+        self.assertEqual(resp.context['active_shows_count'], 38)
+        self.assertEqual(len(resp.context['active_shows'][0].upcoming_shows), 6)
+        self.assertEqual(resp.context['active_shows'][0].upcoming_count, 9)
+        self.assertContains(resp, '+3 more')
+
+    def test_cache_keyed_on_resolved_page(self):
+        self.add_movie_with_shows(1)
+        dashboard.get_active_movies_page('1')
+        # junk and out-of-range pages resolve to a cached page instead of a new entry
+        with self.assertNumQueries(0):
+            self.assertEqual(dashboard.get_active_movies_page('x')['number'], 1)
+            self.assertEqual(dashboard.get_active_movies_page('999')['number'], 1)
+
+    def test_snapshot_cached_and_invalidated(self):
+        self.add_movie_with_shows(1)
+        self.client.get(reverse('dashboard'))
+        # only session, user and the per-user bookings count remain (navbar profile is cached)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_movie_with_shows(1)
+        resp = self.client.get(reverse('dashboard'))
+        self.assertEqual(resp.context['active_shows_count'], 2)
+
+
+class CatalogPaginationTests(CacheClearingTestCase):
+    def test_keyset_pages_cover_catalog_once(self):
+        for i in range(30):
+            # several movies share a release date to exercise the id tie-break
+            make_movie(title=f'M{i}', release_date=date(2024, 1, 1 + i // 4),
+                       genre='Action' if i % 3 == 0 else 'Drama', is_featured=i % 2 == 0)
+        expected = list(Movie.objects.order_by('-release_date', '-id').values_list('title', flat=True))
+
+        seen, cursor = [], ''
+        while True:
+            data = self.client.get(reverse('movies'), {'format': 'json', 'cursor': cursor}).json()
+            seen.extend(m['title'] for m in data['movies'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+
+        resp = self.client.get(reverse('home'))
+        self.assertEqual(len(resp.context['all_movies']), 8)
+        self.assertIsNotNone(resp.context['next_cursor'])
+
+        data = self.client.get(reverse('movies'), {'format': 'json', 'genre': 'Action', 'featured': '1'}).json()
+        self.assertEqual(len(data['movies']), 5)
+
+    def test_bad_cursor_starts_from_first_page(self):
+        make_movie()
+        data = self.client.get(reverse('movies'), {'format': 'json', 'cursor': '!!'}).json()
+        self.assertEqual(len(data['movies']), 1)
+
+
+class MovieSearchTests(CacheClearingTestCase):
+    def test_ranked_prefix_search_stays_in_sync(self):
+        galaxy = make_movie(title='Guardians of the Galaxy', genre='Sci-Fi')
+        make_movie(title='Quiet Place', synopsis='A family hides from the galaxy of monsters')
+        self.assertIsInstance(search.get_backend(), search.SqliteFTSBackend)
+
+        titles = [m.title for m in search.search_movies('galax')]
+        self.assertEqual(titles, ['Guardians of the Galaxy', 'Quiet Place'])
+        self.assertEqual([m.title for m in search.search_movies('guard gal')], ['Guardians of the Galaxy'])
+
+        galaxy.title = 'Renamed'
+        galaxy.save()
+        self.assertEqual(search.search_movies('guardians'), [])
+        galaxy.delete()
+        self.assertEqual([m.title for m in search.search_movies('galaxy')], ['Quiet Place'])
+
+    def test_list_view_uses_search_and_filters(self):
+        make_movie(title='Storm Front', genre='Action')
+        make_movie(title='Storm Season', genre='Drama')
+        resp = self.client.get(reverse('movies'), {'search': 'storm', 'genre': 'Drama'})
+        self.assertEqual([m.title for m in resp.context['all_movies']], ['Storm Season'])
+        # punctuation is not passed through to MATCH
+        self.assertEqual(self.client.get(reverse('movies'), {'search': '"storm* OR'}).status_code, 200)
+
+    def test_search_says_when_results_are_cut_and_fills_filtered_pages(self):
+        for i in range(views.SEARCH_RESULTS_LIMIT + 1):
+            make_movie(title=f'Storm {i}', genre='Action')
+        resp = self.client.get(reverse('movies'), {'search': 'storm'})
+        self.assertEqual(len(resp.context['all_movies']), views.SEARCH_RESULTS_LIMIT)
+        self.assertContains(resp, f'Showing the first {views.SEARCH_RESULTS_LIMIT} results')
+        self.assertTrue(self.client.get(reverse('movies'), {'search': 'storm', 'format': 'json'}).json()['truncated'])
+
+        # matches the genre filter rejects do not leave the page short
+        make_movie(title='Storm Drama', genre='Drama')
+        drama = Movie.objects.filter(genre='Drama')
+        self.assertEqual([m.title for m in search.search_movies('storm', drama)], ['Storm Drama'])
+        resp = self.client.get(reverse('movies'), {'search': 'storm', 'genre': 'Drama'})
+        self.assertNotContains(resp, 'Showing the first')
+
+    def test_selective_filter_stops_widening_and_flags_truncation(self):
+        for i in range(40):
+            make_movie(title=f'Flood {i}', genre='Action')
+        # only its synopsis mentions the flood, so it ranks below every title match
+        make_movie(title='Drama Night', genre='Drama', synopsis='A town after the flood.')
+        drama = Movie.objects.filter(genre='Drama')
+        backend = search.get_backend()
+        with mock.patch.object(backend, 'search_ids', wraps=backend.search_ids) as search_ids:
+            movies, truncated = search.search_page('flood', drama, limit=1)
+        # 8 then 32 ids, all Action: the Drama match is never fetched
+        self.assertEqual([call.args[1] for call in search_ids.call_args_list], [8, 32])
+        self.assertEqual((movies, truncated), ([], True))
+        self.assertEqual(search.search_page('flood night', drama, limit=1), (list(drama), False))
+
+    def test_rebuild_command(self):
+        Movie.objects.bulk_create([Movie(title='Bulk Loaded', poster_url='https://e.com/p.jpg', genre='Drama',
+                                         release_date=date(2024, 1, 1), duration_minutes=90)])
+        self.assertEqual(search.search_movies('bulk'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual([m.title for m in search.search_movies('bulk')], ['Bulk Loaded'])
+
+
+class MovieSuggestTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        suggest._index.generation = None
+
+    def test_prefix_lookup_ranked_by_rating_without_queries(self):
+        make_movie(title='Guardians of the Galaxy', genre='Sci-Fi', rating=Decimal('8.0'))
+        make_movie(title='Galaxy Quest', genre='Comedy', rating=Decimal('7.4'))
+        make_movie(title='Gladiator', genre='Action', rating=Decimal('8.5'))
+        suggest.suggest('x')  # build
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('movie_suggestions'), {'q': 'gal'})
+        self.assertEqual([r['title'] for r in resp.json()['results']], ['Guardians of the Galaxy', 'Galaxy Quest'])
+        self.assertEqual([r['title'] for r in suggest.suggest('G', limit=2)], ['Gladiator', 'Guardians of the Galaxy'])
+        self.assertEqual([r['title'] for r in suggest.suggest('gal com')], ['Galaxy Quest'])
+        self.assertEqual(self.client.get(reverse('movie_suggestions')).json()['results'], [])
+
+    def test_index_follows_saves_and_deletes(self):
+        movie = make_movie(title='Old Name')
+        self.assertEqual(len(suggest.suggest('old')), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.title = 'New Name'
+            movie.save()
+        self.assertEqual(suggest.suggest('old'), [])
+        self.assertEqual(suggest.suggest('new')[0]['id'], movie.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.delete()
+        self.assertEqual(suggest.suggest('new'), [])
+
+    def test_other_process_changes_trigger_rebuild(self):
+        make_movie(title='Arrival')
+        self.assertEqual(len(suggest.suggest('arr')), 1)
+        # a save in another worker only bumps the shared generation
+        Movie.objects.filter(title='Arrival').update(title='Departure')
+        suggest._bump_generation()
+        self.assertEqual(suggest.suggest('arr'), [])
+        self.assertEqual(len(suggest.suggest('dep')), 1)
+
+    @override_settings(SUGGEST_REBUILD_SECONDS=300)
+    def test_per_process_cache_rebuilds_after_max_age(self):
+        make_movie(title='Arrival')
+        self.assertEqual(len(suggest.suggest('arr')), 1)
+        # an edit whose generation bump never reaches this process's cache
+        Movie.objects.filter(title='Arrival').update(title='Departure')
+        self.assertEqual(len(suggest.suggest('arr')), 1)
+        built_at = suggest._index.built_at
+        with mock.patch('movies.suggest.time.monotonic', return_value=built_at + 300):
+            self.assertEqual(suggest.suggest('arr'), [])
+        self.assertEqual(len(suggest.suggest('dep')), 1)
+
+
+class PageCacheTests(CacheClearingTestCase):
+    def test_anonymous_pages_cached_until_catalog_changes(self):
+        movie = make_movie(title='First Cut')
+        url = reverse('movie_detail', args=[movie.pk])
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual(resp['X-Page-Cache'], 'HIT')
+        self.assertContains(resp, 'First Cut')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.title = 'Director Cut'
+            movie.save()
+        resp = self.client.get(url)
+        self.assertEqual(resp['X-Page-Cache'], 'MISS')
+        self.assertContains(resp, 'Director Cut')
+
+        # query order does not split the cache
+        self.client.get(reverse('movies'), {'genre': 'Drama', 'featured': '1'})
+        self.assertEqual(self.client.get(reverse('movies'), {'featured': '1', 'genre': 'Drama'})['X-Page-Cache'], 'HIT')
+
+    def test_seat_bookkeeping_does_not_invalidate(self):
+        show = make_show(make_movie())
+        version = pagecache.catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Show.apply_seat_changes(show.pk, booked=['A1'], released=())
+        self.assertEqual(pagecache.catalog_version(), version)
+
+    def test_signed_in_users_bypass_and_stats(self):
+        user = User.objects.create_user('viewer', password='pw')
+        self.client.force_login(user)
+        self.assertNotIn('X-Page-Cache', self.client.get(reverse('home')))
+        self.client.logout()
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        home = self.client.get(reverse('page_cache_stats')).json()['views']['home_view']
+        self.assertEqual(home, {'hit': 1, 'miss': 1, 'bypass': 1, 'hit_rate': 0.5})
+
+
+class StubChatProvider(BaseHTTPRequestHandler):
+    """Local stand-in for an OpenAI-compatible /chat/completions endpoint."""
+    calls = []
+    script = []
+    disconnected = threading.Event()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.calls.append((self.path, self.headers['Authorization'], body))
+        # injected faults: ('status', code) or ('sleep', seconds), one per call
+        action, value = self.script.pop(0) if self.script else (None, None)
+        if action == 'status':
+            self.send_response(value)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({'error': {'message': f'injected {value}'}}).encode())
+            return
+        if action == 'sleep':
+            time_module.sleep(value)
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            words = ['echo:'] + body['messages'][-1]['content'].split()
+            for i, word in enumerate(words):
+                chunk = {'choices': [{'delta': {'content': (' ' if i else '') + word}}]}
+                try:
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                except OSError:
+                    self.disconnected.set()
+                    return
+                if 'slowly' in body['messages'][-1]['content']:
+                    time_module.sleep(0.2)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        reply = json.dumps({'choices': [{'message': {'content': 'echo: ' + body['messages'][-1]['content']}}]})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        try:
+            self.wfile.write(reply.encode())
+        except OSError:
+            pass  # the client gave up (timeout tests)
+
+    def log_message(self, *args):
+        pass
+
+
+class ChatProxyTests(CacheClearingTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubChatProvider)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.env = mock.patch.dict('os.environ', {
+            'GROQ_API_URL': f'http://127.0.0.1:{cls.server.server_port}',
+            'GROQ_API_KEY': 'test-key',
+        })
+        cls.env.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.env.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        chat.reply_cache.clear()
+        StubChatProvider.calls.clear()
+        StubChatProvider.disconnected.clear()
+        StubChatProvider.script = []
+        self.now = 1000.0
+        saved = {k: getattr(chat.upstream, k) for k in ('min_calls', 'reset_seconds', 'clock')}
+        chat.upstream.configure(min_calls=3, reset_seconds=30, clock=lambda: self.now)
+        chat.upstream.reset()
+        self.addCleanup(chat.upstream.reset)
+        self.addCleanup(chat.upstream.configure, **saved)
+        self.user = User.objects.create_user('chatter', password='pw')
+        self.client.force_login(self.user)
+
+    def ask(self, message):
+        return self.client.post(reverse('api_chat'), json.dumps({'message': message}), content_type='application/json')
+
+    def test_reply_from_provider_then_cache(self):
+        resp = self.ask('Can I bring food inside?')
+        self.assertEqual(resp.json(), {'reply': 'echo: Can I bring food inside?', 'cached': False})
+        path, auth, body = StubChatProvider.calls[0]
+        self.assertEqual(path, '/openai/v1/chat/completions')
+        self.assertEqual(auth, 'Bearer test-key')
+
+        # same prompt after normalization is served without a provider call
+        resp = self.ask('  can i bring FOOD   inside ')
+        self.assertEqual(resp.json()['cached'], True)
+        self.assertEqual(len(StubChatProvider.calls), 1)
+
+    def track_clients(self):
+        clients = []
+        real = chat._new_client
+
+        def new_client():
+            clients.append(real())
+            return clients[-1]
+        patcher = mock.patch.object(chat, '_new_client', new_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return clients
+
+    def test_wsgi_requests_close_their_clients(self):
+        clients = self.track_clients()
+        for n in range(3):
+            self.assertEqual(self.ask(f'question {n}').status_code, 200)
+        self.assertEqual(len(clients), 3)
+        self.assertTrue(all(c.is_closed for c in clients))
+
+    @override_settings(CHAT_SHARED_CLIENT=True)
+    def test_shared_client_pooled_per_loop_and_closed_with_it(self):
+        clients = self.track_clients()
+
+        async def scenario():
+            for n in range(3):
+                self.assertIn('reply', await chat.complete([{'role': 'user', 'content': f'pooled {n}'}]))
+            self.assertFalse(clients[0].is_closed)
+        asyncio.run(scenario())
+        self.assertEqual(len(clients), 1)
+        self.assertTrue(clients[0].is_closed)
+        self.assertEqual(len(chat._clients), 0)
+
+    @override_settings(CHAT_RATE_LIMIT=2)
+    def test_per_user_rate_limit(self):
+        self.assertEqual(self.ask('one').status_code, 200)
+        self.assertEqual(self.ask('two').status_code, 200)
+        self.assertEqual(self.ask('three').status_code, 429)
+        self.assertEqual(len(StubChatProvider.calls), 2)
+
+    @override_settings(CHAT_MAX_CONCURRENT=1)
+    def test_concurrency_slots(self):
+        async def scenario():
+            self.assertIsNone(await chat.acquire_slot(self.user.pk))
+            self.assertIn('in progress', await chat.acquire_slot(self.user.pk))
+            await chat.release_slot(self.user.pk)
+            self.assertIsNone(await chat.acquire_slot(self.user.pk))
+        asyncio.run(scenario())
+
+    async def test_streamed_reply_and_fallback(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self.async_client.post(
+            reverse('api_chat'), {'message': 'two seats please', 'stream': True}, content_type='application/json'
+        )
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in resp.streaming_content])
+        deltas = [json.loads(line[6:])['text'] for line in body.split('\n') if line.startswith('data: {"text"')]
+        self.assertEqual(deltas, ['echo:', ' two', ' seats', ' please'])
+        self.assertIn('event: done\ndata: {"cached": false}', body)
+        self.assertTrue(StubChatProvider.calls[0][2]['stream'])
+        self.assertEqual(await cache.aget(f'chat:inflight:{self.user.pk}'), 0)
+
+        # the assembled reply is cached for the JSON (WSGI) path
+        resp = await self.async_client.post(
+            reverse('api_chat'), {'message': 'Two seats please'}, content_type='application/json'
+        )
+        self.assertEqual(resp.json(), {'reply': 'echo: two seats please', 'cached': True})
+
+    async def test_disconnect_closes_stream_and_frees_slot(self):
+        await self.async_client.aforce_login(self.user)
+        words = ' '.join(f'w{i}' for i in range(20))
+        resp = await self.async_client.post(
+            reverse('api_chat'), {'message': f'answer slowly {words}', 'stream': True}, content_type='application/json'
+        )
+        first = asyncio.Event()
+
+        async def browser():
+            async for chunk in resp.streaming_content:
+                first.set()
+
+        # the ASGI handler cancels the response task when the client goes away
+        task = asyncio.create_task(browser())
+        await first.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(await cache.aget(f'chat:inflight:{self.user.pk}'), 0)
+        self.assertEqual(len(chat.reply_cache), 0)
+        # the upstream connection was dropped instead of being read to the end
+        self.assertTrue(await asyncio.to_thread(StubChatProvider.disconnected.wait, 5))
+
+    def test_grounded_answers_skip_the_provider(self):
+        today = timezone.localdate()
+        dune = make_movie(title='Dune', price=Decimal('9.00'))
+        late = make_show(dune, show_date=today + timedelta(days=1), show_time=time(21, 0), price=Decimal('12.50'))
+        make_show(dune, show_date=today + timedelta(days=1), show_time=time(14, 0))
+        make_show(make_movie(title='Arrival'), show_date=today + timedelta(days=1), show_time=time(21, 15))
+
+        reply = self.ask('What is playing tomorrow at 9?').json()
+        self.assertTrue(reply['grounded'])
+        self.assertIn('Dune', reply['reply'])
+        self.assertIn('Arrival', reply['reply'])
+        self.assertNotIn('14:00', reply['reply'])
+
+        self.assertIn('12.50 per seat', self.ask('How much is Dune tomorrow at 9pm?').json()['reply'])
+        self.assertIn(f'{seatmap.get_layout(late.hall).capacity} seats left', self.ask('Any seats left for dune tomorrow at 21:00?').json()['reply'])
+        Booking.objects.create(user=self.user, movie=dune, show=late, seats='A1', ticket_number='TKT-1')
+        self.assertIn('TKT-1', self.ask('show my bookings').json()['reply'])
+        self.assertEqual(StubChatProvider.calls, [])
+
+        # open questions reach the provider with the showtime summary attached
+        self.ask('Which of these is better for kids?')
+        system = StubChatProvider.calls[0][2]['messages'][0]['content']
+        self.assertIn('Dune: ', system)
+        self.assertIn('21:00', system)
+
+    def test_intent_parsing(self):
+        self.assertEqual(assistant.detect_intent("what's on tonight"), 'showtimes')
+        self.assertIsNone(assistant.detect_intent('can I bring food'))
+        self.assertEqual(assistant.detect_intent('any shows tomorrow?'), 'showtimes')
+        self.assertIsNone(assistant.answer('Can you show me how to change my password?', self.user))
+        self.assertIsNone(assistant.answer('Is the box office open today?', self.user))
+        self.assertEqual(assistant.parse_time('at 9'), 21 * 60)
+        self.assertEqual(assistant.parse_time('10:30 am'), 10 * 60 + 30)
+        self.assertEqual(assistant.parse_day('on friday', date(2026, 10, 14)), date(2026, 10, 16))
+
+    @override_settings(CHAT_RETRY_BACKOFF_SECONDS=0)
+    def test_retries_only_failures_the_provider_never_acted_on(self):
+        chat.upstream.configure(min_calls=10)
+        StubChatProvider.script = [('status', 503), ('status', 502)]
+        self.assertEqual(self.ask('hello there').json()['reply'], 'echo: hello there')
+        self.assertEqual(len(StubChatProvider.calls), 3)
+
+        # a 500 may have done work upstream: no retry
+        StubChatProvider.calls.clear()
+        StubChatProvider.script = [('status', 500)]
+        self.assertEqual(self.ask('second question').status_code, 502)
+        self.assertEqual(len(StubChatProvider.calls), 1)
+
+    @override_settings(CHAT_TIMEOUT_SECONDS=0.2, CHAT_RETRY_ATTEMPTS=0)
+    def test_breaker_opens_fails_fast_and_recovers(self):
+        StubChatProvider.script = [('status', 500), ('sleep', 0.5), ('status', 500)]
+        self.assertEqual(self.ask('q1').status_code, 502)
+        self.assertEqual(self.ask('q2').json()['error'], 'Upstream timeout.')
+        self.ask('q3')
+        self.assertEqual(chat.upstream.state, 'open')
+
+        resp = self.ask('q4')
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp['Retry-After'], '31')
+        self.assertEqual(len(StubChatProvider.calls), 3)
+
+        # after reset_seconds one probe goes out; success closes the breaker
+        self.now += 31
+        self.assertEqual(self.ask('q5').status_code, 200)
+        staff = User.objects.create_user('ops', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        breaker = self.client.get(reverse('chat_health')).json()['breaker']
+        self.assertEqual(breaker['state'], 'closed')
+        self.assertEqual(breaker['transitions'], {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1})
+
+    def test_breaker_window_and_half_open_probe(self):
+        now = [0.0]
+        breaker = CircuitBreaker('t', window=10, min_calls=4, failure_rate=0.5, reset_seconds=5, clock=lambda: now[0])
+        for ok in (False, False, True):
+            breaker.record(ok)
+        now[0] = 11  # the old failures slide out of the window
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'closed')
+        for ok in (False, True, False):
+            breaker.record(ok)
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+        now[0] += 5
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one probe
+        breaker.record(False)
+        self.assertEqual(breaker.state, 'open')
+
+    def test_reply_cache_lru_and_ttl(self):
+        replies = chat.ReplyCache(max_size=2, ttl=60)
+        replies.set('a', 1)
+        replies.set('b', 2)
+        replies.get('a')
+        replies.set('c', 3)
+        self.assertEqual((replies.get('a'), replies.get('b'), replies.get('c')), (1, None, 3))
+        with mock.patch('movies.chat.time.monotonic', return_value=time_module.monotonic() + 120):
+            self.assertIsNone(replies.get('a'))
+
+
+class BulkScheduleTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = make_movie(title='Long Run', duration_minutes=120)
+        self.client.force_login(User.objects.create_user('scheduler', password='pw', is_staff=True))
+
+    def schedule(self, **fields):
+        body = {
+            'movie': self.movie.pk, 'start_date': '2030-03-04', 'end_date': '2030-03-17',
+            'times': ['10:00', '14:00', '18:30'], 'halls': ['Hall 1', 'Hall 2'], 'price': '10.00',
+        }
+        body.update(fields)
+        return self.client.post(reverse('bulk_schedule'), json.dumps(body), content_type='application/json')
+
+    def test_recurrence_with_price_rules(self):
+        resp = self.schedule(weekdays=[0, 1, 2, 3, 4, 5], weekend_price='14.00', evening_price='12.00', evening_from='18:00')
+        self.assertEqual(resp.status_code, 201)
+        # two weeks minus Sundays, three slots, two halls
+        self.assertEqual(resp.json()['created'], 12 * 3 * 2)
+        shows = Show.objects.filter(movie=self.movie)
+        self.assertFalse(shows.filter(show_date=date(2030, 3, 10)).exists())
+        self.assertEqual(shows.get(show_date=date(2030, 3, 9), show_time=time(10, 0), hall='Hall 1').price, Decimal('14.00'))
+        self.assertEqual(shows.get(show_date=date(2030, 3, 4), show_time=time(18, 30), hall='Hall 2').price, Decimal('12.00'))
+        self.assertEqual(shows.get(show_date=date(2030, 3, 4), show_time=time(10, 0), hall='Hall 2').price, Decimal('10.00'))
+
+    def test_overlaps_block_unless_skipped(self):
+        make_show(make_movie(duration_minutes=100), hall='Hall 1', show_date=date(2030, 3, 5), show_time=time(15, 0))
+        # runs past midnight into the 4th until 01:20 + cleanup
+        make_show(make_movie(duration_minutes=110), hall='Hall 2', show_date=date(2030, 3, 3), show_time=time(23, 30))
+
+        resp = self.schedule(times=['01:00', '10:00', '14:00'], end_date='2030-03-05')
+        self.assertEqual(resp.status_code, 409)
+        clashes = {(c['date'], c['time'], c['hall']) for c in resp.json()['conflicts']}
+        self.assertEqual(clashes, {('2030-03-05', '14:00', 'Hall 1'), ('2030-03-04', '01:00', 'Hall 2')})
+        self.assertFalse(Show.objects.filter(movie=self.movie).exists())
+
+        resp = self.schedule(times=['01:00', '10:00', '14:00'], end_date='2030-03-05', skip_conflicts=True)
+        self.assertEqual(resp.json()['created'], 2 * 3 * 2 - 2)
+
+    def test_slots_inside_one_run_cannot_overlap(self):
+        resp = self.schedule(times=['10:00', '11:00'], halls=['Hall 1'], end_date='2030-03-04', dry_run=True)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['planned'], 1)
+        self.assertIn('this schedule', resp.json()['conflicts'][0]['clashes_with'][0])
+        self.assertFalse(Show.objects.exists())
+
+    def test_thousands_of_shows_in_batched_inserts(self):
+        recurrence = scheduling.Recurrence(
+            movie=self.movie, start_date=date(2030, 1, 1), end_date=date(2030, 12, 31),
+            weekdays=list(range(7)), times=[time(10, 0), time(13, 0), time(16, 0), time(19, 0), time(22, 0)],
+            halls=['Hall 1', 'Hall 2'], prices=scheduling.PriceRule(price=Decimal('9.50')),
+        )
+        with self.assertNumQueries(1):
+            plan = scheduling.plan(recurrence)
+        self.assertEqual(len(plan.shows), 365 * 5 * 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduling.commit(plan)
+        self.assertEqual(Show.objects.filter(movie=self.movie).count(), 3650)
+
+    def test_preview_form_creates_nothing(self):
+        resp = self.client.post(reverse('bulk_schedule'), {
+            'movie': self.movie.pk, 'start_date': '2030-03-04', 'end_date': '2030-03-05',
+            'times': '10:00, 14:00', 'halls': 'Hall 1', 'price': '10', 'preview': '1',
+        })
+        self.assertContains(resp, '4 shows ready')
+        self.assertFalse(Show.objects.exists())
+
+
+class HallOverlapTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('hallstaff', password='pw', is_staff=True, is_superuser=True)
+        self.client.force_login(self.staff)
+        self.movie = make_movie(title='Epic', duration_minutes=150)
+        self.show = make_show(self.movie, hall='Hall 1', show_date=date(2030, 5, 1), show_time=time(18, 0))
+
+    def test_hall_conflicts_uses_cleanup_buffer(self):
+        # 18:00 + 150 min + 20 min cleanup = 20:50
+        self.assertTrue(scheduling.hall_conflicts('Hall 1', date(2030, 5, 1), time(20, 45), 90))
+        self.assertEqual(scheduling.hall_conflicts('Hall 1', date(2030, 5, 1), time(20, 50), 90), [])
+        self.assertEqual(scheduling.hall_conflicts('Hall 2', date(2030, 5, 1), time(19, 0), 90), [])
+        # a show ending after midnight and one starting just before it
+        late = make_show(self.movie, hall='Hall 1', show_date=date(2030, 5, 1), show_time=time(23, 0))
+        self.assertTrue(scheduling.hall_conflicts('Hall 1', date(2030, 5, 2), time(0, 30), 90))
+        self.assertEqual(scheduling.hall_conflicts('Hall 1', date(2030, 5, 1), time(23, 0), 150, exclude_pk=late.pk), [])
+
+    def test_add_shows_view_rejects_overlaps(self):
+        self.movie.is_featured = True
+        self.movie.save()
+        form = {'movie_id': self.movie.pk, 'price': '10', 'show_date': '2030-05-01', 'show_time': '19:00', 'hall': 'Hall 1'}
+        self.client.post(reverse('add_shows'), form)
+        self.assertEqual(Show.objects.filter(hall='Hall 1').count(), 1)
+        self.client.post(reverse('add_shows'), dict(form, show_time='21:00'))
+        self.assertEqual(Show.objects.filter(hall='Hall 1').count(), 2)
+
+    def test_admin_form_rejects_overlaps(self):
+        url = reverse('admin:movies_show_change', args=[self.show.pk])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        other = make_show(self.movie, hall='Hall 2', show_date=date(2030, 5, 1), show_time=time(19, 0))
+        data = {
+            'movie': self.movie.pk, 'show_date': '2030-05-01', 'show_time': '19:00', 'price': '10', 'hall': 'Hall 1',
+            'seats_total': 90, 'seats_booked': 0, 'is_active': 'on', 'seat_version': 0,
+        }
+        resp = self.client.post(reverse('admin:movies_show_change', args=[other.pk]), data)
+        self.assertContains(resp, 'Hall 1 is busy then')
+        other.refresh_from_db()
+        self.assertEqual(other.hall, 'Hall 2')
+
+    def test_report_command_sweeps_each_hall(self):
+        make_show(self.movie, hall='Hall 1', show_date=date(2030, 5, 1), show_time=time(20, 0))
+        make_show(self.movie, hall='Hall 1', show_date=date(2030, 5, 1), show_time=time(21, 0))
+        make_show(self.movie, hall='Hall 2', show_date=date(2030, 5, 1), show_time=time(20, 0))
+        make_show(self.movie, show_date=date(2030, 5, 1), show_time=time(20, 0))  # no hall
+        out = StringIO()
+        call_command('report_show_conflicts', '--from', '2030-01-01', stdout=out)
+        # 18:00 (busy until 20:50) overlaps 20:00, which overlaps 21:00
+        self.assertIn('2 overlapping show pair(s)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('report_show_conflicts', '--all', '--hall', 'Hall 1', '--fail', stdout=StringIO())
+
+    @override_settings(THEATER_TIME_ZONE='Asia/Kolkata')
+    def test_report_starts_at_the_theater_date(self):
+        # 20:00 UTC on 10 June is already 11 June in Kolkata
+        make_show(self.movie, hall='Hall 1', show_date=date(2030, 6, 10), show_time=time(20, 0))
+        make_show(self.movie, hall='Hall 1', show_date=date(2030, 6, 10), show_time=time(21, 0))
+        now = datetime(2030, 6, 10, 20, 0, tzinfo=ZoneInfo('UTC'))
+        out = StringIO()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            call_command('report_show_conflicts', stdout=out)
+        self.assertIn('0 overlapping show pair(s)', out.getvalue())
+
+
+class UpcomingShowsTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('upcoming', password='pw')
+        self.client.force_login(self.user)
+        self.movie = make_movie(title='Long Run', duration_minutes=100)
+        self.now = timezone.localtime(timezone.now()).replace(tzinfo=None)
+        self.today = self.now.date()
+
+    def test_upcoming_filters_started_and_out_of_window(self):
+        now = timezone.make_aware(datetime(2030, 6, 10, 18, 0))
+        make_show(self.movie, show_date=date(2030, 6, 9), show_time=time(20, 0))
+        make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(17, 59))
+        evening = make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(18, 0))
+        later = make_show(self.movie, show_date=date(2030, 6, 16), show_time=time(12, 0))
+        make_show(self.movie, show_date=date(2030, 6, 17), show_time=time(12, 0))
+        make_show(self.movie, show_date=date(2030, 6, 11), show_time=time(12, 0), is_active=False)
+        shows = scheduling.upcoming(Show.objects.all(), now=now, days=7)
+        self.assertEqual(list(shows), [evening, later])
+
+    @override_settings(THEATER_TIME_ZONE='Asia/Kolkata')
+    def test_upcoming_uses_theater_time_zone(self):
+        # 13:00 UTC is 18:30 in Kolkata
+        now = datetime(2030, 6, 10, 13, 0, tzinfo=ZoneInfo('UTC'))
+        make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(18, 0))
+        show = make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(19, 0))
+        self.assertEqual(list(scheduling.upcoming(Show.objects.all(), now=now)), [show])
+        # the assistant agrees with the seat page on what has started
+        reply = assistant.answer('what is showing today?', self.user, now=now)['reply']
+        self.assertNotIn('18:00', reply)
+        self.assertIn('19:00', reply)
+        self.assertIn('18:00', assistant.context_for(now=now - timedelta(hours=1)))
+
+    def test_seat_page_groups_upcoming_shows_by_day(self):
+        make_show(self.movie, show_date=self.today - timedelta(days=3))
+        first = make_show(self.movie, show_date=self.today + timedelta(days=1), show_time=time(14, 0))
+        make_show(self.movie, show_date=self.today + timedelta(days=1), show_time=time(20, 0))
+        make_show(self.movie, show_date=self.today + timedelta(days=2), show_time=time(14, 0))
+        with override_settings(SEAT_PAGE_DAYS=3), CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('seat_selection', args=[self.movie.pk]))
+        # the list is read once; no exists()/first() round trips
+        listings = [q for q in queries.captured_queries if '"movies_show"."movie_id" =' in q['sql']]
+        self.assertEqual(len(listings), 1)
+        days = resp.context['show_days']
+        self.assertEqual([day for day, _ in days], [self.today + timedelta(days=1), self.today + timedelta(days=2)])
+        self.assertEqual([len(shows) for _, shows in days], [2, 1])
+        self.assertEqual(resp.context['upcoming_shows'][0], first)
+
+    def test_seat_page_activates_the_requested_show(self):
+        first = make_show(self.movie, show_date=self.today + timedelta(days=1), show_time=time(14, 0))
+        later = make_show(self.movie, show_date=self.today + timedelta(days=1), show_time=time(20, 0))
+        later.book_seats(['A3'])
+        later.save()
+        url = reverse('seat_selection', args=[self.movie.pk])
+        resp = self.client.get(url, {'show_id': later.pk})
+        self.assertEqual(resp.context['active_show_id'], later.pk)
+        self.assertEqual(resp.context['initial_booked_seats'], ['A3'])
+        self.assertContains(resp, f'class="time-slot active" data-show-id="{later.pk}"')
+        # a show not listed on this page falls back to the first slot
+        resp = self.client.get(url, {'show_id': 'nope'})
+        self.assertEqual(resp.context['active_show_id'], first.pk)
+        self.assertEqual(resp.context['initial_booked_seats'], [])
+
+    def test_deactivate_past_waits_for_the_show_to_end(self):
+        now = timezone.make_aware(datetime(2030, 6, 10, 18, 0))
+        old = make_show(self.movie, show_date=date(2030, 6, 1))
+        ended = make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(16, 0))     # busy until 18:00
+        running = make_show(self.movie, show_date=date(2030, 6, 10), show_time=time(16, 1))
+        overnight = make_show(self.movie, show_date=date(2030, 6, 9), show_time=time(23, 30))
+        version = pagecache.catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scheduling.deactivate_past(now=now), 3)
+        self.assertNotEqual(pagecache.catalog_version(), version)
+        active = set(Show.objects.filter(is_active=True).values_list('pk', flat=True))
+        self.assertEqual(active, {running.pk})
+        self.assertNotIn(old.pk, active)
+        self.assertNotIn(ended.pk, active)
+        self.assertNotIn(overnight.pk, active)
+        out = StringIO()
+        call_command('deactivate_past_shows', stdout=out)
+        self.assertIn('Deactivated', out.getvalue())
+
+
+class TicketPdfTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(TICKET_PDF_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        user = User.objects.create_user('ticketholder', password='pw')
+        self.client.force_login(user)
+        movie = make_movie(title='Dune')
+        self.show = make_show(movie, show_date=timezone.localdate() + timedelta(days=1), hall='Hall 1')
+        self.booking = Booking.objects.create(user=user, movie=movie, show=self.show, seats='A1,A2',
+                                              total_price=Decimal('20.00'), ticket_number='PDF123')
+        self.url = reverse('ticket_pdf', args=['PDF123'])
+
+    def test_pdf_is_cached_by_content_and_revalidates(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(resp.streaming_content).startswith(b'%PDF'))
+        etag = resp['ETag']
+
+        with mock.patch.object(tickets, 'render_pdf') as render:
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            render.assert_not_called()
+        self.assertEqual(resp.status_code, 304)
+
+        # a printed field changed: new file, new tag
+        self.show.show_time = time(21, 0)
+        self.show.save()
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+        self.assertEqual(self.client.get(reverse('ticket_pdf', args=['NOPE'])).status_code, 404)
+
+    def test_pdf_only_for_its_owner_or_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.client.force_login(User.objects.create_user('stranger'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(User.objects.create_user('usher', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_prerender_command_renders_upcoming_tickets(self):
+        out = StringIO()
+        call_command('prerender_tickets', stdout=out)
+        self.assertIn('Rendered 1 ticket PDFs (0 already cached)', out.getvalue())
+        path, _ = tickets.get_pdf(self.booking)
+        self.assertTrue(path.exists())
+        out = StringIO()
+        call_command('prerender_tickets', '--prune', '0', stdout=out)
+        self.assertIn('(1 already cached)', out.getvalue())
+        self.assertIn('Removed 1 stale ticket PDFs', out.getvalue())
+
+
+class GateScanTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        gate.admitted.clear()
+        self.addCleanup(gate.admitted.clear)
+        staff = User.objects.create_user('gatekeeper', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        movie = make_movie()
+        self.show = make_show(movie)
+        self.booking = Booking.objects.create(user=staff, movie=movie, show=self.show, seats='A1', ticket_number='GATE1')
+        self.token = gate.token_for(self.booking)
+
+    def scan(self, **body):
+        resp = self.client.post(reverse('gate_scan'), json.dumps(body), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_token_is_signed(self):
+        self.assertEqual(gate.verify(self.token), ('GATE1', self.show.pk))
+        forged = self.token.replace('GATE1', 'GATE2')
+        with self.assertNumQueries(0):
+            self.assertEqual(gate.admit(forged)['status'], gate.INVALID)
+            self.assertEqual(gate.admit('nonsense')['status'], gate.INVALID)
+            self.assertEqual(gate.admit(self.token, show_id=self.show.pk + 1)['status'], gate.WRONG_SHOW)
+
+    def test_admits_once_and_remembers(self):
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            first = gate.admit(self.token, show_id=self.show.pk)
+        self.assertEqual(first['status'], gate.ADMITTED)
+        self.booking.refresh_from_db()
+        self.assertIsNotNone(self.booking.admitted_at)
+        # the refused UPDATE is the only query; memory answers the rest
+        with self.assertNumQueries(1):
+            self.assertEqual(gate.admit(self.token)['status'], gate.ALREADY_ADMITTED)
+        # another worker has not seen it: the conditional UPDATE still refuses
+        gate.admitted.clear()
+        again = self.scan(token=self.token, show=self.show.pk)
+        self.assertEqual(again['status'], gate.ALREADY_ADMITTED)
+        self.assertEqual(again['admitted_at'], first['admitted_at'])
+
+    def test_cleared_or_refunded_ticket_is_not_answered_from_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            gate.admit(self.token)
+        # a worker that did not see the admin edit still re-admits the mis-scan
+        Booking.objects.update(admitted_at=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(gate.admit(self.token)['status'], gate.ADMITTED)
+        # the worker that saves or deletes the booking forgets it at once
+        self.assertIsNotNone(gate.admitted.get(self.show.pk, 'GATE1'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.delete()
+        self.assertIsNone(gate.admitted.get(self.show.pk, 'GATE1'))
+        self.assertEqual(gate.admit(self.token)['status'], gate.NOT_FOUND)
+
+    def test_batch_keeps_scan_times_and_order(self):
+        other = Booking.objects.create(user=self.booking.user, movie=self.booking.movie, show=self.show,
+                                       seats='A2', ticket_number='GATE2')
+        scanned = '2030-01-01T17:45:00+00:00'
+        body = {'show': self.show.pk, 'scans': [
+            {'token': self.token, 'scanned_at': scanned},
+            {'token': gate.token_for(other)},
+            {'token': self.token},
+            {'token': 'forged'},
+        ]}
+        resp = self.client.post(reverse('gate_scan_batch'), json.dumps(body), content_type='application/json')
+        data = resp.json()
+        self.assertEqual([r['status'] for r in data['results']],
+                         [gate.ADMITTED, gate.ADMITTED, gate.ALREADY_ADMITTED, gate.INVALID])
+        self.assertEqual(data['admitted'], 2)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.admitted_at.isoformat(), scanned)
+
+    def test_malformed_tokens_and_scan_times_are_invalid(self):
+        self.assertIsNone(gate.verify(123))
+        self.assertIsNone(gate.verify(['a']))
+        self.assertEqual(self.scan(token=123)['status'], gate.INVALID)
+        self.assertEqual(self.scan(token=['a'])['status'], gate.INVALID)
+        body = {'scans': [
+            {'token': self.token, 'scanned_at': '2026-02-30T10:00:00'},
+            {'token': 123},
+            'not a scan',
+            {'token': self.token},
+        ]}
+        resp = self.client.post(reverse('gate_scan_batch'), json.dumps(body), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([r['status'] for r in resp.json()['results']],
+                         [gate.INVALID, gate.INVALID, gate.INVALID, gate.ADMITTED])
+
+    def test_deleted_booking_and_permissions(self):
+        self.booking.delete()
+        self.assertEqual(self.scan(token=self.token)['status'], gate.NOT_FOUND)
+        self.client.logout()
+        resp = self.client.post(reverse('gate_scan'), json.dumps({'token': self.token}), content_type='application/json')
+        self.assertEqual(resp.status_code, 302)
+
+
+class MyBookingsTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('bookworm', password='pw')
+        self.client.force_login(self.user)
+        self.movie = make_movie(title='Dune')
+        today = timezone.localdate()
+        self.past_show = make_show(self.movie, show_date=today - timedelta(days=2))
+        self.soon = make_show(self.movie, show_date=today + timedelta(days=1), show_time=time(18, 0))
+        self.later = make_show(self.movie, show_date=today + timedelta(days=5))
+        for i in range(5):
+            self.book(self.past_show, f'P{i}')
+        self.book(self.later, 'U1')
+        self.book(self.soon, 'U2')
+        self.book(None, 'GONE')   # show deleted: counts as past
+
+    def book(self, show, ticket):
+        return Booking.objects.create(user=self.user, movie=self.movie, show=show, seats='A1', ticket_number=ticket)
+
+    def get(self, **params):
+        return self.client.get(reverse('my_bookings'), dict(params, format='json')).json()
+
+    def test_upcoming_and_past_tabs_page_by_keyset(self):
+        data = self.get()
+        self.assertEqual([b['ticket_number'] for b in data['bookings']], ['U2', 'U1'])
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual({k: data['summary'][k] for k in ('total', 'upcoming', 'past')},
+                         {'total': 8, 'upcoming': 2, 'past': 6})
+        self.assertEqual(data['summary']['next_show']['ticket_number'], 'U2')
+
+        seen, cursor = [], None
+        with mock.patch('movies.views.MY_BOOKINGS_PAGE_SIZE', 4):
+            while True:
+                data = self.get(tab='past', **({'cursor': cursor} if cursor else {}))
+                seen += [b['ticket_number'] for b in data['bookings']]
+                cursor = data['next_cursor']
+                if not cursor:
+                    break
+        self.assertEqual(seen, ['GONE', 'P4', 'P3', 'P2', 'P1', 'P0'])
+
+    def test_summary_is_cached_until_a_booking_changes(self):
+        self.get()
+        with self.assertNumQueries(3):   # session, user, page; the summary is cached
+            self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.soon, 'U3')
+        self.assertEqual(self.get()['summary']['upcoming'], 3)
+
+    def test_page_renders_each_booking_once(self):
+        resp = self.client.get(reverse('my_bookings'), {'tab': 'past'})
+        self.assertContains(resp, 'Past (6)')
+        self.assertContains(resp, 'class="booking-card"', count=6)
+
+
+class NavbarProfileTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('navbar', password='pw')
+
+    def test_navbar_profile_is_cached_until_the_profile_changes(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('theaters'))
+        with self.assertNumQueries(2):   # session, user
+            resp = self.client.get(reverse('theaters'))
+        self.assertContains(resp, 'profile_pics/default.jpg')
+        profile = self.user.profile
+        profile.profile_pic = 'profile_pics/new.jpg'
+        with mock.patch.object(thumbnails, 'schedule'), self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertContains(self.client.get(reverse('theaters')), 'profile_pics/new.jpg')
+
+    def test_login_does_not_rewrite_the_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.login(username='navbar', password='pw')
+        self.assertFalse([q for q in queries.captured_queries if 'movies_profile' in q['sql']])
+        # a profile edited through the user is still saved with it
+        self.user.profile.mobile_no = '555'
+        self.user.save()
+        self.assertEqual(Profile.objects.get(user=self.user).mobile_no, '555')
+
+
+    def test_saving_a_user_without_a_profile(self):
+        Profile.objects.filter(user=self.user).delete()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(hasattr(user, 'profile'))
+        user.first_name = 'Nav'
+        user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).first_name, 'Nav')
+
+class ProfileThumbnailTests(CacheClearingTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=tmp.name, THUMBNAIL_WORKERS=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media = Path(tmp.name)
+        self.user = User.objects.create_user('avatar', password='pw')
+        self.client.force_login(self.user)
+
+    def upload(self, data, name='me.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('profile'), {
+                'username': 'avatar', 'email': 'avatar@example.com',
+                'profile_pic': SimpleUploadedFile(name, data, content_type='image/jpeg'),
+            })
+
+    def photo(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'SecretCam'   # Make
+        out = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(out, 'JPEG', exif=exif)
+        return out.getvalue()
+
+    def test_upload_is_stripped_and_thumbnailed(self):
+        self.upload(self.photo())
+        profile = Profile.objects.get(user=self.user)
+        digest = profile.avatar_hash
+        self.assertEqual(len(digest), 16)
+        self.assertEqual(profile.profile_pic.name, f'profile_pics/{digest}.jpg')
+        self.assertEqual(sorted(p.name for p in (self.media / 'profile_pics').iterdir() if p.is_file()),
+                         [f'{digest}.jpg'])   # the raw upload is gone
+        with Image.open(self.media / profile.profile_pic.name) as clean:
+            self.assertNotIn(0x010F, clean.getexif())
+        with Image.open(self.media / thumbnails.thumb_name(digest, 64, 'webp')) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (64, 64)))
+
+        page = self.client.get(reverse('theaters'))
+        self.assertContains(page, f'{digest}-64.webp')
+        resp = self.client.get(f'/media/profile_pics/thumbs/{digest}-64.webp')
+        self.assertEqual(resp['Content-Type'], 'image/webp')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertEqual(self.client.get('/media/profile_pics/thumbs/../default.jpg').status_code, 404)
+
+    def test_unreadable_upload_falls_back_to_default(self):
+        profile = self.user.profile
+        (self.media / 'profile_pics').mkdir()
+        (self.media / 'profile_pics' / 'broken.jpg').write_bytes(b'not an image')
+        profile.profile_pic = 'profile_pics/broken.jpg'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_pic.name, thumbnails.DEFAULT_PIC)
+        self.assertFalse((self.media / 'profile_pics' / 'broken.jpg').exists())
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN guards for the hot queries. Each must be answered from an index,
+    with no full scan of its table and no sort step, on SQLite and PostgreSQL.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user('planner', password='pw')
+        self.movie = make_movie()
+        self.show = make_show(self.movie)
+
+    def hot_queries(self):
+        return {
+            'active shows of a movie': (
+                Show.objects.filter(movie=self.movie, is_active=True).order_by('show_date', 'show_time'),
+                'movies_show',
+            ),
+            'bookings of a user': (
+                Booking.objects.filter(user=self.user).order_by('-booking_time'), 'movies_booking',
+            ),
+            'bookings of a show': (Booking.objects.filter(show=self.show), 'movies_booking'),
+            'shows of a hall by day': (
+                Show.objects.filter(hall='Hall 1', show_date__gte=date(2030, 1, 1)).order_by('hall', 'show_date', 'show_time'),
+                'movies_show',
+            ),
+        }
+
+    def explain(self, qs):
+        if connection.vendor == 'postgresql':
+            # on tiny test tables the planner would rightly prefer a seq scan
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                return qs.explain()
+        return qs.explain()
+
+    def assertIndexed(self, plan, table):
+        if connection.vendor == 'sqlite':
+            self.assertNotRegex(plan, rf'SCAN {table}(?! USING (COVERING )?INDEX)')
+            self.assertIn('INDEX', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn(f'Seq Scan on {table}', plan)
+            self.assertIn('Index', plan)
+            self.assertNotRegex(plan, r'\bSort\b')
+        else:
+            self.skipTest(f'no plan checks for {connection.vendor}')
+
+    def test_hot_queries_use_indexes(self):
+        for label, (qs, table) in self.hot_queries().items():
+            with self.subTest(label):
+                self.assertIndexed(self.explain(qs), table)
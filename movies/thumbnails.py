@@ -0,0 +1,175 @@
+# movies/thumbnails.py
+"""
+Profile picture processing.
+
+When a Profile is saved with a new upload, ``process`` runs on a small
+thread pool (``settings.THUMBNAIL_WORKERS``; 0 runs it inline), after
+commit. It:
+
+* decodes the upload with Pillow and applies the EXIF orientation;
+* re-encodes the original as a JPEG of at most ORIGINAL_MAX_SIDE pixels,
+  without EXIF, GPS or other metadata. The raw upload is then deleted;
+* writes square thumbnails for every size in SIZES, as WebP and as JPEG.
+
+Every file is named after a hash of the upload's bytes
+(``<hash>-<size>.webp``). A name therefore never changes content, and
+the ``profile_thumbnail`` view can send it with a one-year ``immutable``
+Cache-Control.
+
+The Profile is updated with a conditional UPDATE, so a newer upload that
+landed meanwhile is not overwritten. A file Pillow cannot read puts the
+profile back on the default picture. Until the thumbnails exist, the
+navbar shows the original (movies/profiles.py).
+"""
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = 'profile_pics'
+THUMB_DIR = 'profile_pics/thumbs'
+DEFAULT_PIC = Profile._meta.get_field('profile_pic').default
+# navbar avatar (32px CSS, 2x for high-DPI) and the profile page
+SIZES = {'nav': 64, 'large': 256}
+ORIGINAL_MAX_SIDE = 1024
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}), 'jpg': ('JPEG', {'quality': 85, 'optimize': True})}
+IMMUTABLE_SECONDS = 365 * 24 * 3600
+THUMB_NAME = re.compile(r'^[0-9a-f]{16}-\d+\.(webp|jpg)$')
+
+_executor = None
+_pending = set()    # (profile id, upload name) queued or running
+_lock = threading.Lock()
+
+
+def thumb_name(digest, size, ext):
+    return f'{THUMB_DIR}/{digest}-{size}.{ext}'
+
+
+def urls(profile):
+    """
+    Picture URLs for templates: ``{'<size>': jpeg url, '<size>_webp': webp url
+    or ''}`` per SIZES entry. Falls back to the original, then the default.
+    """
+    name = profile.profile_pic.name if profile.profile_pic else DEFAULT_PIC
+    # a new upload not processed yet must not show the previous picture's thumbnails
+    ready = bool(profile.avatar_hash) and name == f'{UPLOAD_DIR}/{profile.avatar_hash}.jpg'
+    result = {}
+    for label, size in SIZES.items():
+        if ready:
+            result[label] = default_storage.url(thumb_name(profile.avatar_hash, size, 'jpg'))
+            result[f'{label}_webp'] = default_storage.url(thumb_name(profile.avatar_hash, size, 'webp'))
+        else:
+            result[label] = default_storage.url(name)
+            result[f'{label}_webp'] = ''
+    return result
+
+
+def _encode(image, ext):
+    fmt, options = FORMATS[ext]
+    out = BytesIO()
+    # a fresh save carries no EXIF/ICC/XMP unless passed explicitly
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def _save(name, data):
+    # same name, same content: another profile may already have written it
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(data))
+
+
+def process(profile_id, source):
+    """Strip, re-encode and thumbnail upload ``source``, unless the profile has moved on from it."""
+    profile = Profile.objects.filter(pk=profile_id).only('user_id', 'profile_pic').first()
+    if profile is None or profile.profile_pic.name != source or source == DEFAULT_PIC:
+        return
+    try:
+        with default_storage.open(source, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()[:16]
+        with Image.open(BytesIO(raw)) as upload:
+            image = ImageOps.exif_transpose(upload).convert('RGB')
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning("Profile %s: unreadable picture %s, using the default", profile_id, source)
+        if Profile.objects.filter(pk=profile_id, profile_pic=source).update(profile_pic=DEFAULT_PIC, avatar_hash=''):
+            default_storage.delete(source)
+            _changed(profile.user_id)
+        return
+
+    original = image.copy()
+    original.thumbnail((ORIGINAL_MAX_SIDE, ORIGINAL_MAX_SIDE))
+    clean = _save(f'{UPLOAD_DIR}/{digest}.jpg', _encode(original, 'jpg'))
+    for size in SIZES.values():
+        thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for ext in FORMATS:
+            _save(thumb_name(digest, size, ext), _encode(thumb, ext))
+
+    # only if the picture has not been replaced meanwhile
+    if Profile.objects.filter(pk=profile_id, profile_pic=source).update(profile_pic=clean, avatar_hash=digest):
+        if source != clean:
+            default_storage.delete(source)
+        _changed(profile.user_id)
+
+
+def _changed(user_id):
+    # update() skips signals
+    from .profiles import invalidate
+    invalidate(user_id)
+
+
+def _run(profile_id, source):
+    close_old_connections()
+    try:
+        process(profile_id, source)
+    except Exception:
+        logger.exception("Profile %s: thumbnail processing failed", profile_id)
+    finally:
+        with _lock:
+            _pending.discard((profile_id, source))
+        close_old_connections()
+
+
+def schedule(profile_id, source):
+    """
+    Process ``source`` on the worker pool, or inline when THUMBNAIL_WORKERS
+    is 0. A job already queued for the same upload is not queued again.
+    """
+    global _executor
+    workers = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+    if not workers:
+        process(profile_id, source)
+        return
+    with _lock:
+        if (profile_id, source) in _pending:
+            return
+        _pending.add((profile_id, source))
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+    _executor.submit(_run, profile_id, source)
+
+
+@receiver(post_save, sender=Profile)
+def process_new_upload(sender, instance, update_fields=None, **kwargs):
+    name = instance.profile_pic.name if instance.profile_pic else ''
+    if not name or name == DEFAULT_PIC or (update_fields and 'profile_pic' not in update_fields):
+        return
+    # a processed picture is saved under its hash; anything else is a fresh upload
+    if instance.avatar_hash and name == f'{UPLOAD_DIR}/{instance.avatar_hash}.jpg':
+        return
+    transaction.on_commit(lambda: schedule(instance.pk, name))
+
@@ -0,0 +1,142 @@
+# movies/tickets.py
+"""
+Printable PDF tickets with a QR code of the signed gate token
+(movies/gate.py).
+
+A PDF depends only on the booking fields printed on it (``ticket_fields``).
+It is stored on disk under the SHA-256 of those fields, in
+``settings.TICKET_PDF_DIR``. The hash doubles as the download's ETag:
+
+* A repeat download streams the stored file (``FileResponse`` hands it to
+  the server's sendfile).
+* A revalidation is a 304.
+* When a printed field changes (show moved, seats changed), the hash
+  changes and the next download renders a fresh file. Stale files are
+  removed by ``prerender_tickets --prune DAYS``.
+
+``manage.py prerender_tickets`` renders tickets for upcoming shows ahead
+of time, so a rush of downloads at show start costs only the booking
+lookup.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A6, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from . import gate
+
+# bump when the layout changes, so every cached PDF is rendered again
+RENDER_VERSION = 2
+PAGE_SIZE = landscape(A6)
+
+
+def cache_dir():
+    return Path(getattr(settings, 'TICKET_PDF_DIR', None) or Path(settings.BASE_DIR) / 'ticket_cache')
+
+
+def ticket_fields(booking):
+    """The strings printed on ``booking``'s ticket."""
+    show = booking.show
+    return {
+        'ticket_number': booking.ticket_number,
+        'title': booking.movie.title if booking.movie else 'Unknown movie',
+        'show': f"{show.show_date:%B %d, %Y} {show.show_time:%I:%M %p}" if show else 'N/A',
+        'hall': (show.hall if show else '') or '',
+        'seats': booking.seats,
+        'price': f"{booking.total_price:.2f}",
+        'booked': f"{booking.booking_time:%b %d, %Y}" if booking.booking_time else '',
+        'token': gate.token_for(booking),
+    }
+
+
+def fingerprint(fields):
+    payload = json.dumps([RENDER_VERSION, fields], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def path_for(digest):
+    # two-level fan-out keeps directories small
+    return cache_dir() / digest[:2] / f'{digest}.pdf'
+
+
+def _draw_qr(pdf, text, x, y, size):
+    qr = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(text)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    cell = size / len(matrix)
+    pdf.setFillColor(colors.black)
+    for row, cells in enumerate(matrix):
+        for col, dark in enumerate(cells):
+            if dark:
+                pdf.rect(x + col * cell, y + size - (row + 1) * cell, cell, cell, stroke=0, fill=1)
+
+
+def render_pdf(fields):
+    """The ticket PDF for ``fields``, as bytes."""
+    out = BytesIO()
+    width, height = PAGE_SIZE
+    pdf = canvas.Canvas(out, pagesize=PAGE_SIZE, invariant=1)
+    pdf.setTitle(f"Ticket {fields['ticket_number']}")
+
+    pdf.setFillColor(colors.HexColor('#e50914'))
+    pdf.rect(0, height - 14 * mm, width, 14 * mm, stroke=0, fill=1)
+    pdf.setFillColor(colors.white)
+    pdf.setFont('Helvetica-Bold', 13)
+    pdf.drawString(8 * mm, height - 9 * mm, 'Movie Ticket')
+    pdf.setFont('Helvetica', 8)
+    pdf.drawRightString(width - 8 * mm, height - 9 * mm, f"Booked {fields['booked']}")
+
+    pdf.setFillColor(colors.black)
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(8 * mm, height - 24 * mm, fields['title'][:40])
+    lines = [
+        ('Show', fields['show']),
+        ('Hall', fields['hall'] or '-'),
+        ('Seats', fields['seats']),
+        ('Total', fields['price']),
+        ('Ticket #', fields['ticket_number']),
+    ]
+    y = height - 33 * mm
+    for label, value in lines:
+        pdf.setFont('Helvetica-Bold', 9)
+        pdf.drawString(8 * mm, y, label)
+        pdf.setFont('Helvetica', 9)
+        pdf.drawString(26 * mm, y, value[:48])
+        y -= 6 * mm
+
+    qr_size = 38 * mm
+    _draw_qr(pdf, fields['token'], width - qr_size - 8 * mm, 12 * mm, qr_size)
+    pdf.setFont('Helvetica', 7)
+    pdf.drawString(8 * mm, 6 * mm, 'Show this ticket at the cinema entrance. Terms apply.')
+    pdf.showPage()
+    pdf.save()
+    return out.getvalue()
+
+
+def get_pdf(booking):
+    """``(path, digest)`` of ``booking``'s ticket PDF, rendered if not on disk yet."""
+    fields = ticket_fields(booking)
+    digest = fingerprint(fields)
+    path = path_for(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so a concurrent download never sees half a file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(render_pdf(fields))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return path, digest
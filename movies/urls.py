@@ -22,16 +22,28 @@ urlpatterns = [
     path('checkout/', views.checkout_view, name='checkout'),
     
     # Admin Paths
-    # path('admin-dashboard/', views.admin_dashboard_view, name='admin_dashboard'),
+    path('admin-dashboard/', views.admin_dashboard_view, name='admin_dashboard'),
+    path('staff/page-cache/', views.page_cache_stats, name='page_cache_stats'),
+    path('staff/chat-health/', views.chat_health, name='chat_health'),
     path('register-staff/', views.register_staff_view, name='register_staff'),
     path('add-show/', views.add_shows_view, name='add_shows'),
     path('staff/list-shows/', views.list_shows_view, name='list_shows'),
+    path('staff/schedule/', views.bulk_schedule_view, name='bulk_schedule'),
+    path('staff/gate/scan/', views.gate_scan, name='gate_scan'),
+    path('staff/gate/scan/batch/', views.gate_scan_batch, name='gate_scan_batch'),
     
     path('api/chat/', views.chat_api, name='api_chat'),
+    path('api/movies/suggest/', views.movie_suggestions, name='movie_suggestions'),
     path('ticket/', views.ticket_view, name='ticket'),
+    path('ticket/<str:ticket_number>.pdf', views.ticket_pdf_view, name='ticket_pdf'),
 
     path('my-bookings/', views.my_bookings_view, name='my_bookings'),
     path('api/show/<int:show_id>/booked_seats/', views.show_booked_seats, name='show_booked_seats'),
+    path('api/shows/availability/', views.shows_availability, name='shows_availability'),
+    path('api/show/<int:show_id>/seat_events/', views.show_seat_events, name='show_seat_events'),
+    path('api/show/<int:show_id>/hold/', views.hold_seats, name='hold_seats'),
+    path('api/show/<int:show_id>/hold/extend/', views.extend_seat_holds, name='extend_seat_holds'),
+    path('api/show/<int:show_id>/hold/release/', views.release_seat_holds, name='release_seat_holds'),
 
     path('theaters/', views.theaters_list_view, name='theaters'), 
 
@@ -1,15 +1,16 @@
 # movies/views.py
 import os
+import base64
 import logging
 import json
 import uuid
-from datetime import date, timedelta
+from asgiref.sync import sync_to_async
+from datetime import date, datetime, timedelta
+from itertools import groupby
 import traceback
 from django.db import IntegrityError
 import traceback
-import requests
 
-from requests.exceptions import RequestException
 from django.db.models import Q
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
@@ -17,104 +18,82 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.conf import settings
 from django.views.decorators.http import require_POST, require_GET
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.db.models import Count, Sum
 from django.db import transaction
 
-from .models import Movie, Profile, Show, Booking
+from .models import Movie, Profile, Show, Booking, SeatReservation
+from . import assistant, availability, bookings, chat, gate, holds, sales, scheduling, seatevents, thumbnails, tickets
+from . import dashboard as dashboard_data
+from . import pagecache
+from .pagecache import cache_anonymous_page
+from .seatmap import get_layout, parse_seat_ids
+from .catalog import catalog_queryset, keyset_page, movie_card
+from .search import search_page
+from .suggest import suggest
 from .forms import (
     CustomUserCreationForm,
     CustomAuthenticationForm,
     UserUpdateForm,
-    ProfileUpdateForm
+    ProfileUpdateForm,
+    BulkScheduleForm,
 )
 
 logger = logging.getLogger(__name__)
 
-def _get_api_key():
-    key = os.environ.get("GROQ_API_KEY") or os.environ.get("OPENAI_API_KEY")
-    if not key:
-        # fallback to settings if present
-        key = getattr(settings, "GROQ_API_KEY", None) or getattr(settings, "OPENAI_API_KEY", None)
-    if not key:
-        return None
-    return str(key).strip()
-
-def _get_groq_base():
-    
-    raw = os.environ.get("GROQ_API_URL") or getattr(settings, "GROQ_API_URL", "") or ""
-    raw = raw.strip()
-    if not raw:
-        return "https://api.groq.com"
-    return raw.rstrip('/')
-
-def _call_groq_chat(messages, model="gpt-4o-mini", max_tokens=600, timeout=15):
-    
-    key = _get_api_key()
-    if not key:
-        return {'error': 'Chat service not configured (missing API key).'}
-
-    base = _get_groq_base()
-    # if user already set a full openai path (contains /openai/), use it
-    if "/openai/" in base.lower():
-        endpoint = base
-    else:
-        endpoint = base + "/openai/v1/chat/completions"
+SYSTEM_PROMPT = "You are TicketAdda assistant. Help users with showtimes, bookings and site help."
 
-    payload = {"model": model, "messages": messages, "max_tokens": max_tokens}
-    headers = {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
 
-    try:
-        resp = requests.post(endpoint, json=payload, headers=headers, timeout=timeout)
-    except RequestException:
-        logger.exception("Network error calling Groq/OpenAI-compatible endpoint")
-        return {'error': 'Upstream connection error.'}
+def _chat_unavailable():
+    response = JsonResponse({'error': chat.UNAVAILABLE}, status=503)
+    response['Retry-After'] = str(chat.upstream.retry_after())
+    return response
 
-    status = resp.status_code
-    text_snippet = (resp.text or "")[:1000]
-    logger.debug("Chat provider response: status=%s, snippet=%s", status, text_snippet)
 
-    # Successful response
-    if status == 200:
-        try:
-            data = resp.json()
-        except Exception:
-            return {'error': 'Invalid JSON from chat provider.'}
-        # Try OpenAI shape first
-        try:
-            choices = data.get('choices') or []
-            if choices:
-                message = choices[0].get('message') or {}
-                content = message.get('content') or message.get('text') or None
-                if content:
-                    return {'reply': content}
-            if isinstance(data.get('result'), str):
-                return {'reply': data.get('result')}
-            return {'reply': json.dumps(data)}
-        except Exception:
-            return {'reply': json.dumps(data)}
+@staff_member_required
+def chat_health(request):
+    """State, sliding-window stats and transition counts of the chat circuit breaker."""
+    return JsonResponse({'breaker': chat.upstream.stats(), 'reply_cache_size': len(chat.reply_cache)})
 
-    try:
-        data = resp.json()
-        err_msg = data.get('error', {}).get('message') or data.get('message') or str(data)
-    except Exception:
-        err_msg = resp.text or f"HTTP {status}"
-    logger.warning("Chat provider returned %s: %s", status, err_msg)
 
-    if status in (401, 403):
-        return {'error': 'API key unauthorized.'}
-    if status in (429, 402):
-        return {'error': 'Quota exceeded or rate limited by provider.'}
-    return {'error': f'Chat provider error: {err_msg}'}
+async def _chat_event_stream(user_id, messages, model):
+    events = chat.stream(messages, model=model, max_tokens=600)
+    try:
+        async for kind, value in events:
+            if kind == 'delta':
+                yield f"event: delta\ndata: {json.dumps({'text': value})}\n\n"
+            elif kind == 'done':
+                yield f"event: done\ndata: {json.dumps(value)}\n\n"
+            else:
+                yield f"event: error\ndata: {json.dumps({'error': value})}\n\n"
+    finally:
+        # runs on disconnect too: stop reading upstream, free the user's slot
+        await events.aclose()
+        await chat.release_slot(user_id)
 
 
 @require_POST
 @login_required
-def chat_api(request):
-    
+async def chat_api(request):
+    """
+    Chat assistant (async under ASGI). Showtime, seat, price and booking
+    questions are answered from the database (movies/assistant.py).
+    Anything else goes to the provider through the pooled client in
+    movies/chat.py, or comes from its reply cache. Either way the provider
+    sees a short summary of upcoming shows.
+
+    With `"stream": true` in the body the reply is relayed token by token
+    as server-sent events (`delta`, then `done` or `error`). Under WSGI,
+    where a stream would hold a worker, the JSON reply is returned instead.
+    """
     try:
         payload = json.loads(request.body.decode('utf-8'))
         user_message = payload.get('message', '').strip()
@@ -124,18 +103,44 @@ def chat_api(request):
     if not user_message:
         return JsonResponse({'error': 'Empty message'}, status=400)
 
+    user = await request.auser()
+    grounded = await sync_to_async(assistant.answer)(user_message, user)
+    if grounded:
+        return JsonResponse({'reply': grounded['reply'], 'cached': False, 'grounded': True})
+
     # Build messages in OpenAI chat format
+    context = await sync_to_async(assistant.context_for)()
     messages = [
-        {"role": "system", "content": "You are TicketAdda assistant. Help users with showtimes, bookings and site help."},
+        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\nCurrent TicketAdda data:\n{context}"},
         {"role": "user", "content": user_message},
     ]
+    model_name = payload.get('model') or os.environ.get('GROQ_MODEL') or chat.DEFAULT_MODEL
 
-    # Try calling the chat provider
-    model_name = payload.get('model') or os.environ.get('GROQ_MODEL') or "gpt-4o-mini"
-    result = _call_groq_chat(messages=messages, model=model_name, max_tokens=600)
+    # provider known to be down: fail fast unless the answer is already cached
+    if chat.upstream.rejecting() and chat.reply_cache.get(chat.cache_key(model_name, messages)) is None:
+        return _chat_unavailable()
+
+    limited = await chat.acquire_slot(user.pk)
+    if limited:
+        return JsonResponse({'error': limited}, status=429)
+
+    if payload.get('stream') and hasattr(request, 'scope'):
+        response = StreamingHttpResponse(
+            _chat_event_stream(user.pk, messages, model_name), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    try:
+        result = await chat.complete(messages=messages, model=model_name, max_tokens=600)
+    finally:
+        await chat.release_slot(user.pk)
 
     if 'reply' in result:
-        return JsonResponse({'reply': result['reply']})
+        return JsonResponse({'reply': result['reply'], 'cached': result['cached']})
+    if result.get('unavailable'):
+        return _chat_unavailable()
     # Error: map to suitable status codes
     err = result.get('error') or 'Unknown error from chat provider.'
     lerr = err.lower()
@@ -143,42 +148,82 @@ def chat_api(request):
         status = 401
     elif 'quota' in lerr or 'rate' in lerr or 'limited' in lerr:
         status = 429
-    elif 'connection' in lerr:
-        status = 502
     else:
         status = 502
     logger.info("chat_api: returning error to frontend: %s", err)
     return JsonResponse({'error': err}, status=status)
 
 # ---------------- site views (unchanged behavior) ----------------
+# catalog page sizes (home shows a short first page, "Show More" loads the rest)
+HOME_PAGE_SIZE = 8
+CATALOG_PAGE_SIZE = 24
+SEARCH_RESULTS_LIMIT = 48
+
+
+@cache_anonymous_page
 def home_view(request):
-    all_movies = Movie.objects.all().order_by('-release_date')
-    return render(request, 'index.html', {'all_movies': all_movies})
+    all_movies, next_cursor = keyset_page(catalog_queryset(), limit=HOME_PAGE_SIZE)
+    return render(request, 'index.html', {'all_movies': all_movies, 'next_cursor': next_cursor})
 
 
+@cache_anonymous_page
 def movies_list_view(request):
     """
-    Movies listing view with optional search.
-    Accepts `?search=...` and filters movies by title, genre or synopsis (case-insensitive).
-    Returns 'all_movies' (QuerySet) and 'search_query' (string) to the template.
+    Movies listing view with optional search and filters.
+    Accepts `?search=...` (ranked full-text search over title, genre and
+    synopsis, see movies/search.py), `?genre=...` and `?featured=1`.
+    Listings are paginated by `?cursor=...` in catalog order; search shows
+    the best SEARCH_RESULTS_LIMIT matches and says so when there are more
+    (`truncated`). `?format=json` returns the page as JSON for infinite
+    scroll.
     """
     query = (request.GET.get('search') or '').strip()
-    movies = Movie.objects.all().order_by('-release_date')
+    genre = (request.GET.get('genre') or '').strip()
+    featured = True if request.GET.get('featured') in ('1', 'true') else None
+    movies = catalog_queryset(genre=genre or None, featured=featured)
 
+    truncated = False
     if query:
-        # search in title, genre and synopsis
-        movies = movies.filter(
-            Q(title__icontains=query) |
-            Q(genre__icontains=query) |
-            Q(synopsis__icontains=query)
-        ).distinct()
+        page, truncated = search_page(query, movies if (genre or featured) else None, limit=SEARCH_RESULTS_LIMIT)
+        next_cursor = None
+    else:
+        page, next_cursor = keyset_page(movies, request.GET.get('cursor'), limit=CATALOG_PAGE_SIZE)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'movies': [movie_card(m) for m in page], 'next_cursor': next_cursor,
+                             'truncated': truncated})
 
     return render(request, 'movies.html', {
-        'all_movies': movies,
+        'all_movies': page,
+        'next_cursor': next_cursor,
         'search_query': query,
+        'search_truncated': truncated,
+        'search_limit': SEARCH_RESULTS_LIMIT,
+        'genre': genre,
+        'featured': bool(featured),
+        # distinct genres come straight off the genre index
+        'genres': Movie.objects.order_by('genre').values_list('genre', flat=True).distinct(),
     })
 
 
+SUGGEST_LIMIT_MAX = 20
+
+
+@require_GET
+def movie_suggestions(request):
+    """
+    Typeahead for the search box: `?q=guard gal&limit=8`. Served from the
+    in-process index in movies/suggest.py, best rated first.
+    """
+    query = (request.GET.get('q') or '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), SUGGEST_LIMIT_MAX))
+    except ValueError:
+        limit = 8
+    return JsonResponse({'query': query, 'results': suggest(query, limit) if query else []})
+
+
+@cache_anonymous_page
 def movie_detail_view(request, movie_id):
     movie = get_object_or_404(Movie, pk=movie_id)
     return render(request, 'movie_detail.html', {'movie': movie})
@@ -238,47 +283,57 @@ def profile_view(request):
     else:
         u_form = UserUpdateForm(instance=request.user)
         p_form = ProfileUpdateForm(instance=request.user.profile)
-    return render(request, 'profile.html', {'u_form': u_form, 'p_form': p_form})
+    return render(request, 'profile.html', {
+        'u_form': u_form,
+        'p_form': p_form,
+        'pictures': thumbnails.urls(request.user.profile),
+    })
+
+@require_GET
+def profile_thumbnail(request, name):
+    """A profile picture thumbnail (movies/thumbnails.py); content-hashed names are cached forever."""
+    path = f'{thumbnails.THUMB_DIR}/{name}'
+    if not thumbnails.THUMB_NAME.match(name) or not default_storage.exists(path):
+        raise Http404
+    response = FileResponse(
+        default_storage.open(path, 'rb'),
+        content_type='image/webp' if name.endswith('.webp') else 'image/jpeg',
+    )
+    patch_cache_control(response, public=True, max_age=thumbnails.IMMUTABLE_SECONDS, immutable=True)
+    return response
 
 @login_required
+@ensure_csrf_cookie
 def seat_selection_view(request, movie_id):
     """
     Render seat-selection and include initial_booked_seats (list) in context.
-    Defaults to first upcoming show when show_id not provided so the template
-    can render booked seats for the initially-active time slot.
+    The slot for ?show_id= starts active when it is one of the listed shows,
+    otherwise the first upcoming one; booked seats are those of that slot,
+    which checkout, holds and live updates use too.
     """
     movie = get_object_or_404(Movie, pk=movie_id)
-    upcoming_shows = Show.objects.filter(movie=movie, is_active=True).order_by('show_date', 'show_time')
+    upcoming_shows = list(scheduling.upcoming(
+        Show.objects.filter(movie=movie), days=getattr(settings, 'SEAT_PAGE_DAYS', 14),
+    ))
+    show_days = [(day, list(shows)) for day, shows in groupby(upcoming_shows, key=lambda s: s.show_date)]
 
-    # Determine which show to show booked seats for: show_id from GET or first upcoming
-    show_id = request.GET.get('show_id')
-    if not show_id and upcoming_shows.exists():
-        show_id = str(upcoming_shows.first().id)
+    # the active slot: show_id from GET if it is listed here, else the first upcoming
+    show_id = request.GET.get('show_id', '')
+    active_show = next((s for s in upcoming_shows if str(s.id) == show_id.strip()), None)
+    if active_show is None and upcoming_shows:
+        active_show = upcoming_shows[0]
 
     initial_booked = []
-    if show_id:
-        try:
-            s = Show.objects.filter(pk=int(show_id)).first()
-        except Exception:
-            s = None
-        if s:
-            # prefer a booked_seats text field if the model has it
-            if hasattr(s, 'booked_seats') and (s.booked_seats or '').strip():
-                initial_booked = [x.strip() for x in (s.booked_seats or '').split(',') if x.strip()]
-            else:
-                # fallback: collect from Booking rows
-                rows = Booking.objects.filter(show=s).values_list('seats', flat=True)
-                all_seats = []
-                for r in rows:
-                    if not r:
-                        continue
-                    parts = [p.strip() for p in r.split(',') if p.strip()]
-                    all_seats.extend(parts)
-                initial_booked = sorted(set(all_seats))
+    if active_show:
+        state = availability.get_seat_state(active_show.id)
+        if state:
+            initial_booked = availability.unavailable_seats(state, request.user)
 
     return render(request, 'seat_selection.html', {
         'movie': movie,
         'upcoming_shows': upcoming_shows,
+        'show_days': show_days,
+        'active_show_id': active_show.id if active_show else None,
         'initial_booked_seats': initial_booked,
     })
 
@@ -286,23 +341,192 @@ def seat_selection_view(request, movie_id):
 @require_GET
 @login_required
 def show_booked_seats(request, show_id):
+    """
+    Seats the current user cannot pick. Answers conditional requests with
+    304 when the show's seat version has not moved.
+    """
+    state = availability.get_seat_state(show_id)
+    if state is None:
+        return JsonResponse({'booked': []})
+
+    # the list excludes the caller's own holds, so the tag is per user
+    etag = f'"{show_id}.{state["version"]}.{request.user.pk}"'
+    last_modified = state['updated_at'].timestamp() if state['updated_at'] else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse({
+            'booked': availability.unavailable_seats(state, request.user),
+            'version': state['version'],
+        })
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# upper bound on shows returned by one availability request
+AVAILABILITY_MAX_SHOWS = 200
+
+
+@require_GET
+@login_required
+def shows_availability(request):
+    """
+    Seat counts for many shows in one round trip.
+
+    ``?ids=1,2,3`` or ``?movie=<id>&from=YYYY-MM-DD&to=YYYY-MM-DD`` (only
+    active shows). ``&bitmap=1`` adds each show's seat bitmap, base64 encoded,
+    bit ``i`` being seat ``i`` of the hall layout.
+    """
+    shows = Show.objects.all()
+    ids = request.GET.get('ids')
+    movie_id = request.GET.get('movie')
+    try:
+        if ids:
+            shows = shows.filter(pk__in=[int(x) for x in ids.split(',') if x.strip()])
+        elif movie_id:
+            shows = shows.filter(movie_id=int(movie_id), is_active=True)
+            if request.GET.get('from'):
+                shows = shows.filter(show_date__gte=date.fromisoformat(request.GET['from']))
+            if request.GET.get('to'):
+                shows = shows.filter(show_date__lte=date.fromisoformat(request.GET['to']))
+        else:
+            return JsonResponse({'error': 'Pass ids or movie.'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid ids or dates.'}, status=400)
+
+    fields = ['id', 'hall', 'seats_booked', 'seat_version']
+    want_bitmap = request.GET.get('bitmap') in ('1', 'true')
+    if want_bitmap:
+        fields.append('seat_map')
+    rows = list(shows.order_by('show_date', 'show_time').values(*fields)[:AVAILABILITY_MAX_SHOWS])
+
+    # one grouped query for the holds of every requested show
+    held = dict(
+        holds.active_holds_for([r['id'] for r in rows])
+        .values_list('show_id').annotate(n=Count('id'))
+    ) if rows else {}
+
+    result = {}
+    for r in rows:
+        capacity = get_layout(r['hall']).capacity
+        booked = r['seats_booked']
+        entry = {
+            'capacity': capacity,
+            'booked': booked,
+            'held': held.get(r['id'], 0),
+            'free': max(0, capacity - booked - held.get(r['id'], 0)),
+            'version': r['seat_version'],
+        }
+        if want_bitmap:
+            entry['bitmap'] = base64.b64encode(bytes(r['seat_map'] or b'')).decode('ascii')
+        result[str(r['id'])] = entry
+    return JsonResponse({'shows': result})
+
+
+# seconds between keep-alive comments on an idle seat event stream
+SEAT_EVENTS_HEARTBEAT = 15
+
+
+async def _seat_event_stream(show_id, user_id):
+    sub = seatevents.get_broker().subscribe(show_id)
+    try:
+        # tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            event = await sub.get(timeout=SEAT_EVENTS_HEARTBEAT)
+            if event is None:
+                # comment line keeps proxies from closing an idle stream
+                yield ": ping\n\n"
+                continue
+            holder = event.get('holder')
+            if holder is not None and holder == user_id:
+                # the user's own holds stay selectable for them
+                continue
+            # the event dict is shared between subscribers, so copy before trimming
+            data = {k: v for k, v in event.items() if k != 'holder'}
+            yield f"event: seats\ndata: {json.dumps(data)}\n\n"
+    finally:
+        await sub.close()
+
+
+@require_GET
+@login_required
+async def show_seat_events(request, show_id):
+    """
+    Server-sent events with seat deltas for one show. Needs the ASGI entry
+    point; under WSGI it answers 204 so the browser falls back to polling.
+    """
+    if not hasattr(request, 'scope'):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    response = StreamingHttpResponse(_seat_event_stream(show_id, user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _seats_from_body(request):
+    """Seat ids from a JSON body ({"seats": [...] or "A1,A2"}); None if unreadable."""
     try:
-        show = Show.objects.filter(pk=int(show_id)).first()
+        payload = json.loads(request.body.decode('utf-8') or '{}')
     except Exception:
-        show = None
+        return None
+    seats = payload.get('seats')
+    if isinstance(seats, str):
+        return parse_seat_ids(seats)
+    if isinstance(seats, list):
+        return [str(x).strip() for x in seats if str(x).strip()]
+    return []
+
+
+@require_POST
+@login_required
+def hold_seats(request, show_id):
+    """Hold seats for the current user for settings.SEAT_HOLD_MINUTES."""
+    show = Show.objects.filter(pk=show_id).first()
     if not show:
-        return JsonResponse({'booked': []})
-    if hasattr(show, 'booked_seats') and (show.booked_seats or '').strip():
-        booked = [s.strip() for s in (show.booked_seats or '').split(',') if s.strip()]
-    else:
-        rows = Booking.objects.filter(show=show).values_list('seats', flat=True)
-        booked = []
-        for r in rows:
-            if not r:
-                continue
-            booked.extend([p.strip() for p in r.split(',') if p.strip()])
-        booked = sorted(set(booked))
-    return JsonResponse({'booked': booked})
+        return JsonResponse({'success': False, 'error': 'Show not found.'}, status=404)
+    seat_list = _seats_from_body(request)
+    if seat_list is None:
+        return HttpResponseBadRequest('Invalid JSON')
+    if not seat_list:
+        return JsonResponse({'success': False, 'error': 'No seats selected.'}, status=400)
+    if len(set(seat_list)) > holds.max_hold_seats():
+        return JsonResponse({'success': False, 'error': f'You can hold at most {holds.max_hold_seats()} seats.'}, status=400)
+    unknown = show.seat_layout.unknown(seat_list)
+    if unknown:
+        return JsonResponse({'success': False, 'error': f'Unknown seats for this show: {", ".join(unknown)}'}, status=400)
+
+    expires_at, conflicts = holds.place_holds(show, request.user, seat_list)
+    if conflicts:
+        msg = f'Some seats are no longer available: {", ".join(conflicts)}'
+        return JsonResponse({'success': False, 'error': msg, 'conflicts': conflicts}, status=409)
+    held = sorted(holds.user_holds(show, request.user).values_list('seat_id', flat=True))
+    return JsonResponse({'success': True, 'held': held, 'expires_at': expires_at.isoformat()})
+
+
+@require_POST
+@login_required
+def extend_seat_holds(request, show_id):
+    show = Show.objects.filter(pk=show_id).first()
+    expires_at = holds.extend_holds(show, request.user) if show else None
+    if not expires_at:
+        return JsonResponse({'success': False, 'error': 'No active hold for this show.'}, status=404)
+    return JsonResponse({'success': True, 'expires_at': expires_at.isoformat()})
+
+
+@require_POST
+@login_required
+def release_seat_holds(request, show_id):
+    """Release the user's holds on a show (all, or only the seats given)."""
+    show = Show.objects.filter(pk=show_id).first()
+    if not show:
+        return JsonResponse({'success': False, 'error': 'Show not found.'}, status=404)
+    seat_list = _seats_from_body(request)
+    released = holds.release_holds(show, request.user, seat_list or None)
+    return JsonResponse({'success': True, 'released': released})
 
 @login_required
 def checkout_view(request):
@@ -361,6 +585,9 @@ def checkout_view(request):
                 show = Show.objects.filter(pk=show_pk).first()
         except Exception:
             show = None
+        # a form without movie_id still books (and counts toward) the show's movie
+        if movie is None and show:
+            movie = show.movie
 
         if show and getattr(show,'price',None):
             price_per_ticket = float(show.price)
@@ -372,78 +599,86 @@ def checkout_view(request):
         total_price = price_per_ticket * max(1, len(seat_list))
         ticket_no = uuid.uuid4().hex[:12].upper()
 
-        # If we have a show, check & lock row inside transaction
+        # If we have a show, claim its seats through SeatReservation rows; the
+        # unique (show, seat_id) constraint rejects any seat claimed concurrently
         if show:
-            try:
-                with transaction.atomic():
-                    # try locking show row (if DB supports it)
-                    try:
-                        locked_show = Show.objects.select_for_update().get(pk=show.pk)
-                    except Exception:
-                        locked_show = Show.objects.filter(pk=show.pk).first()
-
-                    # build existing set (prefer booked_seats field)
-                    existing = set()
-                    if hasattr(locked_show, 'booked_seats') and (locked_show.booked_seats or '').strip():
-                        existing = set([x.strip() for x in (locked_show.booked_seats or '').split(',') if x.strip()])
-                    else:
-                        rows = Booking.objects.filter(show=locked_show).values_list('seats', flat=True)
-                        for r in rows:
-                            if not r:
-                                continue
-                            existing.update([p.strip() for p in r.split(',') if p.strip()])
-
-                    requested = set([s.strip() for s in seat_list if s.strip()])
-                    conflicts = existing.intersection(requested)
-
-                    if conflicts:
-                        conflict_list = sorted(conflicts)
-                        msg = f'Some seats already booked: {", ".join(conflict_list)}'
-                        logger.info("Booking conflict for user=%s show=%s requested=%s existing=%s",
-                                    request.user.username if request.user.is_authenticated else None,
-                                    locked_show.pk, list(requested), list(existing))
-                        # XHR -> return JSON with conflict list and 409
+            requested = sorted(set(seat_list))
+            unknown = show.seat_layout.unknown(requested)
+            if unknown:
+                msg = f'Unknown seats for this show: {", ".join(unknown)}'
+                if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                    return JsonResponse({'success': False, 'error': msg}, status=400)
+                messages.error(request, msg)
+                return redirect(request.META.get('HTTP_REFERER', '/'))
+
+            # cheap bitmap check first; the unique constraint below stays the real guard
+            conflict_list = show.seat_conflicts(requested)
+            if not conflict_list:
+                try:
+                    # expired holds on these seats must not block the insert below
+                    holds.expire_holds(show, requested)
+                    with transaction.atomic():
+                        booking = Booking.objects.create(
+                            user=request.user,
+                            movie=movie,
+                            show=show,
+                            seats=','.join(requested),
+                            total_price=total_price,
+                            ticket_number=ticket_no
+                        )
+                        # seats the user already holds are converted in place
+                        claimed = holds.claim_held_seats(show, request.user, requested, booking)
+                        # sorted insert order keeps concurrent checkouts from deadlocking
+                        SeatReservation.objects.bulk_create([
+                            SeatReservation(show=show, seat_id=seat_id, booking=booking, user=request.user)
+                            for seat_id in requested if seat_id not in claimed
+                        ])
+                        # last write of the transaction: keeps the counter row locks short
+                        sales.record_sale(booking, len(requested))
+                        # once committed, bring the read-side bitmap in step; a failure
+                        # there is only logged (the booking stands, rebuild_seat_map repairs)
+                        transaction.on_commit(lambda: Show.apply_seat_changes(show.pk, booked=requested), robust=True)
+                except IntegrityError:
+                    conflict_list = sorted(SeatReservation.objects.filter(
+                        show=show, seat_id__in=requested
+                    ).exclude(user=request.user, booking__isnull=True).values_list('seat_id', flat=True))
+                    if not conflict_list:
+                        logger.exception("Integrity error creating booking (show=%s user=%s seats=%s)", show.pk, request.user, seat_list)
                         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-                            return JsonResponse({'success': False, 'error': msg, 'conflicts': conflict_list}, status=409)
-                        # Non-XHR -> flash message and redirect back
-                        messages.error(request, msg)
+                            return JsonResponse({'success': False, 'error': 'Booking failed due to server error.'}, status=500)
+                        messages.error(request, "Booking failed due to server error.")
                         return redirect(request.META.get('HTTP_REFERER', '/'))
-
-                    # No conflicts: update show and create booking atomically
-                    combined = sorted(existing.union(requested))
-                    if hasattr(locked_show, 'booked_seats'):
-                        locked_show.booked_seats = ','.join(combined)
-                        update_fields = ['booked_seats', 'seats_booked']
-                    else:
-                        update_fields = ['seats_booked']
-                    locked_show.seats_booked = (locked_show.seats_booked or 0) + len(requested)
-                    locked_show.save(update_fields=update_fields)
-
+                except Exception as e:
+                    logger.exception("Error creating booking (show=%s user=%s seats=%s): %s", show.pk if show else None, request.user, seat_list, exc_info=True)
+                    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                        return JsonResponse({'success': False, 'error': 'Booking failed due to server error.'}, status=500)
+                    messages.error(request, "Booking failed due to server error.")
+                    return redirect(request.META.get('HTTP_REFERER', '/'))
+
+            if conflict_list:
+                msg = f'Some seats already booked: {", ".join(conflict_list)}'
+                logger.info("Booking conflict for user=%s show=%s requested=%s conflicts=%s",
+                            request.user.username if request.user.is_authenticated else None,
+                            show.pk, requested, conflict_list)
+                # XHR -> return JSON with conflict list and 409
+                if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                    return JsonResponse({'success': False, 'error': msg, 'conflicts': conflict_list}, status=409)
+                # Non-XHR -> flash message and redirect back
+                messages.error(request, msg)
+                return redirect(request.META.get('HTTP_REFERER', '/'))
+        else:
+            # create booking without show lock
+            try:
+                with transaction.atomic():
                     booking = Booking.objects.create(
                         user=request.user,
                         movie=movie,
-                        show=locked_show,
-                        seats=','.join(sorted(requested)),
+                        show=None,
+                        seats=','.join(sorted(seat_list)),
                         total_price=total_price,
                         ticket_number=ticket_no
                     )
-            except Exception as e:
-                logger.exception("Error creating booking (show=%s user=%s seats=%s): %s", show.pk if show else None, request.user, seat_list, exc_info=True)
-                if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-                    return JsonResponse({'success': False, 'error': 'Booking failed due to server error.'}, status=500)
-                messages.error(request, "Booking failed due to server error.")
-                return redirect(request.META.get('HTTP_REFERER', '/'))
-        else:
-            # create booking without show lock
-            try:
-                booking = Booking.objects.create(
-                    user=request.user,
-                    movie=movie,
-                    show=None,
-                    seats=','.join(sorted(seat_list)),
-                    total_price=total_price,
-                    ticket_number=ticket_no
-                )
+                    sales.record_sale(booking, len(seat_list))
             except Exception:
                 logger.exception("Error creating booking (no-show) for user=%s seats=%s", request.user, seat_list, exc_info=True)
                 if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -464,11 +699,55 @@ def ticket_view(request):
     auto_print = request.GET.get('auto') == '1'
     return render(request, 'ticket.html', {'booking': booking, 'auto_print': auto_print})
 
+@require_GET
+@login_required
+def ticket_pdf_view(request, ticket_number):
+    """
+    The booking's ticket as a PDF, for its owner or staff. The stored file
+    is streamed, and its content hash is the ETag, so an unchanged ticket
+    revalidates as a 304.
+    """
+    booking = get_object_or_404(Booking.objects.select_related('movie', 'show'), ticket_number=ticket_number)
+    # the PDF carries the gate token: anyone else gets the same 404 as a wrong number
+    if booking.user_id != request.user.id and not request.user.is_staff:
+        raise Http404
+    path, digest = tickets.get_pdf(booking)
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(open(path, 'rb'), content_type='application/pdf',
+                                filename=f'ticket-{booking.ticket_number}.pdf')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=3600)
+    return response
+
+# bookings per page on My Bookings
+MY_BOOKINGS_PAGE_SIZE = 20
+
+
 @login_required
 def my_bookings_view(request):
-    bookings = Booking.objects.filter(user=request.user).select_related('movie','show').order_by('-booking_time')
-    
-    return render(request, 'my_bookings.html', {'bookings': bookings})
+    """
+    The user's bookings, `?tab=upcoming` (default) or `?tab=past`, newest
+    booking first, paginated by `?cursor=...` (movies/bookings.py).
+    `?format=json` returns the page for "load more" and the mobile app.
+    """
+    tab = bookings.PAST if request.GET.get('tab') == bookings.PAST else bookings.UPCOMING
+    page, next_cursor = bookings.keyset_page(
+        bookings.bookings_for(request.user, tab), request.GET.get('cursor'), limit=MY_BOOKINGS_PAGE_SIZE,
+    )
+    cards = [bookings.booking_card(b) for b in page]
+    summary = bookings.get_summary(request.user)
+    summary = {k: v for k, v in summary.items() if k != 'next_start'}
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'tab': tab, 'bookings': cards, 'next_cursor': next_cursor, 'summary': summary})
+    return render(request, 'my_bookings.html', {
+        'bookings': cards,
+        'tab': tab,
+        'next_cursor': next_cursor,
+        'summary': summary,
+    })
 
 @login_required
 def dashboard_view(request):
@@ -478,35 +757,17 @@ def dashboard_view(request):
 
 @staff_member_required
 def admin_dashboard_view(request):
-    total_users_count = User.objects.count()
-    total_revenue = Movie.objects.aggregate(total=Sum('revenue'))['total'] or 0.0
-    total_bookings_count = Booking.objects.count()
-    active_shows = Show.objects.filter(is_active=True).select_related('movie').order_by('show_date','show_time')
-    return render(request, 'dashboard.html', {
-        'active_shows': active_shows,
-        'active_shows_count': active_shows.count(),
-        'total_users_count': total_users_count,
-        'total_revenue': total_revenue,
-        'total_bookings_count': total_bookings_count,
-    })
+    return dashboard(request)
 
 @login_required
 def dashboard(request):
-    active_shows = Show.objects.filter(
-        is_active=True
-    ).select_related('movie').order_by('show_date', 'show_time')
+    # cached, fixed-query snapshot (see movies/dashboard.py)
+    page = dashboard_data.get_active_movies_page(request.GET.get('page'))
 
     context = {
         # UI same for all
-        "active_shows": active_shows,
-        "active_shows_count": active_shows.count(),
-
-        # numbers (safe to show read-only)
-        "total_users_count": User.objects.count(),
-        "total_bookings_count": Booking.objects.count(),
-        "total_revenue": Movie.objects.aggregate(
-            total=Sum('revenue')
-        )['total'] or 0,
+        "active_shows": page['items'],
+        "page": page,
 
         # user info
         "my_bookings_count": Booking.objects.filter(
@@ -516,6 +777,8 @@ def dashboard(request):
         # permission flag
         "is_admin": request.user.is_staff,
     }
+    # numbers (safe to show read-only)
+    context.update(dashboard_data.get_totals())
 
     return render(request, "dashboard.html", context)
 
@@ -545,21 +808,168 @@ def add_shows_view(request):
         price = request.POST.get('price')
         show_date = request.POST.get('show_date')
         show_time = request.POST.get('show_time')
+        hall = (request.POST.get('hall') or '').strip()
         if not movie_id or not price or not show_date or not show_time:
             messages.error(request, "All fields are required.")
             return redirect('add_shows')
         movie = get_object_or_404(Movie, pk=movie_id)
-        Show.objects.create(movie=movie, price=price, show_date=show_date, show_time=show_time)
+        try:
+            day = date.fromisoformat(show_date)
+            at = datetime.strptime(show_time[:5], '%H:%M').time()
+        except ValueError:
+            messages.error(request, "Invalid date or time.")
+            return redirect('add_shows')
+        clashes = scheduling.hall_conflicts(hall, day, at, movie.duration_minutes)
+        if clashes:
+            messages.error(request, f"{hall} is busy then: {'; '.join(clashes)}")
+            return redirect('add_shows')
+        Show.objects.create(movie=movie, price=price, show_date=day, show_time=at, hall=hall)
         messages.success(request, "Show added")
         return redirect('add_shows')
     return render(request, 'add_shows.html', {'now_playing_movies': now_playing_movies})
 
+# rows of a schedule shown in the preview table
+SCHEDULE_PREVIEW_ROWS = 50
+
+
+def _schedule_form_data(payload):
+    """Form data from a JSON body; ``times`` and ``halls`` may be lists."""
+    data = dict(payload)
+    for key in ('times', 'halls'):
+        if isinstance(data.get(key), list):
+            data[key] = ', '.join(str(v) for v in data[key])
+    if 'movie_id' in data and 'movie' not in data:
+        data['movie'] = data.pop('movie_id')
+    return data
+
+
+@staff_member_required
+def bulk_schedule_view(request):
+    """
+    Schedule a recurring run of shows in one go (movies/scheduling.py).
+    The form previews the run first. A JSON POST with the same fields is
+    the API: it answers 201, or 409 listing the clashes, or 200 for
+    ``dry_run``.
+    """
+    is_json = request.content_type == 'application/json'
+    if request.method != 'POST':
+        return render(request, 'bulk_schedule.html', {'form': BulkScheduleForm()})
+
+    if is_json:
+        try:
+            form = BulkScheduleForm(_schedule_form_data(json.loads(request.body.decode('utf-8'))))
+        except (ValueError, TypeError):
+            return HttpResponseBadRequest('Invalid JSON')
+    else:
+        form = BulkScheduleForm(request.POST)
+    if not form.is_valid():
+        if is_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        return render(request, 'bulk_schedule.html', {'form': form})
+
+    schedule = scheduling.plan(form.recurrence())
+    dry_run = form.cleaned_data['dry_run'] or 'preview' in request.POST
+    blocked = bool(schedule.conflicts) and not form.cleaned_data['skip_conflicts']
+    created = [] if dry_run or blocked else scheduling.commit(schedule)
+
+    if is_json:
+        status = 201 if created else (409 if blocked and not dry_run else 200)
+        return JsonResponse({
+            'dry_run': dry_run,
+            'planned': len(schedule.shows),
+            'created': len(created),
+            'conflicts': [
+                {'date': day.isoformat(), 'time': at.strftime('%H:%M'), 'hall': hall, 'clashes_with': clashes}
+                for day, at, hall, clashes in schedule.conflicts
+            ],
+        }, status=status)
+    if created:
+        messages.success(request, f"Scheduled {len(created)} shows")
+        return redirect('list_shows')
+    return render(request, 'bulk_schedule.html', {
+        'form': form,
+        'schedule': schedule,
+        'preview': schedule.shows[:SCHEDULE_PREVIEW_ROWS],
+        'blocked': blocked,
+    })
+
+
 @staff_member_required
 def list_shows_view(request):
     movies = Movie.objects.order_by('-release_date')
     return render(request, 'list_shows.html', {'movies': movies})
 
 
+# scans accepted in one batch from an offline gate scanner
+GATE_BATCH_MAX = 1000
+
+
+def _gate_payload(request):
+    """The JSON body and the gate's show id (optional), or an error response."""
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+        show_id = payload.get('show')
+        return payload, int(show_id) if show_id not in (None, '') else None, None
+    except (ValueError, TypeError, AttributeError):
+        return None, None, HttpResponseBadRequest('Invalid JSON')
+
+
+@staff_member_required
+@require_POST
+def gate_scan(request):
+    """
+    Validate one scanned ticket token at the entrance (movies/gate.py).
+    ``{"token": ..., "show": <id, optional>}``; the answer's ``status`` is
+    admitted, already_admitted, wrong_show, not_found or invalid.
+    """
+    payload, show_id, error = _gate_payload(request)
+    if error:
+        return error
+    return JsonResponse(gate.admit(payload.get('token'), show_id))
+
+
+@staff_member_required
+@require_POST
+def gate_scan_batch(request):
+    """
+    Scans collected by a scanner while offline:
+    ``{"show": <id, optional>, "scans": [{"token": ..., "scanned_at": ISO 8601}, ...]}``.
+    Results come back in the same order.
+    """
+    payload, show_id, error = _gate_payload(request)
+    if error:
+        return error
+    scans = payload.get('scans')
+    if not isinstance(scans, list) or len(scans) > GATE_BATCH_MAX:
+        return JsonResponse({'error': f'scans must be a list of at most {GATE_BATCH_MAX}'}, status=400)
+    items = []
+    for scan in scans:
+        if not isinstance(scan, dict):
+            items.append((None, None))
+            continue
+        try:
+            scanned_at = parse_datetime(str(scan.get('scanned_at') or ''))
+        except ValueError:
+            # well-formed but impossible (Feb 30): the scan is rejected as invalid
+            items.append((None, None))
+            continue
+        if scanned_at is not None and timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        items.append((scan.get('token'), scanned_at))
+    results = gate.admit_many(items, show_id)
+    return JsonResponse({
+        'results': results,
+        'admitted': sum(1 for r in results if r['ok']),
+    })
+
+
+@staff_member_required
+def page_cache_stats(request):
+    """Hit/miss/bypass counters of the anonymous page cache, per view."""
+    return JsonResponse({'catalog_version': pagecache.catalog_version(), 'views': pagecache.stats()})
+
+
+@cache_anonymous_page
 def theaters_list_view(request):
     theaters = [
         {
@@ -2,6 +2,13 @@
 ASGI config for quickshow_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve through it (e.g. ``gunicorn -k uvicorn.workers.UvicornWorker``) to get
+live seat updates from /api/show/<id>/seat_events/; under WSGI that endpoint
+answers 204 and the seat map falls back to polling. /api/chat/ also runs
+natively there instead of tying up a worker per reply; set
+CHAT_SHARED_CLIENT=True in the environment so replies share one pooled
+connection to the chat provider. Leave it off under WSGI, where every
+request runs on its own short-lived event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
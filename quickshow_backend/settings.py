@@ -67,12 +67,14 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "movies.context_processors.navbar_profile",
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = "quickshow_backend.wsgi.application"
+# the ASGI entry point is quickshow_backend/asgi.py (see its docstring)
 
 # =========================
 # DATABASE
@@ -129,6 +131,95 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# threads that clean uploaded profile pictures and make thumbnails; 0 = inline
+THUMBNAIL_WORKERS = int(os.environ.get("THUMBNAIL_WORKERS", "2"))
+
+# rendered ticket PDFs, keyed by content hash (movies/tickets.py); not publicly served
+TICKET_PDF_DIR = Path(os.environ.get("TICKET_PDF_DIR", BASE_DIR / "ticket_cache"))
+
+# =========================
+# CACHE
+# =========================
+# shared Redis cache when REDIS_URL is set, per-process memory otherwise
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# fan-out for live seat updates: Redis pub/sub across workers, else in-process
+SEAT_EVENTS_BROKER = (
+    "movies.seatevents.RedisBroker" if REDIS_URL else "movies.seatevents.InMemoryBroker"
+)
+
+# how long a show's seat version / serialized seat state may be served from cache;
+# the version is only cached when the cache is shared, as bumps clear it in one process
+SEAT_VERSION_CACHE_SECONDS = int(os.environ.get("SEAT_VERSION_CACHE_SECONDS", "30" if REDIS_URL else "0"))
+SEAT_STATE_CACHE_SECONDS = int(os.environ.get("SEAT_STATE_CACHE_SECONDS", "300"))
+
+# max age of a process's typeahead index (movies/suggest.py); 0 = rebuild only
+# when the generation in the shared cache moves, which LocMem cannot carry
+SUGGEST_REBUILD_SECONDS = int(os.environ.get("SUGGEST_REBUILD_SECONDS", "0" if REDIS_URL else "300"))
+
+# staff dashboard snapshot lifetime (also invalidated on show/booking changes)
+DASHBOARD_CACHE_SECONDS = int(os.environ.get("DASHBOARD_CACHE_SECONDS", "60"))
+
+# anonymous catalog pages (also invalidated on movie/show changes)
+PAGE_CACHE_SECONDS = int(os.environ.get("PAGE_CACHE_SECONDS", "300"))
+
+# per-user "My Bookings" summary (also invalidated on the user's booking changes)
+MY_BOOKINGS_CACHE_SECONDS = int(os.environ.get("MY_BOOKINGS_CACHE_SECONDS", "300"))
+
+# =========================
+# SEAT HOLDS
+# =========================
+# minutes a seat stays reserved between seat selection and checkout
+SEAT_HOLD_MINUTES = int(os.environ.get("SEAT_HOLD_MINUTES", "10"))
+SEAT_HOLD_MAX_SEATS = int(os.environ.get("SEAT_HOLD_MAX_SEATS", "10"))
+
+# =========================
+# SHOW SCHEDULING
+# =========================
+# minutes a hall stays blocked after a show ends (cleaning, seating)
+SHOW_CLEANUP_MINUTES = int(os.environ.get("SHOW_CLEANUP_MINUTES", "20"))
+# show dates/times are wall-clock times in this zone
+THEATER_TIME_ZONE = os.environ.get("THEATER_TIME_ZONE", TIME_ZONE)
+# days of upcoming shows listed on the seat selection page
+SEAT_PAGE_DAYS = int(os.environ.get("SEAT_PAGE_DAYS", "14"))
+
+# =========================
+# CHAT ASSISTANT
+# =========================
+# pooled provider client, per-user limits and reply cache (movies/chat.py)
+# share one pooled client per event loop; only pays off when served through
+# quickshow_backend/asgi.py. Under WSGI each request gets its own client
+CHAT_SHARED_CLIENT = os.environ.get("CHAT_SHARED_CLIENT", "False") == "True"
+CHAT_TIMEOUT_SECONDS = int(os.environ.get("CHAT_TIMEOUT_SECONDS", "15"))
+CHAT_MAX_CONNECTIONS = int(os.environ.get("CHAT_MAX_CONNECTIONS", "20"))
+CHAT_RATE_LIMIT = int(os.environ.get("CHAT_RATE_LIMIT", "20"))  # messages per user per minute
+CHAT_MAX_CONCURRENT = int(os.environ.get("CHAT_MAX_CONCURRENT", "2"))
+CHAT_CACHE_SIZE = int(os.environ.get("CHAT_CACHE_SIZE", "256"))
+CHAT_CACHE_SECONDS = int(os.environ.get("CHAT_CACHE_SECONDS", "600"))
+# circuit breaker around the provider and retries of failures it never acted on
+CHAT_BREAKER_WINDOW_SECONDS = int(os.environ.get("CHAT_BREAKER_WINDOW_SECONDS", "60"))
+CHAT_BREAKER_MIN_CALLS = int(os.environ.get("CHAT_BREAKER_MIN_CALLS", "5"))
+CHAT_BREAKER_FAILURE_RATE = float(os.environ.get("CHAT_BREAKER_FAILURE_RATE", "0.5"))
+CHAT_BREAKER_RESET_SECONDS = int(os.environ.get("CHAT_BREAKER_RESET_SECONDS", "30"))
+CHAT_RETRY_ATTEMPTS = int(os.environ.get("CHAT_RETRY_ATTEMPTS", "2"))
+CHAT_RETRY_BACKOFF_SECONDS = float(os.environ.get("CHAT_RETRY_BACKOFF_SECONDS", "0.25"))
+CHAT_RETRY_BUDGET = float(os.environ.get("CHAT_RETRY_BUDGET", "0.2"))  # retries per call in the window
+
 # =========================
 # DEFAULT PK
 # =========================
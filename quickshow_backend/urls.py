@@ -2,13 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from movies import views as movie_views
+from movies import thumbnails, views as movie_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('movies.urls')),
     path('theaters/', movie_views.theaters_list_view, name='theaters'),
-
+    # content-hashed thumbnails get far-future cache headers, in production too
+    path(f"{settings.MEDIA_URL.lstrip('/')}{thumbnails.THUMB_DIR}/<str:name>",
+         movie_views.profile_thumbnail, name='profile_thumbnail'),
 ]
 
 if settings.DEBUG:
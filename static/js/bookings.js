@@ -0,0 +1,58 @@
+// static/js/bookings.js
+// "Load more" for My Bookings. The server renders the first page; later
+// pages come from `/my-bookings/?format=json&tab=...&cursor=...` (keyset paging).
+(function () {
+  function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+  }
+
+  function bookingCardHtml(b) {
+    return `
+      <div class="booking-card">
+        <div class="booking-left">
+          <div class="booking-title">${escapeHtml(b.title)}</div>
+          <div class="booking-meta">Show: ${escapeHtml(b.show_label)}</div>
+          <div class="booking-meta">Seats: ${escapeHtml(b.seats)}</div>
+          <div class="booking-meta">Booked: ${escapeHtml(b.booked_label)}</div>
+        </div>
+        <div class="booking-right">
+          <div style="font-weight:800;color:#fff">$${escapeHtml(b.price)}</div>
+          <a class="btn-ticket" href="${escapeHtml(b.ticket_url)}">View ticket</a>
+        </div>
+      </div>`;
+  }
+
+  // options: list, button, endpoint (URL with the tab), cursor
+  function setupBookingsPaging(opts) {
+    const list = opts.list;
+    const button = opts.button;
+    let cursor = opts.cursor || '';
+    let loading = false;
+    if (!list || !button || !cursor) return;
+
+    button.addEventListener('click', async (e) => {
+      e.preventDefault();
+      if (loading || !cursor) return;
+      loading = true;
+      try {
+        const url = new URL(opts.endpoint, window.location.origin);
+        url.searchParams.set('format', 'json');
+        url.searchParams.set('cursor', cursor);
+        const res = await fetch(url.toString(), { credentials: 'same-origin' });
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        const data = await res.json();
+        list.insertAdjacentHTML('beforeend', (data.bookings || []).map(bookingCardHtml).join(''));
+        cursor = data.next_cursor || '';
+        if (!cursor && button.parentElement) button.parentElement.style.display = 'none';
+      } catch (err) {
+        console.error('load more bookings error', err);
+      } finally {
+        loading = false;
+      }
+    });
+  }
+
+  window.setupBookingsPaging = setupBookingsPaging;
+})();
@@ -0,0 +1,78 @@
+// static/js/catalog.js
+// "Show More" / infinite scroll for movie grids. The server renders the first
+// page; later pages come from `/movies/?format=json&cursor=...` (keyset paging).
+(function () {
+  function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+  }
+
+  function movieCardHtml(m) {
+    return `
+      <div class="movie-card">
+        <div class="movie-poster">
+          <img src="${escapeHtml(m.poster_url)}" alt="${escapeHtml(m.title)}" loading="lazy">
+        </div>
+        <div class="movie-info">
+          <h3>${escapeHtml(m.title)}</h3>
+          <p class="meta">${escapeHtml(m.year)} &bull; ${escapeHtml(m.genre)} &bull; ${escapeHtml(m.duration)}</p>
+          <div class="card-footer">
+            <a href="${escapeHtml(m.url)}" class="buy-tickets-btn">Buy Tickets</a>
+            <div class="rating">
+              <i class="fas fa-star"></i>
+              <span>${escapeHtml(m.rating)}</span>
+            </div>
+          </div>
+        </div>
+      </div>`;
+  }
+
+  // options: grid, button, endpoint (URL with current filters), cursor, autoload
+  function setupCatalogPaging(opts) {
+    const grid = opts.grid;
+    const button = opts.button;
+    let cursor = opts.cursor || '';
+    let loading = false;
+    if (!grid || !button) return;
+
+    function done() {
+      cursor = '';
+      if (button.parentElement) button.parentElement.style.display = 'none';
+    }
+    if (!cursor) return done();
+
+    async function loadMore() {
+      if (loading || !cursor) return;
+      loading = true;
+      button.disabled = true;
+      try {
+        const url = new URL(opts.endpoint, window.location.origin);
+        url.searchParams.set('format', 'json');
+        url.searchParams.set('cursor', cursor);
+        const res = await fetch(url.toString(), { credentials: 'same-origin' });
+        if (!res.ok) throw new Error('HTTP ' + res.status);
+        const data = await res.json();
+        grid.insertAdjacentHTML('beforeend', (data.movies || []).map(movieCardHtml).join(''));
+        cursor = data.next_cursor || '';
+        if (!cursor) done();
+      } catch (err) {
+        console.error('load more movies error', err);
+      } finally {
+        loading = false;
+        button.disabled = false;
+      }
+    }
+
+    button.addEventListener('click', (e) => { e.preventDefault(); loadMore(); });
+
+    // infinite scroll: fetch the next page as the button scrolls into view
+    if (opts.autoload && 'IntersectionObserver' in window) {
+      new IntersectionObserver(entries => {
+        if (entries.some(en => en.isIntersecting)) loadMore();
+      }, { rootMargin: '400px' }).observe(button);
+    }
+  }
+
+  window.setupCatalogPaging = setupCatalogPaging;
+})();
@@ -118,6 +118,7 @@
       // when show changes, fetch booked seats for that show if endpoint exists
       const sid = slot.getAttribute('data-show-id');
       if (sid) fetchAndMarkBookedSeats(sid);
+      watchShow(sid);
     });
   }
 
@@ -135,40 +136,102 @@
     return { showId: (showId || '').toString(), showText };
   }
 
-  // fetch booked seats from your API endpoint and mark them
+  // last seat-map version drawn, so unchanged polls don't touch the DOM
+  let markedShowId = null;
+  let markedVersion = null;
+
+  // fetch booked seats from your API endpoint and mark them; the endpoint sends
+  // an ETag, so 'no-cache' revalidates and unchanged maps come back as a 304
   async function fetchAndMarkBookedSeats(showId) {
     if (!showId) return;
     try {
-      const res = await fetch(`/api/show/${showId}/booked_seats/`);
+      const res = await fetch(`/api/show/${showId}/booked_seats/`, { cache: 'no-cache', credentials: 'same-origin' });
       if (!res.ok) return;
       const data = await res.json();
+      if (String(showId) === markedShowId && data.version !== undefined && data.version === markedVersion) return;
+      markedShowId = String(showId);
+      markedVersion = data.version;
       markBookedSeats(data.booked || []);
     } catch (err) {
       console.error('fetchBookedSeats error', err);
     }
   }
 
+  function setSeatBooked(el, booked) {
+    if (booked) {
+      el.classList.add('seat-booked');
+      el.classList.add('occupied');
+      el.classList.remove('selected');
+      el.setAttribute('aria-disabled', 'true');
+      el.setAttribute('data-available', 'false');
+      el.disabled = true;
+      el.style.opacity = '0.35';
+      el.style.pointerEvents = 'none';
+    } else {
+      el.classList.remove('seat-booked');
+      el.classList.remove('occupied');
+      el.removeAttribute('aria-disabled');
+      el.setAttribute('data-available', 'true');
+      el.disabled = false;
+      el.style.opacity = '';
+      el.style.pointerEvents = '';
+    }
+  }
+
   function markBookedSeats(list) {
     const setB = new Set(list || []);
     document.querySelectorAll('[data-seat], [data-seat-id]').forEach(el => {
       const id = el.getAttribute('data-seat') || el.getAttribute('data-seat-id') || '';
       if (!id) return;
-      if (setB.has(id)) {
-        el.classList.add('seat-booked');
-        el.classList.add('occupied');
-        el.setAttribute('aria-disabled', 'true');
-        el.setAttribute('data-available', 'false');
-        el.disabled = true;
-        el.style.opacity = '0.35';
-        el.style.pointerEvents = 'none';
-      } else {
-        el.classList.remove('seat-booked');
-        el.classList.remove('occupied');
-        el.removeAttribute('aria-disabled');
-        el.setAttribute('data-available', 'true');
-        el.disabled = false;
-        el.style.opacity = '';
-        el.style.pointerEvents = '';
+      setSeatBooked(el, setB.has(id));
+    });
+  }
+
+  // apply a live delta: only the seats that changed are touched
+  function applySeatDelta(taken, freed) {
+    (freed || []).forEach(id => {
+      const el = document.querySelector(`[data-seat-id="${id}"]`);
+      if (el) setSeatBooked(el, false);
+    });
+    (taken || []).forEach(id => {
+      const el = document.querySelector(`[data-seat-id="${id}"]`);
+      if (el) setSeatBooked(el, true);
+    });
+    markedVersion = null;
+  }
+
+  // live updates over server-sent events; falls back to polling when the
+  // server can't stream (WSGI answers 204, which closes the EventSource)
+  let eventSource = null;
+  let pollTimer = null;
+
+  function watchShow(showId) {
+    if (eventSource) { eventSource.close(); eventSource = null; }
+    if (pollTimer) { clearInterval(pollTimer); pollTimer = null; }
+    if (!showId) return;
+
+    if (!window.EventSource) {
+      pollTimer = setInterval(() => fetchAndMarkBookedSeats(showId), 15000);
+      return;
+    }
+    const es = new EventSource(`/api/show/${showId}/seat_events/`);
+    eventSource = es;
+    let opened = false;
+    es.addEventListener('open', () => {
+      // (re)connected: events may have been missed, so resync once
+      if (opened) fetchAndMarkBookedSeats(showId);
+      opened = true;
+    });
+    es.addEventListener('seats', (e) => {
+      let data;
+      try { data = JSON.parse(e.data); } catch (err) { return; }
+      if (data.reset) fetchAndMarkBookedSeats(showId);
+      else applySeatDelta(data.taken, data.freed);
+    });
+    es.addEventListener('error', () => {
+      if (es.readyState === EventSource.CLOSED && eventSource === es) {
+        eventSource = null;
+        pollTimer = setInterval(() => fetchAndMarkBookedSeats(showId), 15000);
       }
     });
   }
@@ -184,6 +247,10 @@
     window.getActiveShow = getActiveShow;
     window.markBookedSeats = markBookedSeats;
     window.fetchAndMarkBookedSeats = fetchAndMarkBookedSeats;
+    window.applySeatDelta = applySeatDelta;
+
+    const watched = document.querySelector('#timings-list .time-slot.active[data-show-id]');
+    if (watched) watchShow(watched.getAttribute('data-show-id'));
 
     // If server-injected initial seats exist in template variable initial_booked_seats, use them.
     try {
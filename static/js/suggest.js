@@ -0,0 +1,68 @@
+// static/js/suggest.js
+// Typeahead under the navbar search box, fed by /api/movies/suggest/.
+// Requests are debounced and stale responses are dropped.
+(function () {
+  function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+  }
+
+  function setupSuggest(input, list, endpoint) {
+    if (!input || !list) return;
+    let timer = null;
+    let seq = 0;
+    let active = -1;
+
+    function close() {
+      list.innerHTML = '';
+      list.style.display = 'none';
+      active = -1;
+    }
+
+    function render(results) {
+      if (!results.length) return close();
+      list.innerHTML = results.map((m) => `
+        <li><a href="${escapeHtml(m.url)}" class="qs-suggest-item">
+          <span class="qs-suggest-title">${escapeHtml(m.title)}</span>
+          <span class="qs-suggest-meta">${escapeHtml(m.year || '')} &bull; ${escapeHtml(m.genre)} &bull; <i class="fas fa-star"></i> ${escapeHtml(m.rating)}</span>
+        </a></li>`).join('');
+      list.style.display = 'block';
+      active = -1;
+    }
+
+    function fetchSuggestions() {
+      const q = input.value.trim();
+      const mine = ++seq;
+      if (!q) return close();
+      fetch(`${endpoint}?q=${encodeURIComponent(q)}&limit=8`)
+        .then((r) => (r.ok ? r.json() : { results: [] }))
+        .then((data) => { if (mine === seq) render(data.results || []); })
+        .catch(() => {});
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(fetchSuggestions, 120);
+    });
+
+    input.addEventListener('keydown', function (e) {
+      const items = list.querySelectorAll('a');
+      if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+        if (!items.length) return;
+        e.preventDefault();
+        active = (active + (e.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+        items.forEach((a, i) => a.classList.toggle('active', i === active));
+      } else if (e.key === 'Enter' && active >= 0 && items[active]) {
+        // open the highlighted movie instead of running a full search
+        e.preventDefault();
+        e.stopImmediatePropagation();
+        window.location.href = items[active].getAttribute('href');
+      } else if (e.key === 'Escape') {
+        close();
+      }
+    });
+  }
+
+  window.setupSuggest = setupSuggest;
+})();